@@ -0,0 +1,321 @@
+"""
+Batch analysis of many videos from the command line, without going through the HTTP API.
+
+    python -m app.batch VIDEO_DIR --exercise squat -o results/
+    python -m app.batch manifest.csv -o results/      # CSV with a path column (and optionally exercise)
+    python -m app.batch videos.txt --exercise benchpress -o results/   # one path per line
+
+Videos are spread over worker processes (one per core by default), each running the same
+pipeline as an upload (frame extraction, pose analysis, rep counting, validation) on its own
+warm MediaPipe graph. Every finished video is appended to results/journal.jsonl, so running
+the same command again after an interruption skips the videos that are already done.
+When the run ends (or is interrupted) results/results.npz is rewritten with one column per
+field: video_* arrays with one entry per input video and rep_* arrays with one entry per rep
+(rep_video is the index of the rep's video).
+"""
+
+import argparse
+import csv
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+import numpy as np
+
+from app.config import POSE_CHUNK_SIZE, POSE_SEGMENT_CHUNKS
+from app.exercises import EXERCISES
+
+logger = logging.getLogger("app.batch")
+
+VIDEO_EXTENSIONS = {".mp4", ".mov", ".avi", ".mkv", ".webm", ".m4v"}
+JOURNAL_NAME = "journal.jsonl"
+RESULTS_NAME = "results.npz"
+
+# Per-process state of a batch worker (set by _init_worker)
+_worker_engine = None
+
+
+def find_videos(source, exercise=None):
+    """
+    List the videos to analyze.
+    source: a directory (searched recursively for video files), a .csv manifest with a "path"
+    column and an optional "exercise" column, or a text file with one path per line;
+    relative paths in a manifest are resolved against the manifest's directory
+    exercise: exercise for every video that doesn't name its own
+    Returns: list of (absolute path, exercise name)
+    Raises: ValueError for unknown exercises, missing exercises or an unreadable source
+    """
+    if os.path.isdir(source):
+        paths = []
+        for root, dirs, files in os.walk(source):
+            dirs.sort()
+            paths.extend(
+                os.path.join(root, name) for name in sorted(files)
+                if os.path.splitext(name)[1].lower() in VIDEO_EXTENSIONS
+            )
+        rows = [(path, None) for path in paths]
+    elif os.path.isfile(source):
+        base = os.path.dirname(os.path.abspath(source))
+        with open(source, newline="") as f:
+            if source.lower().endswith(".csv"):
+                reader = csv.DictReader(f)
+                if "path" not in (reader.fieldnames or []):
+                    raise ValueError(f"{source} has no 'path' column")
+                rows = [(row["path"], row.get("exercise") or None) for row in reader if row["path"]]
+            else:
+                lines = (line.strip() for line in f)
+                rows = [(line, None) for line in lines if line and not line.startswith("#")]
+        rows = [(os.path.join(base, path), name) for path, name in rows]
+    else:
+        raise ValueError(f"{source} is neither a directory nor a manifest file")
+
+    videos = []
+    for path, name in rows:
+        name = name or exercise
+        if name is None:
+            raise ValueError(f"No exercise given for {path} (pass --exercise)")
+        if name not in EXERCISES:
+            raise ValueError(f"Unknown exercise '{name}' for {path} (known: {', '.join(EXERCISES)})")
+        videos.append((os.path.abspath(path), name))
+    return videos
+
+
+def video_id(path, exercise):
+    """
+    Identity of one unit of work: the same file (path, size and modification time) and exercise.
+    A video that changed on disk since it was analyzed is analyzed again.
+    """
+    try:
+        stat = os.stat(path)
+        version = f"{stat.st_size}:{stat.st_mtime_ns}"
+    except OSError:
+        version = "missing"
+    return hashlib.sha256(f"{exercise}\0{path}\0{version}".encode("utf-8")).hexdigest()[:32]
+
+
+def load_journal(path):
+    """
+    Finished entries from an earlier run, by video id (the last entry for a video wins)
+    """
+    entries = {}
+    if not os.path.exists(path):
+        return entries
+    with open(path) as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # a line cut short by an interruption
+            entries[entry["id"]] = entry
+    return entries
+
+
+def _init_worker(chunk_size, segment_chunks, pose_options, use_cache):
+    global _worker_engine
+    from app.utils.pose_engine import InlinePoseEngine
+    from app.utils.pose_cache import pose_cache
+    if not use_cache:
+        pose_cache.max_bytes = 0
+    _worker_engine = InlinePoseEngine(chunk_size=chunk_size, segment_chunks=segment_chunks, **pose_options)
+
+
+def analyze_one(path, exercise_name, poses_dir=None):
+    """
+    Analyze one video in a worker process (same pipeline as an upload)
+    Returns: result dict for the journal (status "ok" or "error")
+    """
+    from app.utils.pipeline import analyze_video
+    from app.utils.pose_serialization import pose_frame_numbers
+
+    exercise = EXERCISES[exercise_name]
+    start = time.perf_counter()
+    try:
+        pose_data, rep_info = analyze_video(
+            path, exercise.rep_counter, landmark_ids=exercise.landmarks,
+            signal_landmarks=exercise.signal_landmarks, validator=exercise.validator, engine=_worker_engine,
+        )
+        pose_file = None
+        if poses_dir:
+            pose_file = os.path.join(poses_dir, f"{video_id(path, exercise_name)}.npz")
+            pose_data.save(pose_file)
+        return {
+            "status": "ok",
+            "rep_count": rep_info["rep_count"],
+            "frames": len(pose_data),
+            "reps": rep_info["reps_data"],
+            "frame_numbers": pose_frame_numbers(pose_data),  # Source frame of each pose row (adaptive sampling only)
+            "pose_file": pose_file,
+            "seconds": time.perf_counter() - start,
+        }
+    except Exception as e:
+        return {"status": "error", "error": f"{type(e).__name__}: {e}", "seconds": time.perf_counter() - start}
+
+
+def run_batch(videos, output_dir, workers=None, save_poses=False, use_cache=True):
+    """
+    Analyze every video not finished in an earlier run, appending results to the journal.
+    Returns: (journal entries by video id, number of videos analyzed in this run)
+    """
+    from app.utils.pose_engine import pose_options
+
+    os.makedirs(output_dir, exist_ok=True)
+    journal_path = os.path.join(output_dir, JOURNAL_NAME)
+    entries = load_journal(journal_path)
+    poses_dir = os.path.join(output_dir, "poses") if save_poses else None
+    if poses_dir:
+        os.makedirs(poses_dir, exist_ok=True)
+
+    todo = []
+    for path, exercise in videos:
+        vid = video_id(path, exercise)
+        if entries.get(vid, {}).get("status") != "ok":
+            todo.append((vid, path, exercise))
+    logger.info("%d videos, %d already done, %d to analyze", len(videos), len(videos) - len(todo), len(todo))
+    if not todo:
+        return entries, 0
+
+    workers = workers or os.cpu_count() or 1
+    # The pool already keeps every core busy, so give each worker a single decode thread
+    # (read by the spawned workers' config unless set explicitly)
+    os.environ.setdefault("VIDEO_DECODE_THREADS", "1")
+    started = time.perf_counter()
+    done = 0
+    pool = ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(POSE_CHUNK_SIZE, POSE_SEGMENT_CHUNKS, pose_options(), use_cache),
+    )
+    try:
+        with open(journal_path, "a") as journal:
+            queue = iter(todo)
+            in_flight = {}
+            while True:
+                # Keep every worker busy without queuing the whole list up front
+                while len(in_flight) < workers * 2:
+                    task = next(queue, None)
+                    if task is None:
+                        break
+                    vid, path, exercise = task
+                    in_flight[pool.submit(analyze_one, path, exercise, poses_dir)] = task
+                if not in_flight:
+                    break
+                finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    vid, path, exercise = in_flight.pop(future)
+                    entry = {"id": vid, "path": path, "exercise": exercise, **future.result()}
+                    journal.write(json.dumps(entry) + "\n")
+                    journal.flush()
+                    os.fsync(journal.fileno())
+                    entries[vid] = entry
+                    done += 1
+
+                    elapsed = time.perf_counter() - started
+                    remaining = elapsed / done * (len(todo) - done)
+                    if entry["status"] == "ok":
+                        logger.info("[%d/%d] %s %s: %d reps, %d frames in %.1fs (%d:%02d left)",
+                                    done, len(todo), exercise, path, entry["rep_count"], entry["frames"],
+                                    entry["seconds"], remaining // 60, remaining % 60)
+                    else:
+                        logger.warning("[%d/%d] %s %s failed: %s", done, len(todo), exercise, path, entry["error"])
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+    return entries, done
+
+
+def _column(values):
+    """One NPZ column from per-rep values (None becomes NaN, False or "" depending on the type)"""
+    present = [value for value in values if value is not None]
+    if present and all(isinstance(value, bool) for value in present):
+        return np.array([bool(value) for value in values], dtype=bool)
+    if present and all(isinstance(value, int) and not isinstance(value, bool) for value in present) \
+            and len(present) == len(values):
+        return np.array(values, dtype=np.int64)
+    if all(isinstance(value, (int, float)) and not isinstance(value, bool) for value in present):
+        return np.array([np.nan if value is None else value for value in values], dtype=np.float64)
+    return np.array(["" if value is None else str(value) for value in values])
+
+
+def write_results(videos, entries, path):
+    """
+    Write the columnar results file for the given videos (in input order); videos without a
+    journal entry yet are listed with status "pending"
+    """
+    rows = []
+    for video_path, exercise in videos:
+        entry = entries.get(video_id(video_path, exercise)) or {}
+        rows.append((video_path, exercise, entry))
+
+    columns = {
+        "video_path": np.array([video_path for video_path, _, _ in rows]),
+        "video_exercise": np.array([exercise for _, exercise, _ in rows]),
+        "video_status": np.array([entry.get("status", "pending") for _, _, entry in rows]),
+        "video_error": np.array([entry.get("error") or "" for _, _, entry in rows]),
+        "video_rep_count": np.array([entry.get("rep_count", -1) for _, _, entry in rows], dtype=np.int32),
+        "video_frames": np.array([entry.get("frames", -1) for _, _, entry in rows], dtype=np.int32),
+        "video_seconds": np.array([entry.get("seconds", np.nan) for _, _, entry in rows], dtype=np.float64),
+        "video_pose_file": np.array([entry.get("pose_file") or "" for _, _, entry in rows]),
+    }
+
+    reps = []
+    for index, (_, _, entry) in enumerate(rows):
+        for rep in entry.get("reps") or []:
+            reps.append((index, rep))
+    # Union of the rep fields of every exercise, in first-seen order
+    fields = []
+    for _, rep in reps:
+        fields.extend(name for name in rep if name not in fields)
+    columns["rep_video"] = np.array([index for index, _ in reps], dtype=np.int32)
+    for name in fields:
+        key = name if name.startswith("rep_") else f"rep_{name}"
+        columns[key] = _column([rep.get(name) for _, rep in reps])
+
+    # Write next to the target and rename, so an interrupted write never leaves a broken file
+    tmp_path = path + ".tmp.npz"
+    np.savez(tmp_path, **columns)
+    os.replace(tmp_path, path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m app.batch", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("source", help="directory of videos, .csv manifest (path[,exercise]) or text file of paths")
+    parser.add_argument("-e", "--exercise", choices=sorted(EXERCISES), help="exercise for videos that don't name one")
+    parser.add_argument("-o", "--output", default="batch-results", help="output directory (default: batch-results)")
+    parser.add_argument("-w", "--workers", type=int, default=0, help="worker processes (default: one per core)")
+    parser.add_argument("--save-poses", action="store_true", help="also save each video's landmarks to OUTPUT/poses/")
+    parser.add_argument("--no-cache", action="store_true", help="don't read or fill the pose cache")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    try:
+        videos = find_videos(args.source, args.exercise)
+    except ValueError as e:
+        parser.error(str(e))
+
+    results_path = os.path.join(args.output, RESULTS_NAME)
+    entries = {}
+    try:
+        entries, _ = run_batch(
+            videos, args.output, workers=args.workers or None,
+            save_poses=args.save_poses, use_cache=not args.no_cache,
+        )
+    except KeyboardInterrupt:
+        logger.warning("Interrupted - run the same command again to resume")
+        entries = load_journal(os.path.join(args.output, JOURNAL_NAME))
+        write_results(videos, entries, results_path)
+        sys.exit(130)
+
+    write_results(videos, entries, results_path)
+    statuses = [entries.get(video_id(path, exercise), {}).get("status", "pending") for path, exercise in videos]
+    logger.info("Wrote %s: %d ok, %d failed", results_path, statuses.count("ok"), statuses.count("error"))
+    if statuses.count("error"):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
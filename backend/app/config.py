@@ -0,0 +1,102 @@
+"""
+Runtime configuration for the analysis pipeline.
+Values are read from environment variables (or backend/.env) so they can be tuned per deployment.
+"""
+
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+def _float_env(name, default):
+    value = os.getenv(name)
+    if value is None or value == "":
+        return default
+    return float(value)
+
+
+def _bool_env(name, default):
+    value = os.getenv(name)
+    if value is None or value == "":
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def _int_env(name, default):
+    value = os.getenv(name)
+    if value is None or value == "":
+        return default
+    return int(value)
+
+
+# Frame extraction
+FRAME_SAMPLE_FPS = _int_env("FRAME_SAMPLE_FPS", 3)  # Frames per second sent to pose analysis
+FRAME_MAX_WIDTH = _int_env("FRAME_MAX_WIDTH", 640)  # Downscale frames wider than this (0 = keep original size)
+FRAME_MAX_HEIGHT = _int_env("FRAME_MAX_HEIGHT", 0)  # Downscale frames taller than this (0 = keep original size)
+
+# Video decoding (see app/utils/video_decoders.py)
+VIDEO_DECODER = os.getenv("VIDEO_DECODER", "auto").strip().lower()  # auto, opencv or pyav (needs `pip install av`)
+VIDEO_DECODE_THREADS = _int_env("VIDEO_DECODE_THREADS", 0)  # Decode threads per video (0 = decoder default, about one per core)
+VIDEO_DECODE_HW = _bool_env("VIDEO_DECODE_HW", False)  # Let OpenCV use hardware decoding where available
+
+# Adaptive frame sampling: a low-rate first pass, then denser windows around the bottom of each rep
+FRAME_ADAPTIVE = _bool_env("FRAME_ADAPTIVE", False)  # True = two-pass adaptive sampling (unevenly spaced pose rows, see frame_numbers)
+FRAME_ADAPTIVE_BASE_FPS = _float_env("FRAME_ADAPTIVE_BASE_FPS", 2.0)  # First pass sampling rate
+FRAME_ADAPTIVE_PEAK_FPS = _float_env("FRAME_ADAPTIVE_PEAK_FPS", 10.0)  # Sampling rate inside the refinement windows
+FRAME_ADAPTIVE_WINDOW = _float_env("FRAME_ADAPTIVE_WINDOW", 0.2)  # Seconds sampled on each side of a rep's bottom
+FRAME_ADAPTIVE_MIN_MOVEMENT = _float_env("FRAME_ADAPTIVE_MIN_MOVEMENT", 0.01)  # Ignore direction changes smaller than this (normalized y)
+
+# Pose analysis (MediaPipe)
+POSE_TRACKING = _bool_env("POSE_TRACKING", True)  # Track landmarks between frames instead of re-detecting every frame
+POSE_MODEL_COMPLEXITY = _int_env("POSE_MODEL_COMPLEXITY", 1)  # 0 = lite, 1 = full, 2 = heavy
+POSE_MIN_DETECTION_CONFIDENCE = _float_env("POSE_MIN_DETECTION_CONFIDENCE", 0.5)
+POSE_MIN_TRACKING_CONFIDENCE = _float_env("POSE_MIN_TRACKING_CONFIDENCE", 0.5)
+POSE_WORKERS = _int_env("POSE_WORKERS", 0)  # Pose worker processes (0 = one per CPU core)
+POSE_CHUNK_SIZE = _int_env("POSE_CHUNK_SIZE", 16)  # Contiguous frames sent to a worker at a time
+POSE_SEGMENT_CHUNKS = _int_env("POSE_SEGMENT_CHUNKS", 4)  # Consecutive chunks one worker tracks through before the next worker takes over
+
+# Upload analysis concurrency
+ANALYSIS_MAX_CONCURRENT = _int_env("ANALYSIS_MAX_CONCURRENT", 2)  # Videos analyzed at the same time
+ANALYSIS_MAX_QUEUED = _int_env("ANALYSIS_MAX_QUEUED", 8)  # Extra uploads allowed to wait; more are rejected with 503
+
+# Live WebSocket analysis
+LIVE_MAX_SESSIONS = _int_env("LIVE_MAX_SESSIONS", 4)  # Concurrent live connections (each runs its own pose graph)
+
+# Background analysis jobs
+JOB_WORKERS = _int_env("JOB_WORKERS", 2)  # Threads working through the job queue
+JOB_QUEUE_SIZE = _int_env("JOB_QUEUE_SIZE", 32)  # Jobs allowed to wait; more are rejected with 503
+JOB_RESULT_TTL = _int_env("JOB_RESULT_TTL", 3600)  # Seconds a finished job's result is kept
+
+# Pose result cache (keyed by video SHA-256 + extraction/model settings)
+POSE_CACHE_DIR = os.getenv("POSE_CACHE_DIR") or os.path.join(os.path.dirname(__file__), '../pose-cache')
+POSE_CACHE_MAX_MB = _int_env("POSE_CACHE_MAX_MB", 1024)  # Size cap before LRU eviction (0 = disable cache)
+
+# Uploads
+UPLOAD_DIR = os.getenv("UPLOAD_DIR") or os.path.join(os.path.dirname(__file__), '../test-videos')
+UPLOAD_MAX_MB = _int_env("UPLOAD_MAX_MB", 1024)  # Reject larger uploads with 413 (0 = no limit)
+
+# LLM feedback backends
+OLLAMA_URL = os.getenv("OLLAMA_URL", "http://host.docker.internal:11434")  # host.docker.internal reaches the host from Docker
+APIFREE_URL = os.getenv("APIFREE_URL", "https://apifreellm.com/api/chat")
+LLM_TIMEOUT = _float_env("LLM_TIMEOUT", 60.0)  # Seconds per request
+LLM_MAX_RETRIES = _int_env("LLM_MAX_RETRIES", 2)  # Retries for failed connections and 429/503 responses
+LLM_RETRY_BACKOFF = _float_env("LLM_RETRY_BACKOFF", 0.5)  # First retry delay in seconds, doubled each retry
+APIFREE_MAX_CONCURRENT = _int_env("APIFREE_MAX_CONCURRENT", 4)  # In-flight requests to ApiFree (Ollama: FEEDBACK_MAX_IN_FLIGHT)
+
+# LLM feedback cache (keyed on normalized prompt + model + sampling options)
+FEEDBACK_CACHE_TTL = _int_env("FEEDBACK_CACHE_TTL", 86400)  # Seconds before cached feedback expires
+FEEDBACK_CACHE_MAX_ENTRIES = _int_env("FEEDBACK_CACHE_MAX_ENTRIES", 1024)  # LRU size cap (0 = disable cache)
+FEEDBACK_CACHE_PATH = os.getenv("FEEDBACK_CACHE_PATH", "")  # Optional SQLite file to keep the cache across restarts
+
+# Ollama feedback scheduler
+FEEDBACK_MAX_IN_FLIGHT = _int_env("FEEDBACK_MAX_IN_FLIGHT", 2)  # Concurrent Ollama generations
+FEEDBACK_MAX_QUEUED = _int_env("FEEDBACK_MAX_QUEUED", 64)  # Requests allowed to wait for a slot; more are turned away
+
+# Session history (SQLite; saved for every analyzed upload, queried by /sessions)
+SESSION_STORE_ENABLED = _bool_env("SESSION_STORE_ENABLED", True)
+SESSION_STORE_PATH = os.getenv("SESSION_STORE_PATH") or os.path.join(os.path.dirname(__file__), '../sessions.sqlite3')
+SESSION_STORE_POSES = _bool_env("SESSION_STORE_POSES", True)  # Keep each session's landmarks (float16, exercise landmarks only)
+
+# Logging
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()  # DEBUG also logs the per-analysis rep details
@@ -0,0 +1,136 @@
+"""
+Exercise registry.
+Each supported exercise is declared once here: the landmarks it tracks, its rep detector, its
+batch validator and the wording of its LLM prompt. The shared pipeline and router factory
+(app/routes/exercise.py) build every /{exercise}/... endpoint from these declarations, so adding
+an exercise means registering one more Exercise rather than copying a router.
+"""
+
+from app.utils.rep_counter import (
+    count_reps, count_benchpress_reps,
+    validate_squat_depth_batch, validate_benchpress_depth_batch,
+    SQUAT_LANDMARKS, BENCHPRESS_LANDMARKS, SQUAT_SIGNAL_LANDMARKS, BENCHPRESS_SIGNAL_LANDMARKS,
+    SQUAT_MOVEMENT_THRESHOLD, BENCHPRESS_MOVEMENT_THRESHOLD,
+)
+
+SYSTEM_PROMPT_TEMPLATE = """You are a professional strength coach analyzing {label} form. Provide friendly, actionable feedback in 3-4 sentences.
+Focus on: 1) Overall form quality, 2) Main issues to fix, 3) Specific tips for improvement.
+Be encouraging but honest. Use simple language, not technical jargon."""
+
+USER_PROMPT_TEMPLATE = """{title} Session Summary:
+- Total Reps: {rep_count}
+- Perfect Form: {valid_count} reps
+- Needs Work: {needs_work_count} reps
+
+Main Issues:
+{issues}
+
+Give encouraging feedback with specific tips to improve their {label} form."""
+
+
+class Exercise:
+    """
+    Declaration of one exercise.
+    name: URL prefix, router tag and job label ("squat")
+    label: human-readable name used in messages and prompts ("bench press")
+    tracking: what the rep detector follows, shown in the upload summary ("head tracking")
+    landmarks: MediaPipe landmark indices the exercise uses (the "subset" pose format)
+    signal_landmarks: landmarks whose average height the rep detector follows (steers adaptive sampling)
+    movement_threshold: smoothed per-frame movement of that height the rep detector treats as moving
+    rep_counter: pose_data -> {"rep_count", "reps_data"}
+    validator: (pose_data, frame_indices) -> columnar validation results for those frames
+    form_checks: (rep field, issue text) pairs; a rep whose field is falsy counts towards that
+        issue in the feedback prompt, reported as "{issue text}" with {count} filled in
+    depth_field: rep field measuring how deep the rep went (higher is deeper), tracked by the
+        session history trends
+    """
+
+    def __init__(self, name, label, tracking, landmarks, signal_landmarks, movement_threshold, rep_counter, validator,
+                 form_checks, depth_field):
+        self.name = name
+        self.label = label
+        self.tracking = tracking
+        self.landmarks = list(landmarks)
+        self.signal_landmarks = list(signal_landmarks)
+        self.movement_threshold = movement_threshold
+        self.rep_counter = rep_counter
+        self.validator = validator
+        self.form_checks = list(form_checks)
+        self.depth_field = depth_field
+
+    def summary(self, rep_count):
+        """Short description of an analyzed upload, returned as its `feedback`"""
+        return f"{self.label.capitalize()} video analyzed. Detected {rep_count} reps using {self.tracking}."
+
+    def build_prompts(self, reps_data, rep_count):
+        """
+        Build the (system_prompt, user_prompt) pair for LLM feedback from the rep analysis
+        """
+        # Prepare the data summary for the LLM
+        valid_count = sum(1 for r in reps_data if r.get('validation_status') == 'valid')
+        needs_work_count = sum(1 for r in reps_data if r.get('validation_status') in ('partially_valid', 'invalid'))
+
+        # Count reps failing each form check (more digestible for the LLM than per-rep detail)
+        issues_summary = []
+        for field, issue in self.form_checks:
+            failed = sum(1 for r in reps_data if not r.get(field, False))
+            if failed:
+                issues_summary.append(issue.format(count=failed))
+
+        system_prompt = SYSTEM_PROMPT_TEMPLATE.format(label=self.label)
+        user_prompt = USER_PROMPT_TEMPLATE.format(
+            title=self.label.title(),
+            label=self.label,
+            rep_count=rep_count,
+            valid_count=valid_count,
+            needs_work_count=needs_work_count,
+            issues=chr(10).join('- ' + issue for issue in issues_summary) if issues_summary else '- None! All reps had good form.',
+        )
+        return system_prompt, user_prompt
+
+
+EXERCISES = {}
+
+
+def register_exercise(exercise):
+    if exercise.name in EXERCISES:
+        raise ValueError(f"Exercise '{exercise.name}' is already registered")
+    EXERCISES[exercise.name] = exercise
+    return exercise
+
+
+def get_exercise(name):
+    """Return the registered Exercise called `name`, or None"""
+    return EXERCISES.get(name)
+
+
+SQUAT = register_exercise(Exercise(
+    name="squat",
+    label="squat",
+    tracking="head tracking",
+    landmarks=SQUAT_LANDMARKS,
+    signal_landmarks=SQUAT_SIGNAL_LANDMARKS,
+    movement_threshold=SQUAT_MOVEMENT_THRESHOLD,
+    rep_counter=count_reps,
+    validator=validate_squat_depth_batch,
+    form_checks=[
+        ("depth_valid", "Depth Problems: {count} reps didn't reach proper depth (hips below knees)"),
+        ("knee_width_valid", "Knee Tracking: {count} reps had knees too narrow (should be shoulder-width)"),
+    ],
+    depth_field="depth_difference",
+))
+
+BENCHPRESS = register_exercise(Exercise(
+    name="benchpress",
+    label="bench press",
+    tracking="wrist tracking",
+    landmarks=BENCHPRESS_LANDMARKS,
+    signal_landmarks=BENCHPRESS_SIGNAL_LANDMARKS,
+    movement_threshold=BENCHPRESS_MOVEMENT_THRESHOLD,
+    rep_counter=count_benchpress_reps,
+    validator=validate_benchpress_depth_batch,
+    form_checks=[
+        ("depth_valid", "Depth Problems: {count} reps didn't reach proper depth (bar should touch chest or close)"),
+    ],
+    depth_field="depth_percentage",
+))
@@ -1,10 +1,21 @@
 
 
+import logging
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.routes import squat, benchpress
+from app.routes import jobs, feedback, metrics, sessions
+from app.routes.exercise import create_exercise_router
+from app.exercises import EXERCISES
+from app.utils.pose_engine import shutdown_pose_engine
+from app.utils.analysis_executor import analysis_executor
+from app.utils.jobs import job_queue
+from app.utils.llm_client import llm_client
+from app.utils.session_store import session_store
+from app.config import LOG_LEVEL
 
 
+logging.basicConfig(level=LOG_LEVEL, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
 app = FastAPI(title="FormAI Backend")
 app.add_middleware(
 	CORSMiddleware,
@@ -14,9 +25,21 @@ app.add_middleware(
 	allow_headers=["*"],
 )
 
-# Include exercise-specific routers
-app.include_router(squat.router)
-app.include_router(benchpress.router)
+# One router per registered exercise (/squat, /benchpress, ...)
+for exercise in EXERCISES.values():
+	app.include_router(create_exercise_router(exercise))
+app.include_router(jobs.router)
+app.include_router(feedback.router)
+app.include_router(metrics.router)
+app.include_router(sessions.router)
+
+@app.on_event("shutdown")
+async def stop_background_workers():
+	analysis_executor.shutdown()
+	job_queue.shutdown()
+	shutdown_pose_engine()
+	session_store.close()
+	await llm_client.aclose()
 
 if __name__ == "__main__":
 	import uvicorn
@@ -0,0 +1,425 @@
+"""
+Router factory shared by every registered exercise.
+create_exercise_router(exercise) builds the /{exercise.name}/... endpoints (upload, jobs, pose,
+live, generate-feedback and its stream) from the exercise's declaration in app/exercises.py.
+"""
+
+from functools import partial
+from fastapi import APIRouter, UploadFile, File, Form, Header, HTTPException, Query, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.routing import APIRoute
+from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool
+from typing import List, Dict, Any, Literal, Optional
+from app.utils.analysis_executor import analysis_executor, AnalysisQueueFull
+from app.utils.pipeline import analyze_video, pose_cache_key
+from app.utils.pose_cache import pose_cache
+from app.utils.pose_serialization import serialize_pose_data, pose_frame_numbers
+from app.utils.jobs import job_queue, JobQueueFull
+from app.utils.uploads import save_upload, remove_upload
+from app.utils.llm_client import llm_client, ollama_generate_payload, stream_feedback_events, APIFREE_HEADERS
+from app.utils.feedback_cache import feedback_cache, feedback_cache_key
+from app.utils.feedback_scheduler import feedback_scheduler, FeedbackQueueFull
+from app.utils.live_analysis import open_live_session, LiveSessionsFull, parse_landmarks
+from app.utils.session_store import session_store
+from app.utils.metrics import timed
+from app.config import OLLAMA_URL, APIFREE_URL
+import httpx
+import json
+import logging
+import sqlite3
+
+logger = logging.getLogger(__name__)
+
+class FeedbackRequest(BaseModel):
+    reps_data: List[Dict[str, Any]]
+    rep_count: int
+    model: str = "ollama"  # Default to ollama, can be "apifree"
+
+# How pose_data is encoded in responses (see app/utils/pose_serialization.py)
+PoseFormat = Literal["full", "none", "subset", "quantized", "binary"]
+
+MAX_USER_ID_LENGTH = 128
+
+def _cache_feedback(cache_key, feedback_text):
+    """
+    Store generated feedback for identical prompts. Empty replies (e.g. a stream Ollama ended
+    without any text) are not cached, so the next request generates again instead of reusing them.
+    Blocking (SQLite), so async callers run it in the threadpool.
+    """
+    if feedback_text and feedback_text.strip():
+        feedback_cache.set(cache_key, feedback_text)
+
+def analysis_busy():
+    return HTTPException(
+        status_code=503,
+        detail="Server is busy analyzing other videos. Please try again shortly.",
+        headers={"Retry-After": "10"},
+    )
+
+def job_queue_busy():
+    return HTTPException(
+        status_code=503,
+        detail="Too many videos are waiting for analysis. Please try again shortly.",
+        headers={"Retry-After": "30"},
+    )
+
+def reject_when_busy(is_full, busy_error):
+    """
+    Route class for upload endpoints: while is_full() they answer with busy_error() before the
+    request body is read, so an overloaded server doesn't take in a large video only to reject it
+    (FastAPI reads multipart bodies before the endpoint, and its dependencies, are called)
+    """
+    class BusyCheckRoute(APIRoute):
+        def get_route_handler(self):
+            handler = super().get_route_handler()
+
+            async def route_handler(request):
+                if is_full():
+                    raise busy_error()
+                return await handler(request)
+            return route_handler
+    return BusyCheckRoute
+
+def render_pose_data(pose_id, pose_data, pose_format, landmark_ids):
+    """
+    JSONResponse for GET /{exercise}/pose/{pose_id} (blocking: encoding and rendering a long clip takes a while)
+    """
+    with timed("serialization"):
+        return JSONResponse(content={
+            "pose_id": pose_id,
+            "frame_numbers": pose_frame_numbers(pose_data),
+            "pose_data": serialize_pose_data(pose_data, pose_format, landmark_ids),
+        })
+
+def resolve_user_id(form_value=None, header_value=None):
+    """
+    User an upload belongs to, from the user_id form field or else the X-User-Id header
+    Returns: the user ID, or None for anonymous uploads
+    """
+    user_id = (form_value or header_value or "").strip()
+    if len(user_id) > MAX_USER_ID_LENGTH:
+        raise HTTPException(status_code=422, detail=f"user_id is longer than {MAX_USER_ID_LENGTH} characters")
+    return user_id or None
+
+def run_exercise_analysis(exercise, video_path, video_hash=None, pose_format="full", user_id=None, progress=None,
+                          render=False):
+    """
+    Extract frames, run pose analysis and count reps with the exercise's rep detector.
+    Blocking - called from the analysis executor or a job worker, never on the event loop.
+    The uploaded video is deleted afterwards; the results are saved to the session history.
+    Only the exercise's landmarks are extracted unless all of them are asked for (pose_format "full").
+    reps_data frame indices are rows of pose_data; frame_numbers maps them to source video frames
+    when the video was sampled adaptively (None when rows are evenly spaced).
+    render: return the rendered JSONResponse instead of the result dict, so encoding the body
+    (which costs more than encoding pose_data) also happens off the event loop
+    """
+    landmark_ids = None if pose_format == "full" else exercise.landmarks
+    try:
+        pose_data, rep_info = analyze_video(
+            video_path, exercise.rep_counter, progress=progress, video_hash=video_hash, landmark_ids=landmark_ids,
+            signal_landmarks=exercise.signal_landmarks, validator=exercise.validator,
+        )
+
+        logger.info("%s analysis: %d frames, %d reps", exercise.label, len(pose_data), rep_info["rep_count"])
+        if rep_info["reps_data"]:
+            logger.debug("%s first rep data: %s", exercise.label, rep_info["reps_data"][0])
+
+        try:
+            session_id = session_store.save_session(
+                exercise, rep_info["reps_data"], len(pose_data), user_id=user_id, pose_data=pose_data,
+            )
+        except sqlite3.Error:
+            # Losing the history entry shouldn't fail the analysis itself
+            logger.exception("Could not save %s session", exercise.label)
+            session_id = None
+
+        with timed("serialization"):
+            result = {
+                "session_id": session_id,
+                "feedback": exercise.summary(rep_info["rep_count"]),
+                "rep_count": rep_info["rep_count"],
+                "reps_data": rep_info["reps_data"],
+                "frame_numbers": pose_frame_numbers(pose_data),
+                "pose_id": pose_cache_key(video_hash, landmark_ids, exercise.signal_landmarks) if pose_cache.enabled and video_hash else None,
+                "pose_data": serialize_pose_data(pose_data, pose_format, exercise.landmarks)  # Raw data, encoded as requested
+            }
+            # JSONResponse renders the body when it's created
+            return JSONResponse(content=result) if render else result
+    finally:
+        remove_upload(video_path)
+
+async def generate_exercise_feedback(exercise, request: FeedbackRequest):
+    """
+    Generate feedback for the exercise with the selected LLM based on rep analysis
+    """
+    label = exercise.label.capitalize()
+    try:
+        system_prompt, user_prompt = exercise.build_prompts(request.reps_data, request.rep_count)
+
+        # Identical session summaries produce identical prompts - reuse earlier feedback
+        cache_key = feedback_cache_key(request.model, f"{system_prompt}\n\n{user_prompt}")
+        cached_feedback = await run_in_threadpool(feedback_cache.get, cache_key)
+        if cached_feedback is not None:
+            logger.info("%s feedback served from cache", label)
+            return {
+                "success": True,
+                "feedback": cached_feedback,
+                "cached": True
+            }
+
+        # Choose API based on model selection
+        if request.model == "apifree":
+            # Call ApiFree API
+            payload = {
+                "message": f"{system_prompt}\n\n{user_prompt}"
+            }
+
+            logger.info("Calling ApiFree API for %s feedback", exercise.label)
+            response = await llm_client.post("apifree", APIFREE_URL, json=payload, headers=APIFREE_HEADERS)
+
+            if response.status_code == 200:
+                result = response.json()
+                if result.get('status') == 'success':
+                    feedback_text = result.get('response', 'Unable to generate feedback.')
+                    await run_in_threadpool(_cache_feedback, cache_key, feedback_text)
+                    logger.info("%s feedback generated successfully via ApiFree", label)
+                    return {
+                        "success": True,
+                        "feedback": feedback_text
+                    }
+                else:
+                    error_msg = result.get('error', 'Unknown error')
+                    logger.error("ApiFree API error: %s", error_msg)
+                    return {
+                        "success": False,
+                        "feedback": f"ApiFree API error: {error_msg}",
+                        "error": error_msg
+                    }
+            else:
+                logger.error("ApiFree API HTTP error: %d", response.status_code)
+                return {
+                    "success": False,
+                    "feedback": "Unable to generate feedback from ApiFree.",
+                    "error": f"API returned status code {response.status_code}"
+                }
+        else:
+            # Call Ollama API (default)
+            ollama_url = f"{OLLAMA_URL}/api/generate"
+            payload = ollama_generate_payload(f"{system_prompt}\n\n{user_prompt}")
+
+            logger.info("Calling Ollama API for %s feedback", exercise.label)
+            # Queued behind other Ollama generations; identical in-flight prompts share one generation
+            response = await feedback_scheduler.run(cache_key, lambda: llm_client.post("ollama", ollama_url, json=payload))
+
+            if response.status_code == 200:
+                result = response.json()
+                feedback_text = result.get('response', 'Unable to generate feedback.')
+                await run_in_threadpool(_cache_feedback, cache_key, feedback_text)
+                logger.info("%s feedback generated successfully", label)
+                return {
+                    "success": True,
+                    "feedback": feedback_text
+                }
+            else:
+                logger.error("Ollama API error: %d", response.status_code)
+                return {
+                    "success": False,
+                    "feedback": "Unable to generate feedback. Please ensure Ollama is running.",
+                    "error": f"API returned status code {response.status_code}"
+                }
+
+    except FeedbackQueueFull:
+        logger.warning("Feedback queue full, turning request away")
+        return {
+            "success": False,
+            "feedback": "The feedback service is busy right now. Please try again in a moment.",
+            "error": "Feedback queue is full"
+        }
+    except httpx.ConnectError:
+        logger.error("Connection error: Ollama not running")
+        return {
+            "success": False,
+            "feedback": "Unable to connect to Ollama. Please ensure Ollama is installed and running (ollama serve).",
+            "error": "Connection refused"
+        }
+    except Exception as e:
+        logger.exception("Error generating %s feedback", exercise.label)
+        return {
+            "success": False,
+            "feedback": "An error occurred while generating feedback.",
+            "error": str(e)
+        }
+
+def create_exercise_router(exercise):
+    """
+    Build the APIRouter serving /{exercise.name}/... for a registered Exercise
+    """
+    name = exercise.name
+    router = APIRouter(prefix=f"/{name}", tags=[name])
+
+    async def upload_video(file: UploadFile = File(...), pose_format: PoseFormat = Query("full"),
+                           user_id: Optional[str] = Form(None), x_user_id: Optional[str] = Header(None)):
+        """
+        Upload and analyze an exercise video.
+        The session is saved to the history of the user given as the user_id form field or X-User-Id header.
+        """
+        user_id = resolve_user_id(user_id, x_user_id)
+
+        # 1. Stream the upload to a uniquely named file, hashing it on the way
+        video_path, video_hash = await save_upload(file)
+
+        # 2-4. Extract frames, run pose analysis and count reps off the event loop
+        # (the route checked for a free slot before the body was read, but slots can fill up
+        # while the upload streams in, so run() checks again)
+        try:
+            # The result is already plain JSON types, so it's rendered as is (skipping FastAPI's
+            # per-value jsonable_encoder walk) in the worker thread
+            return await analysis_executor.run(
+                run_exercise_analysis, exercise, video_path, video_hash, pose_format, user_id, render=True,
+            )
+        except AnalysisQueueFull:
+            remove_upload(video_path)
+            raise analysis_busy()
+
+    router.add_api_route(
+        "/upload", upload_video, methods=["POST"], name=f"upload_{name}_video",
+        route_class_override=reject_when_busy(lambda: analysis_executor.full, analysis_busy),
+    )
+
+    async def submit_job(file: UploadFile = File(...), pose_format: PoseFormat = Query("full"),
+                         user_id: Optional[str] = Form(None), x_user_id: Optional[str] = Header(None)):
+        """
+        Upload an exercise video and analyze it in the background.
+        Returns a job ID right away; poll GET /jobs/{job_id} (or stream GET /jobs/{job_id}/events) for the result.
+        """
+        user_id = resolve_user_id(user_id, x_user_id)
+        video_path, video_hash = await save_upload(file)
+        try:
+            job = job_queue.submit(name, run_exercise_analysis, exercise, video_path, video_hash, pose_format, user_id)
+        except JobQueueFull:
+            remove_upload(video_path)
+            raise job_queue_busy()
+        return {"job_id": job["job_id"], "status": job["status"]}
+
+    router.add_api_route(
+        "/jobs", submit_job, methods=["POST"], status_code=202, name=f"submit_{name}_job",
+        route_class_override=reject_when_busy(lambda: job_queue.full, job_queue_busy),
+    )
+
+    @router.get("/pose/{pose_id}", name=f"get_{name}_pose_data")
+    async def get_pose_data(pose_id: str, pose_format: PoseFormat = Query("full")):
+        """
+        Fetch the pose sequence of a previously analyzed video on demand
+        (pose_id comes from the upload response; available while the pose cache keeps it).
+        Uploads only keep all 33 landmarks with pose_format=full; other uploads' pose_ids hold the
+        exercise's landmarks, so they can be fetched in any format except full.
+        """
+        if len(pose_id) != 64 or any(c not in "0123456789abcdef" for c in pose_id):
+            raise HTTPException(status_code=404, detail="Pose data not found")
+        pose_data = await run_in_threadpool(pose_cache.get, pose_id)
+        if pose_data is None:
+            raise HTTPException(status_code=404, detail="Pose data not found")
+        if pose_format == "full" and pose_data.landmark_ids is not None:
+            # This pose_id only holds the exercise's landmarks; upload with pose_format=full to keep all of them
+            raise HTTPException(
+                status_code=404,
+                detail="Full pose data is only kept for uploads with pose_format=full; fetch this pose_id as subset, quantized or binary",
+            )
+        if not pose_data.has_landmarks(exercise.landmarks):
+            # pose_ids aren't tied to an exercise: this one was extracted for another exercise's landmarks
+            raise HTTPException(status_code=404, detail="Pose data not found for this exercise")
+        return await run_in_threadpool(render_pose_data, pose_id, pose_data, pose_format, exercise.landmarks)
+
+    @router.websocket("/live", name=f"{name}_live")
+    async def live_analysis(websocket: WebSocket):
+        """
+        Live rep counting over a WebSocket, one frame per message:
+        - binary message: an encoded webcam frame (JPEG/PNG), pose-analyzed on the server
+        - text message: {"landmarks": [[x, y, z, visibility] * 33] or null} computed on the client
+        - text message: {"type": "end"} to get a "summary" and close
+        Every frame is answered with {"type": "frame", "frame", "detected", "rep_count"}, preceded by
+        {"type": "rep", "rep": {...}} (same fields as reps_data) when that frame completed a rep.
+        Send the next frame once the previous one is answered so frames don't queue up.
+        """
+        await websocket.accept()
+        try:
+            session = open_live_session(exercise)
+        except LiveSessionsFull:
+            await websocket.close(code=1013, reason="Too many live sessions. Please try again shortly.")
+            return
+        await websocket.send_json({"type": "ready", "exercise": name})
+        try:
+            while True:
+                message = await websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    break
+                if message.get("bytes") is not None:
+                    try:
+                        detected, rep = await run_in_threadpool(session.push_encoded_image, message["bytes"])
+                    except ValueError as e:
+                        await websocket.send_json({"type": "error", "detail": str(e)})
+                        continue
+                else:
+                    try:
+                        data = json.loads(message.get("text") or "")
+                        if not isinstance(data, dict):
+                            raise ValueError("expected a JSON object")
+                        if data.get("type") == "end":
+                            await websocket.send_json({"type": "summary", **session.summary()})
+                            await websocket.close()
+                            break
+                        if "landmarks" not in data:
+                            raise ValueError("expected a landmarks field")
+                        landmarks = parse_landmarks(data["landmarks"])
+                    except ValueError as e:
+                        await websocket.send_json({"type": "error", "detail": f"Invalid message: {e}"})
+                        continue
+                    detected, rep = landmarks is not None, session.push_landmarks(landmarks)
+
+                if rep is not None:
+                    await websocket.send_json({"type": "rep", "rep": rep})
+                await websocket.send_json({
+                    "type": "frame",
+                    "frame": session.frames_received - 1,
+                    "detected": detected,
+                    "rep_count": len(session.reps),
+                })
+        except WebSocketDisconnect:
+            pass
+        finally:
+            logger.info("Live %s session ended: %d frames, %d reps", exercise.label, session.frames_received, len(session.reps))
+            session.close()
+
+    @router.post("/generate-feedback", name=f"generate_{name}_feedback")
+    async def generate_feedback(request: FeedbackRequest):
+        """
+        Generate detailed form feedback with an LLM based on rep analysis
+        """
+        return await generate_exercise_feedback(exercise, request)
+
+    @router.post("/generate-feedback/stream", name=f"stream_{name}_feedback")
+    async def stream_feedback(request: FeedbackRequest):
+        """
+        Same as /generate-feedback, but relays the LLM output as Server-Sent Events:
+        "token" events as Ollama generates (ApiFree sends its whole reply as one token),
+        then a final "done" event with the full feedback, or an "error" event.
+        """
+        system_prompt, user_prompt = exercise.build_prompts(request.reps_data, request.rep_count)
+        prompt = f"{system_prompt}\n\n{user_prompt}"
+        cache_key = feedback_cache_key(request.model, prompt)
+        cached_feedback = await run_in_threadpool(feedback_cache.get, cache_key)
+        logger.info("Streaming %s feedback (%s)", exercise.label, request.model)
+        return StreamingResponse(
+            stream_feedback_events(
+                request.model,
+                prompt,
+                cached_feedback=cached_feedback,
+                on_complete=partial(_cache_feedback, cache_key),
+                key=cache_key,
+            ),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+    return router
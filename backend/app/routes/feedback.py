@@ -0,0 +1,11 @@
+from fastapi import APIRouter
+from app.utils.feedback_scheduler import feedback_scheduler
+
+router = APIRouter(prefix="/feedback", tags=["feedback"])
+
+@router.get("/scheduler")
+async def get_feedback_scheduler_stats():
+    """
+    Ollama feedback scheduler state: queue depth, in-flight generations, coalesced/rejected counts and wait times
+    """
+    return feedback_scheduler.stats()
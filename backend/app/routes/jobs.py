@@ -0,0 +1,62 @@
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
+from app.utils.jobs import job_store
+from app.utils.sse import format_sse
+import asyncio
+
+router = APIRouter(prefix="/jobs", tags=["jobs"])
+
+def _job_view(job, include_result=True):
+    view = {
+        "job_id": job["job_id"],
+        "exercise": job["exercise"],
+        "status": job["status"],
+        "frames_processed": job["frames_processed"],
+        "created_at": job["created_at"],
+        "updated_at": job["updated_at"],
+        "error": job["error"],
+    }
+    if include_result:
+        view["result"] = job["result"]
+    return view
+
+@router.get("/{job_id}")
+async def get_job(job_id: str):
+    """
+    Poll an analysis job. `result` holds the usual upload response once status is "completed".
+    """
+    job = job_store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired")
+    return _job_view(job)
+
+@router.get("/{job_id}/events")
+async def stream_job_events(job_id: str):
+    """
+    Stream job progress as Server-Sent Events.
+    Sends a "progress" event whenever the status or frame count changes, then a final
+    "result" (or "error") event and closes the stream.
+    """
+    if job_store.get(job_id) is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired")
+
+    async def events():
+        last_state = None
+        while True:
+            job = job_store.get(job_id)
+            if job is None:
+                yield format_sse("error", {"error": "Job not found or expired"})
+                return
+            if job["status"] == "completed":
+                yield format_sse("result", _job_view(job))
+                return
+            if job["status"] == "failed":
+                yield format_sse("error", _job_view(job, include_result=False))
+                return
+            state = (job["status"], job["frames_processed"])
+            if state != last_state:
+                last_state = state
+                yield format_sse("progress", _job_view(job, include_result=False))
+            await asyncio.sleep(0.5)
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
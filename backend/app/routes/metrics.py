@@ -0,0 +1,23 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from app.utils.metrics import gauge, render_metrics
+from app.utils.analysis_executor import analysis_executor
+from app.utils.jobs import job_queue
+from app.utils.feedback_scheduler import feedback_scheduler
+from app.utils.live_analysis import active_live_sessions
+
+router = APIRouter(tags=["metrics"])
+
+# Queue depths are read when /metrics is scraped
+gauge("formai_analysis_pending", "Uploads being analyzed or waiting for the analysis executor", lambda: analysis_executor.pending)
+gauge("formai_job_queue_depth", "Background analysis jobs waiting for a worker", lambda: job_queue.depth)
+gauge("formai_feedback_queue_depth", "Ollama feedback requests waiting for a slot", lambda: feedback_scheduler.queue_depth)
+gauge("formai_feedback_in_flight", "Ollama feedback generations in progress", lambda: feedback_scheduler.in_flight)
+gauge("formai_live_sessions", "Open live WebSocket analysis sessions", active_live_sessions)
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """
+    Stage latencies, frames processed, cache hits and queue depths in the Prometheus text format
+    """
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
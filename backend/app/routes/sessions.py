@@ -0,0 +1,104 @@
+from datetime import datetime, timezone
+from typing import Literal, Optional
+
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
+
+from app.exercises import get_exercise
+from app.utils.pose_serialization import serialize_pose_data
+from app.utils.session_store import session_store
+from app.utils.metrics import timed
+
+router = APIRouter(prefix="/sessions", tags=["sessions"])
+
+# pose_data encodings available for stored sessions (only the exercise's landmarks are kept)
+StoredPoseFormat = Literal["none", "subset", "quantized", "binary"]
+
+def _timestamp(value):
+    """Unix timestamp of an ISO date/datetime query value (naive values are UTC)"""
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+def _require_store():
+    if not session_store.enabled:
+        raise HTTPException(status_code=404, detail="Session history is disabled")
+
+def _check_exercise(exercise):
+    if exercise is not None and get_exercise(exercise) is None:
+        raise HTTPException(status_code=404, detail=f"Unknown exercise '{exercise}'")
+
+def _render_with_pose(session, pose_format):
+    """JSONResponse of a session with its stored landmarks encoded as pose_format (blocking)"""
+    pose = session.pop("pose")
+    exercise = get_exercise(session["exercise"])
+    landmark_ids = exercise.landmarks if exercise is not None else None
+    with timed("serialization"):
+        session["pose_data"] = serialize_pose_data(pose, pose_format, landmark_ids) if pose is not None else None
+        return JSONResponse(content=session)
+
+@router.get("")
+async def list_sessions(
+    user_id: Optional[str] = None,
+    exercise: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    limit: int = Query(50, ge=1, le=500),
+    offset: int = Query(0, ge=0),
+):
+    """
+    Saved sessions, newest first, with their aggregates (rep_count, valid_rate, avg_depth, best_depth) but not their reps.
+    since/until are ISO dates or datetimes (UTC unless they carry an offset).
+    """
+    _require_store()
+    _check_exercise(exercise)
+    sessions = await run_in_threadpool(
+        session_store.list_sessions, user_id, exercise, _timestamp(since), _timestamp(until), limit, offset,
+    )
+    return {"sessions": sessions}
+
+@router.get("/trends")
+async def get_trends(
+    user_id: str,
+    exercise: Optional[str] = None,
+    bucket: Literal["day", "week", "month"] = "day",
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+):
+    """
+    A user's progress per day, week or month (UTC) and exercise: sessions, reps, valid_reps,
+    valid_rate, avg_depth and best_depth (the exercise's depth measurement, higher is deeper).
+    Aggregated from the stored sessions; no video is reprocessed.
+    """
+    _require_store()
+    _check_exercise(exercise)
+    trends = await run_in_threadpool(
+        session_store.trends, user_id, exercise, bucket, _timestamp(since), _timestamp(until),
+    )
+    return {"user_id": user_id, "bucket": bucket, "trends": trends}
+
+@router.get("/{session_id}")
+async def get_session(session_id: str, pose_format: StoredPoseFormat = Query("none")):
+    """
+    One saved session with its reps_data, and its landmarks when a pose_format other than "none" is asked for
+    """
+    _require_store()
+    session = await run_in_threadpool(session_store.get_session, session_id, pose_format != "none")
+    if session is None:
+        raise HTTPException(status_code=404, detail="Session not found")
+    if pose_format != "none":
+        return await run_in_threadpool(_render_with_pose, session, pose_format)
+    return session
+
+@router.delete("/{session_id}")
+async def delete_session(session_id: str):
+    """
+    Remove a saved session and its reps
+    """
+    _require_store()
+    if not await run_in_threadpool(session_store.delete_session, session_id):
+        raise HTTPException(status_code=404, detail="Session not found")
+    return {"session_id": session_id, "deleted": True}
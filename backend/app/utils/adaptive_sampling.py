@@ -0,0 +1,163 @@
+"""
+Adaptive frame sampling.
+A fixed sampling rate wastes pose inference while the lifter is standing still and is too coarse
+near the bottom of a fast rep, where the lowest-point frame used for validation is picked.
+Instead the video is first sampled at a low rate; the exercise's tracked signal (e.g. head
+height) is read off those poses, and only short windows around the bottom of each movement
+are sampled again at a higher rate. The two passes are merged in frame order.
+
+The rep detectors threshold frame-to-frame movement, so they expect evenly spaced samples:
+count_reps_adaptive runs them on the merged poses interpolated onto the usual fixed-rate grid,
+then moves each rep's lowest point to the lowest real sample of the rep and validates it there.
+"""
+
+import numpy as np
+
+from app.utils.pose_sequence import PoseSequence
+from app.utils.rep_counter import validation_rows
+
+
+def tracked_signal(pose_data, signal_landmarks):
+    """
+    Mean y-coordinate of the given landmarks in every frame (NaN where no pose was detected)
+    """
+    if len(pose_data) == 0:
+        return np.empty(0)
+    return pose_data.select(signal_landmarks)[:, :, 1].astype(np.float64).mean(axis=1)
+
+
+def find_low_points(signal, min_movement):
+    """
+    Samples where the tracked point stops moving down and heads back up (local maxima of y,
+    since y grows downward). Zigzag with hysteresis: a maximum only counts once the signal
+    has risen at least min_movement above it again, so smaller jitter is ignored.
+    NaN samples (no pose) are skipped.
+    Returns: sorted list of sample indices
+    """
+    low_points = []
+    moving_down = None  # unknown until the first move
+    extreme_index = None
+    for i, value in enumerate(signal):
+        if value != value:  # NaN
+            continue
+        if extreme_index is None:
+            extreme_index = i
+            continue
+        extreme = signal[extreme_index]
+        if moving_down is not False and value > extreme:
+            extreme_index, moving_down = i, True
+        elif moving_down is not True and value < extreme:
+            extreme_index, moving_down = i, False
+        elif abs(value - extreme) >= min_movement:
+            if moving_down:
+                low_points.append(extreme_index)
+            extreme_index, moving_down = i, not moving_down
+    return low_points
+
+
+def refinement_frame_numbers(frame_numbers, sample_indices, window_frames, step):
+    """
+    Source frames to add around the given samples: every `step`-th frame within
+    window_frames of each sample's frame, minus the frames that were already sampled
+    Returns: sorted list of frame numbers
+    """
+    sampled = set(frame_numbers)
+    extra = set()
+    for index in sample_indices:
+        center = frame_numbers[index]
+        first = max(0, -(-(center - window_frames) // step) * step)  # first grid frame inside the window
+        extra.update(range(first, center + window_frames + 1, step))
+    return sorted(extra - sampled)
+
+
+def contiguous_runs(frame_numbers, step):
+    """
+    Lengths of the runs of frame numbers spaced exactly `step` apart (e.g. the refinement
+    windows), so pose tracking can restart at each jump
+    Returns: list of run lengths
+    """
+    if len(frame_numbers) == 0:
+        return []
+    jumps = np.flatnonzero(np.diff(np.asarray(frame_numbers)) != step) + 1
+    return np.diff(np.concatenate([[0], jumps, [len(frame_numbers)]])).tolist()
+
+
+def merge_samples(first, first_frames, second, second_frames):
+    """
+    Merge two PoseSequences sampled at the given source frame numbers into frame order
+    Returns: PoseSequence with frame_numbers set
+    """
+    frame_numbers = np.concatenate([np.asarray(first_frames, dtype=np.int64), np.asarray(second_frames, dtype=np.int64)])
+    order = np.argsort(frame_numbers, kind="stable")
+    merged = PoseSequence.concatenate([first, second])
+    return PoseSequence(merged.landmarks[order], merged.valid[order], merged.landmark_ids, frame_numbers[order])
+
+
+def resample_uniform(pose_data, step):
+    """
+    Linearly interpolate an unevenly sampled sequence onto frames 0, step, 2*step, ...
+    A grid frame has a pose when the real sample nearest to it does.
+    Returns: (PoseSequence, grid frame numbers)
+    """
+    frame_numbers = pose_data.frame_numbers
+    if len(pose_data) == 0:
+        return PoseSequence.empty(landmark_ids=pose_data.landmark_ids), np.empty(0, dtype=np.int64)
+    grid = np.arange(0, frame_numbers[-1] + 1, step, dtype=np.int64)
+
+    # Nearest real sample decides whether the grid frame has a pose
+    right = np.clip(np.searchsorted(frame_numbers, grid), 0, len(frame_numbers) - 1)
+    left = np.clip(right - 1, 0, len(frame_numbers) - 1)
+    nearest = np.where(np.abs(frame_numbers[left] - grid) <= np.abs(frame_numbers[right] - grid), left, right)
+    valid = pose_data.valid[nearest]
+
+    landmarks = np.full((len(grid),) + pose_data.landmarks.shape[1:], np.nan, dtype=np.float32)
+    valid_frames = frame_numbers[pose_data.valid]
+    valid_landmarks = pose_data.landmarks[pose_data.valid]
+    if len(valid_frames) == 1:
+        landmarks[valid] = valid_landmarks[0]
+    elif len(valid_frames) > 1:
+        # Interpolate between the detected samples on either side of each grid frame
+        hi = np.clip(np.searchsorted(valid_frames, grid), 1, len(valid_frames) - 1)
+        lo = hi - 1
+        weight = np.clip((grid - valid_frames[lo]) / (valid_frames[hi] - valid_frames[lo]), 0.0, 1.0)[:, None, None]
+        landmarks[valid] = (valid_landmarks[lo] * (1 - weight) + valid_landmarks[hi] * weight)[valid]
+    return PoseSequence(landmarks, valid, pose_data.landmark_ids), grid
+
+
+def count_reps_adaptive(pose_data, rep_counter, signal_landmarks, validator, grid_step):
+    """
+    Count reps on an adaptively sampled sequence (frame_numbers set).
+    rep_counter runs on the poses interpolated onto every grid_step-th frame; each rep's frames
+    are then mapped back to the nearest real samples, its lowest point becomes the real sample
+    with the largest tracked y within the rep, and the validator re-checks it there.
+    Returns: rep_info with frame indices into pose_data
+    """
+    grid_data, grid = resample_uniform(pose_data, grid_step)
+    rep_info = rep_counter(grid_data)
+    reps = rep_info["reps_data"]
+    if not reps:
+        return rep_info
+
+    frame_numbers = pose_data.frame_numbers
+    signal = np.where(pose_data.valid, tracked_signal(pose_data, signal_landmarks), -np.inf)
+
+    def nearest_sample(frame_number):
+        right = min(int(np.searchsorted(frame_numbers, frame_number)), len(frame_numbers) - 1)
+        left = max(right - 1, 0)
+        return left if abs(frame_numbers[left] - frame_number) <= abs(frame_numbers[right] - frame_number) else right
+
+    for rep in reps:
+        start, end = grid[rep["start_frame"]], grid[rep["end_frame"]]
+        in_rep = np.flatnonzero((frame_numbers >= start) & (frame_numbers <= end))
+        rep["start_frame"] = nearest_sample(start)
+        rep["end_frame"] = nearest_sample(end)
+        if len(in_rep) > 0 and np.isfinite(signal[in_rep]).any():
+            rep["lowest_point_frame"] = int(in_rep[np.argmax(signal[in_rep])])
+        else:
+            rep["lowest_point_frame"] = nearest_sample(grid[rep["lowest_point_frame"]])
+
+    # Re-validate every rep at its refined lowest point in one batch
+    rows = validation_rows(validator(pose_data, [rep["lowest_point_frame"] for rep in reps]))
+    for rep, row in zip(reps, rows):
+        rep.update({name: value for name, value in row.items() if name in rep})
+    return rep_info
@@ -0,0 +1,63 @@
+"""
+Bounded executor for CPU-bound video analysis.
+Analysis runs on a small thread pool (the heavy pose work itself happens in the pose engine's
+worker processes), so the event loop stays free for health checks and feedback requests.
+At most max_concurrent analyses run at once and up to max_queued more wait for a slot;
+anything beyond that is rejected with AnalysisQueueFull.
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from app.config import ANALYSIS_MAX_CONCURRENT, ANALYSIS_MAX_QUEUED
+
+
+class AnalysisQueueFull(Exception):
+    pass
+
+
+class AnalysisExecutor:
+    def __init__(self, max_concurrent=2, max_queued=8):
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_queued = max(0, max_queued)
+        self._executor = ThreadPoolExecutor(max_workers=self.max_concurrent, thread_name_prefix="analysis")
+        # Only touched from the event loop thread (done-callbacks are handed back to it), so no lock is needed
+        self._pending = 0
+
+    @property
+    def pending(self):
+        """Number of analyses running or waiting for a slot"""
+        return self._pending
+
+    @property
+    def full(self):
+        """Whether run() would be rejected right now (checked before accepting an upload's body)"""
+        return self._pending >= self.max_concurrent + self.max_queued
+
+    async def run(self, fn, *args, **kwargs):
+        """
+        Run fn(*args, **kwargs) on the executor and await its result.
+        Raises AnalysisQueueFull if every slot and queue position is taken.
+        The slot is held until the job itself finishes: if the caller is cancelled (client
+        disconnect, timeout) while the job is already running, the thread keeps working and
+        keeps counting against the limit.
+        """
+        if self.full:
+            raise AnalysisQueueFull(
+                f"{self._pending} analyses already running or queued (limit {self.max_concurrent + self.max_queued})"
+            )
+        loop = asyncio.get_running_loop()
+        future = self._executor.submit(partial(fn, *args, **kwargs))
+        self._pending += 1
+        future.add_done_callback(lambda _: loop.call_soon_threadsafe(self._release))
+        return await asyncio.wrap_future(future, loop=loop)
+
+    def _release(self):
+        self._pending -= 1
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+analysis_executor = AnalysisExecutor(max_concurrent=ANALYSIS_MAX_CONCURRENT, max_queued=ANALYSIS_MAX_QUEUED)
@@ -0,0 +1,128 @@
+"""
+Cache of generated LLM feedback.
+The feedback prompt only depends on a few session aggregates (rep counts and issue counts), so
+many sessions produce the exact same prompt. Entries are keyed on the whitespace-normalized
+prompt plus the backend, model and sampling options, expire after a TTL and are evicted least
+recently used first. An optional SQLite file keeps them across restarts.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from app.config import FEEDBACK_CACHE_TTL, FEEDBACK_CACHE_MAX_ENTRIES, FEEDBACK_CACHE_PATH
+from app.utils.llm_client import ollama_generate_payload
+from app.utils.metrics import CACHE_REQUESTS
+
+
+def feedback_cache_key(model, prompt):
+    """
+    Cache key for a feedback request.
+    model: "ollama" or "apifree"; for Ollama the model name and sampling options are part of the key
+    """
+    normalized_prompt = " ".join(prompt.split())
+    key_data = {"backend": model, "prompt": normalized_prompt}
+    if model != "apifree":
+        payload = ollama_generate_payload(prompt)
+        key_data["model"] = payload["model"]
+        key_data["options"] = payload["options"]
+    return hashlib.sha256(json.dumps(key_data, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class FeedbackCache:
+    """
+    In-memory TTL/LRU cache, optionally backed by a SQLite file
+    """
+
+    def __init__(self, ttl_seconds=86400, max_entries=1024, path=None):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (created_at, feedback)
+        self._lock = threading.Lock()
+        self._db = None
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS feedback_cache ("
+                "key TEXT PRIMARY KEY, feedback TEXT NOT NULL, created_at REAL NOT NULL, last_access REAL NOT NULL)"
+            )
+            self._db.commit()
+
+    @property
+    def enabled(self):
+        return self.max_entries > 0
+
+    def get(self, key):
+        """
+        Cached feedback for key, or None if missing or expired
+        """
+        if not self.enabled:
+            return None
+        feedback = self._lookup(key)
+        CACHE_REQUESTS.inc(cache="feedback", result="miss" if feedback is None else "hit")
+        return feedback
+
+    def _lookup(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None and self._db is not None:
+                row = self._db.execute("SELECT created_at, feedback FROM feedback_cache WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    entry = (row[0], row[1])
+                    self._remember(key, entry)
+            if entry is None:
+                return None
+            created_at, feedback = entry
+            if now - created_at > self.ttl_seconds:
+                self._forget(key)
+                return None
+            self._entries.move_to_end(key)
+            if self._db is not None:
+                self._db.execute("UPDATE feedback_cache SET last_access = ? WHERE key = ?", (now, key))
+                self._db.commit()
+            return feedback
+
+    def set(self, key, feedback):
+        if not self.enabled:
+            return
+        now = time.time()
+        with self._lock:
+            self._remember(key, (now, feedback))
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO feedback_cache (key, feedback, created_at, last_access) VALUES (?, ?, ?, ?)",
+                    (key, feedback, now, now),
+                )
+                # Same TTL and size cap on disk
+                self._db.execute("DELETE FROM feedback_cache WHERE created_at < ?", (now - self.ttl_seconds,))
+                self._db.execute(
+                    "DELETE FROM feedback_cache WHERE key NOT IN "
+                    "(SELECT key FROM feedback_cache ORDER BY last_access DESC LIMIT ?)",
+                    (self.max_entries,),
+                )
+                self._db.commit()
+
+    def _remember(self, key, entry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _forget(self, key):
+        self._entries.pop(key, None)
+        if self._db is not None:
+            self._db.execute("DELETE FROM feedback_cache WHERE key = ?", (key,))
+            self._db.commit()
+
+
+feedback_cache = FeedbackCache(
+    ttl_seconds=FEEDBACK_CACHE_TTL,
+    max_entries=FEEDBACK_CACHE_MAX_ENTRIES,
+    path=FEEDBACK_CACHE_PATH or None,
+)
@@ -0,0 +1,198 @@
+"""
+Scheduler in front of the Ollama backend.
+Feedback generations wait in a bounded FIFO for one of max_in_flight slots, so a burst of
+requests queues up in arrival order instead of all hitting Ollama at once. Identical prompts
+that are already queued or generating are coalesced: later callers simply await the first
+caller's generation (run), or replay and then follow its token stream (stream).
+Queue depth and wait times are tracked for monitoring.
+"""
+
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+
+from app.config import FEEDBACK_MAX_IN_FLIGHT, FEEDBACK_MAX_QUEUED
+from app.utils.metrics import histogram
+
+WAIT_SECONDS = histogram(
+    "formai_feedback_wait_seconds",
+    "Time Ollama feedback generations waited for a scheduler slot",
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300),
+)
+
+
+class FeedbackQueueFull(Exception):
+    pass
+
+
+class _SharedStream:
+    """
+    Tokens of one streamed generation, replayed from the start to every caller following it
+    """
+
+    def __init__(self):
+        self.tokens = []
+        self.done = False
+        self.error = None
+        self._changed = asyncio.Event()
+
+    def _notify(self):
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def append(self, token):
+        self.tokens.append(token)
+        self._notify()
+
+    def finish(self, error=None):
+        self.error = error
+        self.done = True
+        self._notify()
+
+    async def follow(self):
+        index = 0
+        while True:
+            while index < len(self.tokens):
+                yield self.tokens[index]
+                index += 1
+            if self.done:
+                if self.error is not None:
+                    raise self.error
+                return
+            await self._changed.wait()
+
+
+class FeedbackScheduler:
+    def __init__(self, max_in_flight=2, max_queued=64, wait_window=1000):
+        self.max_in_flight = max(1, max_in_flight)
+        self.max_queued = max(0, max_queued)
+        self._slots = None
+        self._pending = {}  # prompt key -> task generating it
+        self._streams = {}  # prompt key -> _SharedStream being generated
+        self._waiting = 0
+        self._in_flight = 0
+        self._waits = deque(maxlen=wait_window)  # recent slot wait times in seconds
+        self.submitted = 0
+        self.coalesced = 0
+        self.rejected = 0
+
+    def _get_slots(self):
+        # Created lazily so it binds to the running event loop; waiters are woken in FIFO order
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_in_flight)
+        return self._slots
+
+    @property
+    def queue_depth(self):
+        return self._waiting
+
+    @property
+    def in_flight(self):
+        return self._in_flight
+
+    @asynccontextmanager
+    async def slot(self):
+        """
+        Wait (in arrival order) for a free generation slot.
+        Raises FeedbackQueueFull if max_queued requests are already waiting.
+        """
+        slots = self._get_slots()
+        if slots.locked() and self._waiting >= self.max_queued:
+            self.rejected += 1
+            raise FeedbackQueueFull(f"{self._waiting} feedback requests already waiting")
+        self._waiting += 1
+        start = time.monotonic()
+        try:
+            await slots.acquire()
+        finally:
+            self._waiting -= 1
+        waited = time.monotonic() - start
+        self._waits.append(waited)
+        WAIT_SECONDS.observe(waited)
+        self._in_flight += 1
+        try:
+            yield
+        finally:
+            self._in_flight -= 1
+            slots.release()
+
+    async def run(self, key, fn):
+        """
+        Run the coroutine function fn() in a slot and return its result.
+        If a request with the same key is already queued or generating, await that one instead.
+        The generation runs in its own task, so one caller disconnecting doesn't cancel it for the others.
+        """
+        self.submitted += 1
+        task = self._pending.get(key)
+        if task is None:
+            if self._get_slots().locked() and self._waiting >= self.max_queued:
+                self.rejected += 1
+                raise FeedbackQueueFull(f"{self._waiting} feedback requests already waiting")
+            task = asyncio.ensure_future(self._run_in_slot(fn))
+            self._pending[key] = task
+            task.add_done_callback(lambda _, key=key: self._pending.pop(key, None))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    async def _run_in_slot(self, fn):
+        async with self.slot():
+            return await fn()
+
+    def stream(self, key, fn):
+        """
+        Stream the tokens of the async generator fn() generated in a slot.
+        If a stream with the same key is already queued or generating, follow that one instead:
+        its tokens so far are replayed, then new ones arrive as they are generated. The generation
+        runs in its own task, so one caller disconnecting doesn't cancel it for the others.
+        Returns: an async iterator of tokens (raising whatever the generation raised)
+        Raises: FeedbackQueueFull straight away if a new generation can't be queued
+        """
+        self.submitted += 1
+        shared = self._streams.get(key)
+        if shared is None:
+            if self._get_slots().locked() and self._waiting >= self.max_queued:
+                self.rejected += 1
+                raise FeedbackQueueFull(f"{self._waiting} feedback requests already waiting")
+            shared = self._streams[key] = _SharedStream()
+            task = asyncio.ensure_future(self._stream_in_slot(shared, fn))
+            task.add_done_callback(lambda _, key=key: self._streams.pop(key, None))
+        else:
+            self.coalesced += 1
+        return shared.follow()
+
+    async def _stream_in_slot(self, shared, fn):
+        try:
+            async with self.slot():
+                async for token in fn():
+                    shared.append(token)
+        except Exception as e:
+            shared.finish(e)
+        else:
+            shared.finish()
+        finally:
+            if not shared.done:  # cancelled, e.g. on shutdown
+                shared.finish(RuntimeError("Feedback generation was cancelled"))
+
+    def stats(self):
+        waits = sorted(self._waits)
+        return {
+            "queue_depth": self._waiting,
+            "in_flight": self._in_flight,
+            "max_in_flight": self.max_in_flight,
+            "max_queued": self.max_queued,
+            "submitted": self.submitted,
+            "coalesced": self.coalesced,
+            "rejected": self.rejected,
+            "wait_seconds": {
+                "samples": len(waits),
+                "avg": sum(waits) / len(waits) if waits else 0.0,
+                "p50": waits[len(waits) // 2] if waits else 0.0,
+                "p95": waits[min(len(waits) - 1, int(len(waits) * 0.95))] if waits else 0.0,
+                "max": waits[-1] if waits else 0.0,
+            },
+        }
+
+
+feedback_scheduler = FeedbackScheduler(max_in_flight=FEEDBACK_MAX_IN_FLIGHT, max_queued=FEEDBACK_MAX_QUEUED)
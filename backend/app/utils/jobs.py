@@ -0,0 +1,146 @@
+"""
+Background analysis jobs.
+An upload is turned into a job that waits in a bounded queue and is picked up by a fixed set of
+worker threads. Clients get a job ID straight away and poll (or stream) its progress and result.
+Finished jobs are kept in a local in-memory store and expire after a TTL.
+"""
+
+import logging
+import queue
+import threading
+import time
+import uuid
+
+from app.config import JOB_WORKERS, JOB_QUEUE_SIZE, JOB_RESULT_TTL
+
+logger = logging.getLogger(__name__)
+
+
+class JobQueueFull(Exception):
+    pass
+
+
+class JobStore:
+    """
+    Thread-safe job records with time-based expiry of finished jobs
+    """
+
+    def __init__(self, ttl_seconds=3600):
+        self.ttl_seconds = ttl_seconds
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def create(self, exercise):
+        now = time.time()
+        job = {
+            "job_id": uuid.uuid4().hex,
+            "exercise": exercise,
+            "status": "queued",  # queued -> running -> completed / failed
+            "frames_processed": 0,
+            "created_at": now,
+            "updated_at": now,
+            "result": None,
+            "error": None,
+        }
+        with self._lock:
+            self._purge_expired(now)
+            self._jobs[job["job_id"]] = job
+        return dict(job)
+
+    def update(self, job_id, **fields):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                job.update(fields)
+                job["updated_at"] = time.time()
+
+    def get(self, job_id):
+        """Return a snapshot of the job, or None if it doesn't exist or has expired"""
+        with self._lock:
+            self._purge_expired(time.time())
+            job = self._jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def _purge_expired(self, now):
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job["status"] in ("completed", "failed") and now - job["updated_at"] > self.ttl_seconds
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+
+class JobQueue:
+    """
+    Bounded FIFO of pending jobs served by `workers` background threads
+    """
+
+    def __init__(self, store, workers=2, max_size=32):
+        self.store = store
+        self.workers = max(1, workers)
+        self._queue = queue.Queue(maxsize=max_size)
+        self._threads = []
+
+    @property
+    def depth(self):
+        return self._queue.qsize()
+
+    @property
+    def full(self):
+        """Whether submit() would be rejected right now (checked before accepting an upload's body)"""
+        return self._queue.full()
+
+    def submit(self, exercise, fn, *args):
+        """
+        Queue fn(*args, progress=callback) as a new job and return its record.
+        fn must return a JSON-serializable result. Raises JobQueueFull if the queue is at capacity.
+        """
+        self._ensure_started()
+        job = self.store.create(exercise)
+        try:
+            self._queue.put_nowait((job["job_id"], fn, args))
+        except queue.Full:
+            self.store.update(job["job_id"], status="failed", error="Job queue is full")
+            raise JobQueueFull(f"{self._queue.maxsize} jobs already queued")
+        return job
+
+    def _ensure_started(self):
+        if self._threads:
+            return
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._worker, name=f"analysis-job-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _worker(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            job_id, fn, args = item
+            self.store.update(job_id, status="running")
+
+            def progress(frames_processed, job_id=job_id):
+                self.store.update(job_id, frames_processed=frames_processed)
+
+            try:
+                result = fn(*args, progress=progress)
+                self.store.update(job_id, status="completed", result=result)
+            except Exception as e:
+                logger.exception("Analysis job %s failed", job_id)
+                self.store.update(job_id, status="failed", error=str(e))
+            finally:
+                self._queue.task_done()
+
+    def shutdown(self):
+        # Workers are daemon threads; the sentinels just let idle ones exit cleanly
+        for _ in self._threads:
+            try:
+                self._queue.put_nowait(None)
+            except queue.Full:
+                break
+        self._threads = []
+
+
+job_store = JobStore(ttl_seconds=JOB_RESULT_TTL)
+job_queue = JobQueue(job_store, workers=JOB_WORKERS, max_size=JOB_QUEUE_SIZE)
@@ -0,0 +1,168 @@
+"""
+Live analysis of a stream of webcam frames (or landmarks computed on the client).
+Each WebSocket connection gets a LiveSession: its own MediaPipe graph in tracking mode and
+a push-based RepCounter (constant work and memory per frame), so a rep and its validation
+are reported as soon as the lifter comes back up rather than after the set.
+"""
+
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from app.config import (
+    LIVE_MAX_SESSIONS, FRAME_MAX_WIDTH, FRAME_MAX_HEIGHT,
+    POSE_MODEL_COMPLEXITY, POSE_MIN_DETECTION_CONFIDENCE, POSE_MIN_TRACKING_CONFIDENCE,
+)
+from app.utils.metrics import POSE_FRAME_SECONDS, FRAMES_PROCESSED
+from app.utils.pose_analysis import create_pose, process_frames
+from app.utils.pose_sequence import NUM_LANDMARKS, LANDMARK_FIELDS
+from app.utils.rep_counter import RepCounter
+from app.utils.video_processing import resize_frame
+
+
+class LiveSessionsFull(Exception):
+    pass
+
+
+class LiveSession:
+    """
+    State of one live connection for one exercise. Frames are numbered in arrival order
+    (0, 1, 2, ...), and rep records use those numbers like reps_data uses video frame indices.
+    Not thread-safe: feed it from one task at a time. close() may be called while a push_image
+    is still running in a worker thread (e.g. the client disconnected); the MediaPipe graph
+    is then closed by that push once it is done with it.
+    """
+
+    def __init__(self, exercise):
+        self.exercise = exercise
+        self.counter = RepCounter(exercise.signal_landmarks, exercise.movement_threshold, exercise.validator)
+        self.reps = []
+        self._pose = None
+        self._pose_lock = threading.Lock()  # held while push_image uses the MediaPipe graph
+        self._closed = False
+
+    def push_landmarks(self, landmarks):
+        """
+        Add one frame's landmarks ((33, 4) array of [x, y, z, visibility], or None when no pose was detected)
+        Returns: the rep record if this frame completed a rep, else None
+        """
+        rep = self.counter.push(landmarks)
+        if rep is not None:
+            self.reps.append(rep)
+        return rep
+
+    @property
+    def frames_received(self):
+        return self.counter.frames_seen
+
+    def push_image(self, image):
+        """
+        Run pose inference on one BGR frame and add its landmarks (blocking; run it off the event loop)
+        Returns: (whether a pose was detected, the rep record or None)
+        Raises: RuntimeError if the session is closed
+        """
+        image = resize_frame(image, max_width=FRAME_MAX_WIDTH, max_height=FRAME_MAX_HEIGHT)
+        try:
+            with self._pose_lock:
+                if self._closed:
+                    raise RuntimeError("Live session is closed")
+                if self._pose is None:
+                    # Tracking mode: consecutive frames of one lifter
+                    self._pose = create_pose(
+                        static_image_mode=False,
+                        model_complexity=POSE_MODEL_COMPLEXITY,
+                        min_detection_confidence=POSE_MIN_DETECTION_CONFIDENCE,
+                        min_tracking_confidence=POSE_MIN_TRACKING_CONFIDENCE,
+                    )
+                start = time.perf_counter()
+                pose = process_frames(self._pose, [image])[0]
+                POSE_FRAME_SECONDS.observe(time.perf_counter() - start)
+        finally:
+            # close() leaves the graph alone while it's in use here
+            self._release_pose()
+        FRAMES_PROCESSED.inc()
+        landmarks = None if pose is None else np.asarray(pose, dtype=np.float32)
+        return landmarks is not None, self.push_landmarks(landmarks)
+
+    def push_encoded_image(self, data):
+        """
+        Decode an encoded frame (a binary message) and push_image it, all off the event loop
+        Returns: (whether a pose was detected, the rep record or None)
+        Raises: ValueError if data isn't a readable image
+        """
+        image = decode_image(data)
+        if image is None:
+            raise ValueError("Could not decode image")
+        return self.push_image(image)
+
+    def summary(self):
+        return {"rep_count": len(self.reps), "reps_data": self.reps, "frames": self.frames_received}
+
+    def close(self):
+        global _active_sessions
+        if self._closed:
+            return
+        self._closed = True
+        _active_sessions -= 1
+        self._release_pose()
+
+    def _release_pose(self):
+        # Once closed, whichever of close() and an in-flight push_image gets the lock last closes
+        # the graph: close() sets _closed before trying, and push_image tries after releasing it
+        if self._closed and self._pose_lock.acquire(blocking=False):
+            try:
+                if self._pose is not None:
+                    self._pose.close()
+                    self._pose = None
+            finally:
+                self._pose_lock.release()
+
+
+# Only touched from the event loop thread, so no lock is needed
+_active_sessions = 0
+
+
+def active_live_sessions():
+    return _active_sessions
+
+
+def open_live_session(exercise):
+    """
+    Start a LiveSession; close() it when the connection ends.
+    Raises LiveSessionsFull when LIVE_MAX_SESSIONS sessions are already open.
+    """
+    global _active_sessions
+    if _active_sessions >= LIVE_MAX_SESSIONS:
+        raise LiveSessionsFull(f"{_active_sessions} live sessions already open (limit {LIVE_MAX_SESSIONS})")
+    _active_sessions += 1
+    return LiveSession(exercise)
+
+
+def parse_landmarks(value):
+    """
+    Landmarks sent by a client: a list of 33 [x, y, z, visibility] lists, or null for no pose
+    Returns: (33, 4) float32 array or None
+    Raises: ValueError for anything else, including NaN or infinite values (json.loads accepts
+    NaN and Infinity, and one such frame would throw off the rep counter's running averages)
+    """
+    if value is None:
+        return None
+    try:
+        landmarks = np.asarray(value, dtype=np.float32)
+    except (TypeError, ValueError):
+        raise ValueError("landmarks must be a list of [x, y, z, visibility] lists")
+    if landmarks.shape != (NUM_LANDMARKS, LANDMARK_FIELDS):
+        raise ValueError(f"landmarks must have {NUM_LANDMARKS} entries of {LANDMARK_FIELDS} numbers")
+    if not np.isfinite(landmarks).all():
+        raise ValueError("landmarks must be finite numbers")
+    return landmarks
+
+
+def decode_image(data):
+    """
+    Decode an encoded image (JPEG, PNG, WebP, ...) sent as a binary message
+    Returns: BGR array or None if it isn't a readable image
+    """
+    return cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
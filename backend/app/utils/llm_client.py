@@ -0,0 +1,237 @@
+"""
+Shared async HTTP client for the LLM backends (Ollama and ApiFree).
+One pooled httpx.AsyncClient is reused for every feedback request. ApiFree requests have their
+own concurrency limit; Ollama generations are limited by the feedback scheduler instead, so there
+is a single limit to tune. Requests are only retried (with exponential backoff) when they can't
+have started a generation: failed connections and 429/503 responses. A read timeout may mean the
+backend is still generating, so it is not retried. Nothing here blocks the event loop.
+"""
+
+import asyncio
+import contextlib
+import json
+import logging
+
+import httpx
+from starlette.concurrency import run_in_threadpool
+
+from app.config import (
+    OLLAMA_URL, APIFREE_URL, LLM_TIMEOUT, LLM_MAX_RETRIES, LLM_RETRY_BACKOFF,
+    APIFREE_MAX_CONCURRENT,
+)
+from app.utils.sse import format_sse
+from app.utils.feedback_scheduler import feedback_scheduler, FeedbackQueueFull
+from app.utils.metrics import timed, LLM_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUS_CODES = {429, 503}
+RETRY_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout)
+
+APIFREE_HEADERS = {
+    'Content-Type': 'application/json',
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+}
+
+
+def ollama_generate_payload(prompt, stream=False):
+    """
+    Request body for Ollama's /api/generate with the feedback model and sampling options
+    """
+    return {
+        "model": "tinyllama:latest",  # Using tinyllama - fast and efficient
+        "prompt": prompt,
+        "stream": stream,
+        "options": {
+            "temperature": 0.8,  # Higher temp for more natural language
+            "top_p": 0.95,
+            "num_predict": 200,  # Limit response length (3-4 sentences)
+            "stop": ["\n\n\n", "Summary:", "Rep "],  # Stop at natural breaks
+        }
+    }
+
+
+class LLMClient:
+    def __init__(self, timeout=60.0, max_retries=2, retry_backoff=0.5, concurrency=None):
+        self.timeout = timeout
+        self.max_retries = max(0, max_retries)
+        self.retry_backoff = retry_backoff
+        self._concurrency = concurrency or {}
+        self._semaphores = {}
+        self._client = None
+
+    def _get_client(self):
+        # Created lazily so it binds to the running event loop
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=httpx.Timeout(self.timeout, connect=10.0),
+                limits=httpx.Limits(max_connections=50, max_keepalive_connections=20),
+            )
+        return self._client
+
+    def _limit(self, backend):
+        """Concurrency limit for backend, or a no-op for backends limited elsewhere (Ollama)"""
+        if backend not in self._concurrency:
+            return contextlib.nullcontext()
+        if backend not in self._semaphores:
+            self._semaphores[backend] = asyncio.Semaphore(self._concurrency[backend])
+        return self._semaphores[backend]
+
+    async def post(self, backend, url, **kwargs):
+        """
+        POST to an LLM backend, waiting for a free slot in that backend's concurrency limit.
+        Retries failed connections and 429/503 responses with exponential backoff.
+        Returns: the final httpx.Response (may still be an error status once retries run out)
+        Raises: httpx.ConnectError / httpx.ConnectTimeout if every attempt failed to connect,
+        other httpx errors (e.g. httpx.ReadTimeout) straight away
+        """
+        async with self._limit(backend):
+            with timed("llm"):
+                for attempt in range(self.max_retries + 1):
+                    last_attempt = attempt == self.max_retries
+                    try:
+                        response = await self._get_client().post(url, **kwargs)
+                    except RETRY_ERRORS as e:
+                        if last_attempt:
+                            LLM_REQUESTS.inc(backend=backend, outcome=_error_outcome(e))
+                            raise
+                        logger.warning("%s request failed (%s), retrying", backend, type(e).__name__)
+                    except httpx.HTTPError as e:
+                        LLM_REQUESTS.inc(backend=backend, outcome=_error_outcome(e))
+                        raise
+                    else:
+                        if response.status_code not in RETRY_STATUS_CODES or last_attempt:
+                            LLM_REQUESTS.inc(backend=backend, outcome="ok" if response.status_code == 200 else "http_error")
+                            return response
+                        logger.warning("%s returned %d, retrying", backend, response.status_code)
+                    await asyncio.sleep(self.retry_backoff * (2 ** attempt))
+
+    async def stream_lines(self, backend, url, **kwargs):
+        """
+        POST to an LLM backend and yield non-empty response lines as they arrive.
+        Failed connections are retried like post() (nothing has been streamed yet at that point).
+        Raises: httpx.HTTPStatusError for a non-200 response
+        """
+        async with self._limit(backend):
+            with timed("llm"):
+                for attempt in range(self.max_retries + 1):
+                    try:
+                        async with self._get_client().stream("POST", url, **kwargs) as response:
+                            if response.status_code != 200:
+                                await response.aread()
+                                LLM_REQUESTS.inc(backend=backend, outcome="http_error")
+                                response.raise_for_status()
+                            async for line in response.aiter_lines():
+                                if line:
+                                    yield line
+                        LLM_REQUESTS.inc(backend=backend, outcome="ok")
+                        return
+                    except RETRY_ERRORS as e:
+                        if attempt == self.max_retries:
+                            LLM_REQUESTS.inc(backend=backend, outcome=_error_outcome(e))
+                            raise
+                        logger.warning("%s stream failed to connect, retrying", backend)
+                    await asyncio.sleep(self.retry_backoff * (2 ** attempt))
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+def _error_outcome(error):
+    if isinstance(error, httpx.TimeoutException):
+        return "timeout"
+    if isinstance(error, httpx.ConnectError):
+        return "connect_error"
+    return "error"
+
+
+llm_client = LLMClient(
+    timeout=LLM_TIMEOUT,
+    max_retries=LLM_MAX_RETRIES,
+    retry_backoff=LLM_RETRY_BACKOFF,
+    concurrency={"apifree": APIFREE_MAX_CONCURRENT},
+)
+
+
+async def stream_feedback_events(model, prompt, cached_feedback=None, on_complete=None, key=None):
+    """
+    Generate feedback for prompt and yield it as Server-Sent Events:
+    "token" events as text arrives, then "done" with the full feedback (or "error").
+    model: "ollama" (token streaming) or "apifree" (single reply, sent as one token once it arrives)
+    cached_feedback: previously generated feedback for this prompt; sent straight away without calling the LLM
+    on_complete: optional blocking callback (e.g. a cache write), run in the threadpool with the
+    full feedback after a successful generation
+    key: identifies identical requests (e.g. the feedback cache key, default the prompt); concurrent
+    Ollama streams with the same key share one generation
+    """
+    if cached_feedback is not None:
+        yield format_sse("token", {"token": cached_feedback})
+        yield format_sse("done", {"success": True, "feedback": cached_feedback, "cached": True})
+        return
+    try:
+        if model == "apifree":
+            response = await llm_client.post("apifree", APIFREE_URL, json={"message": prompt}, headers=APIFREE_HEADERS)
+            if response.status_code != 200:
+                yield format_sse("error", {
+                    "feedback": "Unable to generate feedback from ApiFree.",
+                    "error": f"API returned status code {response.status_code}"
+                })
+                return
+            result = response.json()
+            if result.get('status') != 'success':
+                error_msg = result.get('error', 'Unknown error')
+                yield format_sse("error", {"feedback": f"ApiFree API error: {error_msg}", "error": error_msg})
+                return
+            feedback_text = result.get('response', 'Unable to generate feedback.')
+            if on_complete:
+                await run_in_threadpool(on_complete, feedback_text)
+            yield format_sse("token", {"token": feedback_text})
+            yield format_sse("done", {"success": True, "feedback": feedback_text})
+            return
+
+        # Ollama streams newline-delimited JSON objects, each carrying the next piece of text.
+        # Streams wait for a scheduler slot like other Ollama generations, and identical ones
+        # in flight share a single generation.
+        async def generate():
+            pieces = []
+            async for line in llm_client.stream_lines(
+                "ollama", f"{OLLAMA_URL}/api/generate", json=ollama_generate_payload(prompt, stream=True)
+            ):
+                chunk = json.loads(line)
+                token = chunk.get('response', '')
+                if token:
+                    pieces.append(token)
+                    yield token
+                if chunk.get('done'):
+                    break
+            # Runs once per generation, before callers following it are told it's done
+            if on_complete:
+                await run_in_threadpool(on_complete, "".join(pieces))
+
+        pieces = []
+        async for token in feedback_scheduler.stream(key if key is not None else prompt, generate):
+            pieces.append(token)
+            yield format_sse("token", {"token": token})
+        yield format_sse("done", {"success": True, "feedback": "".join(pieces)})
+    except FeedbackQueueFull:
+        yield format_sse("error", {
+            "feedback": "The feedback service is busy right now. Please try again in a moment.",
+            "error": "Feedback queue is full"
+        })
+    except httpx.ConnectError:
+        logger.error("Connection error: Ollama not running")
+        yield format_sse("error", {
+            "feedback": "Unable to connect to Ollama. Please ensure Ollama is installed and running (ollama serve).",
+            "error": "Connection refused"
+        })
+    except httpx.HTTPStatusError as e:
+        logger.error("Ollama API error: %d", e.response.status_code)
+        yield format_sse("error", {
+            "feedback": "Unable to generate feedback. Please ensure Ollama is running.",
+            "error": f"API returned status code {e.response.status_code}"
+        })
+    except Exception as e:
+        logger.exception("Error streaming feedback")
+        yield format_sse("error", {"feedback": "An error occurred while generating feedback.", "error": str(e)})
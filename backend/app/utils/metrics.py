@@ -0,0 +1,229 @@
+"""
+In-process metrics in the Prometheus text format (served on GET /metrics).
+Counters and histograms are updated where the work happens; gauges read their value from a
+callback when the endpoint is scraped, so queue depths are always current.
+Everything is per process and thread-safe; nothing is exported from the pose worker processes
+directly (they return their timings with each chunk instead).
+"""
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+# Latency buckets in seconds, from a single-frame pose call up to a multi-minute LLM generation
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def _samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in items]
+
+
+class Gauge(_Metric):
+    """
+    Gauge whose value comes from fn() at scrape time (or set() for pushed values)
+    """
+    kind = "gauge"
+
+    def __init__(self, name, help_text, fn=None):
+        super().__init__(name, help_text)
+        self.fn = fn
+        self._value = 0
+
+    def set(self, value):
+        with self._lock:
+            self._value = value
+
+    def _samples(self):
+        value = self.fn() if self.fn is not None else self._value
+        return [f"{self.name} {_format_value(value)}"]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, count=1, **labels):
+        """
+        Record `count` observations of `value` (count > 1 records a per-item average for a batch)
+        """
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = {"buckets": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            if index < len(self.buckets):
+                state["buckets"][index] += count
+            state["sum"] += value * count
+            state["count"] += count
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def snapshot(self, **labels):
+        """(count, sum) recorded so far for the given labels"""
+        with self._lock:
+            state = self._values.get(self._key(labels))
+            return (state["count"], state["sum"]) if state else (0, 0.0)
+
+    def _samples(self):
+        with self._lock:
+            items = sorted((key, dict(state, buckets=list(state["buckets"]))) for key, state in self._values.items())
+        lines = []
+        for key, state in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, state["buckets"]):
+                cumulative += bucket_count
+                labels = _format_labels(self.labelnames, key, [("le", _format_value(float(bound)))])
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key, [("le", "+Inf")])
+            lines.append(f"{self.name}_bucket{labels} {state['count']}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(state['sum'])}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {state['count']}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric '{metric.name}' is already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+
+def counter(name, help_text, labelnames=()):
+    return registry.register(Counter(name, help_text, labelnames))
+
+
+def histogram(name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+    return registry.register(Histogram(name, help_text, labelnames, buckets))
+
+
+def gauge(name, help_text, fn=None):
+    return registry.register(Gauge(name, help_text, fn))
+
+
+# Pipeline metrics shared across modules
+STAGE_SECONDS = histogram(
+    "formai_stage_seconds",
+    "Time spent in each pipeline stage (upload_write, decode, pose, rep_counting, validation, serialization, llm). "
+    "rep_counting includes the validation it triggers; serialization covers encoding pose_data and rendering the JSON body.",
+    ["stage"],
+)
+POSE_FRAME_SECONDS = histogram(
+    "formai_pose_frame_seconds",
+    "MediaPipe inference time per frame, measured in the pose worker processes",
+    buckets=(0.002, 0.005, 0.01, 0.02, 0.03, 0.05, 0.075, 0.1, 0.15, 0.25, 0.5, 1),
+)
+FRAMES_PROCESSED = counter("formai_frames_processed_total", "Frames run through pose inference")
+CACHE_REQUESTS = counter("formai_cache_requests_total", "Cache lookups by cache and result", ["cache", "result"])
+LLM_REQUESTS = counter("formai_llm_requests_total", "LLM requests by backend and outcome", ["backend", "outcome"])
+
+
+@contextmanager
+def timed(stage):
+    """Record the duration of the enclosed block as one observation of formai_stage_seconds"""
+    with STAGE_SECONDS.time(stage=stage):
+        yield
+
+
+class TimedIterator:
+    """
+    Wraps an iterator and adds up the time spent producing its items (e.g. decoding frames),
+    excluding whatever the consumer does between items
+    """
+
+    def __init__(self, iterable):
+        self._iterator = iter(iterable)
+        self.seconds = 0.0
+        self.items = 0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        start = time.perf_counter()
+        try:
+            item = next(self._iterator)
+        finally:
+            self.seconds += time.perf_counter() - start
+        self.items += 1
+        return item
+
+
+def render_metrics():
+    return registry.render()
@@ -0,0 +1,174 @@
+"""
+Shared video analysis pipeline: frame extraction -> pose analysis -> rep counting.
+This is plain blocking code; the routes run it through the analysis executor so it never
+runs on the asyncio event loop.
+"""
+
+from app.config import (
+    FRAME_SAMPLE_FPS, FRAME_MAX_WIDTH, FRAME_MAX_HEIGHT, VIDEO_DECODER, POSE_CHUNK_SIZE, POSE_SEGMENT_CHUNKS,
+    FRAME_ADAPTIVE, FRAME_ADAPTIVE_BASE_FPS, FRAME_ADAPTIVE_PEAK_FPS, FRAME_ADAPTIVE_WINDOW, FRAME_ADAPTIVE_MIN_MOVEMENT,
+    POSE_TRACKING, POSE_MODEL_COMPLEXITY, POSE_MIN_DETECTION_CONFIDENCE, POSE_MIN_TRACKING_CONFIDENCE,
+)
+from app.utils.video_processing import iter_frames, iter_frames_at, sample_step
+from app.utils.pose_engine import get_pose_engine
+from app.utils.pose_cache import pose_cache, hash_file, make_cache_key
+from app.utils.pose_sequence import PoseSequence
+from app.utils.metrics import STAGE_SECONDS, CACHE_REQUESTS, TimedIterator, timed
+from app.utils.adaptive_sampling import (
+    tracked_signal, find_low_points, refinement_frame_numbers, contiguous_runs, merge_samples, count_reps_adaptive,
+)
+import time
+
+
+def pose_cache_key(video_hash, landmark_ids=None, signal_landmarks=None):
+    """
+    Cache key for a video under the current extraction and model settings
+    landmark_ids: the landmark subset that was extracted (None = all landmarks)
+    signal_landmarks: landmarks that steered adaptive sampling (None = fixed-rate sampling)
+    """
+    params = {}
+    if landmark_ids is not None:
+        params["landmarks"] = list(landmark_ids)
+    if FRAME_ADAPTIVE and signal_landmarks is not None:
+        params["adaptive"] = {
+            "signal": list(signal_landmarks),
+            "base_fps": FRAME_ADAPTIVE_BASE_FPS,
+            "peak_fps": FRAME_ADAPTIVE_PEAK_FPS,
+            "window": FRAME_ADAPTIVE_WINDOW,
+            "min_movement": FRAME_ADAPTIVE_MIN_MOVEMENT,
+        }
+    return make_cache_key(
+        video_hash,
+        fps=FRAME_SAMPLE_FPS,
+        max_width=FRAME_MAX_WIDTH,
+        max_height=FRAME_MAX_HEIGHT,
+        decoder=VIDEO_DECODER,  # Backends scale frames slightly differently
+        tracking=POSE_TRACKING,
+        chunk_size=POSE_CHUNK_SIZE,  # Tracking restarts at segment boundaries
+        segment_chunks=POSE_SEGMENT_CHUNKS,
+        model_complexity=POSE_MODEL_COMPLEXITY,
+        min_detection_confidence=POSE_MIN_DETECTION_CONFIDENCE,
+        min_tracking_confidence=POSE_MIN_TRACKING_CONFIDENCE,
+        **params,
+    )
+
+
+def extract_pose(video_path, video_hash=None, progress=None, landmark_ids=None, signal_landmarks=None, engine=None):
+    """
+    Pose data for a video, served from the pose cache when the same clip was analyzed before.
+    video_hash: SHA-256 of the file if the caller already has it (otherwise it is computed here)
+    landmark_ids: only extract these landmarks (None = all 33)
+    signal_landmarks: landmarks whose height steers adaptive sampling (None = fixed-rate sampling)
+    engine: pose engine to run inference on (default: the shared worker pool)
+    Returns: PoseSequence (with frame_numbers set when it was sampled adaptively)
+    """
+    cache_key = None
+    if pose_cache.enabled:
+        video_hash = video_hash or hash_file(video_path)
+        cache_key = pose_cache_key(video_hash, landmark_ids, signal_landmarks)
+        cached = pose_cache.get(cache_key)
+        if cached is None and landmark_ids is not None:
+            # A full extraction of the same clip also covers any subset
+            full = pose_cache.get(pose_cache_key(video_hash, None, signal_landmarks))
+            if full is not None:
+                cached = full.subset(landmark_ids)
+                # Store the subset under its own key too: callers hand that key out as pose_id
+                pose_cache.put(cache_key, cached)
+        CACHE_REQUESTS.inc(cache="pose", result="miss" if cached is None else "hit")
+        if cached is not None:
+            if progress:
+                progress(len(cached))
+            return cached
+
+    timings = {"decode": 0.0, "pose": 0.0}
+    if FRAME_ADAPTIVE and signal_landmarks is not None:
+        pose_data = _extract_pose_adaptive(video_path, progress, landmark_ids, signal_landmarks, timings, engine)
+    else:
+        # Stream frames (3 frames per second by default, downscaled) straight into pose analysis
+        frames = iter_frames(video_path, fps=FRAME_SAMPLE_FPS, max_width=FRAME_MAX_WIDTH, max_height=FRAME_MAX_HEIGHT)
+
+        # Pose analysis (raw MediaPipe data), split into chunks across the warm worker pool
+        pose_data = _analyze_frames(frames, progress, landmark_ids, timings, engine)
+    STAGE_SECONDS.observe(timings["decode"], stage="decode")
+    STAGE_SECONDS.observe(timings["pose"], stage="pose")
+
+    if cache_key is not None:
+        pose_cache.put(cache_key, pose_data)
+    return pose_data
+
+
+def _analyze_frames(frames, progress, landmark_ids, timings, engine=None, run_lengths=None):
+    """
+    Run the pose engine over a frame iterator, adding the time spent decoding frames and the
+    rest of the wall time (waiting on pose inference) to timings["decode"] / timings["pose"]
+    run_lengths: lengths of the runs of contiguous frames when the frames skip parts of the video
+    """
+    frames = TimedIterator(frames)
+    start = time.perf_counter()
+    pose_data = (engine or get_pose_engine()).analyze(
+        frames, progress=progress, landmark_ids=landmark_ids, run_lengths=run_lengths,
+    )
+    timings["decode"] += frames.seconds
+    timings["pose"] += time.perf_counter() - start - frames.seconds
+    return pose_data
+
+
+def _extract_pose_adaptive(video_path, progress, landmark_ids, signal_landmarks, timings, engine=None):
+    """
+    Two-pass extraction (see adaptive_sampling.py): pose a low-rate pass, then only the
+    frames around the bottom of each movement of the tracked signal at a higher rate
+    """
+    base_step = sample_step(video_path, FRAME_ADAPTIVE_BASE_FPS)
+    if base_step is None:
+        return PoseSequence.empty(landmark_ids=landmark_ids)
+
+    # 1. Cheap first pass
+    frames = iter_frames(video_path, fps=FRAME_ADAPTIVE_BASE_FPS, max_width=FRAME_MAX_WIDTH, max_height=FRAME_MAX_HEIGHT)
+    first = _analyze_frames(frames, progress, landmark_ids, timings, engine)
+    first_frames = [i * base_step for i in range(len(first))]
+
+    # 2. Denser windows around each low point of the tracked signal
+    low_points = find_low_points(tracked_signal(first, signal_landmarks), FRAME_ADAPTIVE_MIN_MOVEMENT)
+    peak_step = sample_step(video_path, FRAME_ADAPTIVE_PEAK_FPS)
+    window_frames = int(round(FRAME_ADAPTIVE_WINDOW * FRAME_ADAPTIVE_PEAK_FPS)) * peak_step
+    extra_frames = refinement_frame_numbers(first_frames, low_points, window_frames, peak_step)
+
+    def second_progress(frames_done):
+        if progress:
+            progress(len(first) + frames_done)
+
+    frames = iter_frames_at(video_path, extra_frames, max_width=FRAME_MAX_WIDTH, max_height=FRAME_MAX_HEIGHT)
+    # Each refinement window is tracked on its own: tracking state can't carry across the gaps
+    second = _analyze_frames(
+        frames, second_progress, landmark_ids, timings, engine, run_lengths=contiguous_runs(extra_frames, peak_step),
+    )
+    # The video can end before the last requested frame
+    return merge_samples(first, first_frames, second, extra_frames[:len(second)])
+
+
+def analyze_video(video_path, rep_counter, progress=None, video_hash=None, landmark_ids=None,
+                  signal_landmarks=None, validator=None, engine=None):
+    """
+    Run the full analysis for one video.
+    rep_counter: count_reps or count_benchpress_reps
+    progress: optional callback, called with the number of frames pose-analyzed so far
+    landmark_ids: landmarks to extract; must include every landmark rep_counter reads (None = all)
+    signal_landmarks, validator: the exercise's tracked landmarks and batch validator; together
+    they enable adaptive sampling (when FRAME_ADAPTIVE is on)
+    engine: pose engine to run inference on (default: the shared worker pool)
+    Returns: (pose_data as a PoseSequence, rep_info)
+    """
+    if validator is None:
+        signal_landmarks = None
+    pose_data = extract_pose(
+        video_path, video_hash=video_hash, progress=progress,
+        landmark_ids=landmark_ids, signal_landmarks=signal_landmarks, engine=engine,
+    )
+    with timed("rep_counting"):
+        if pose_data.frame_numbers is not None:
+            # Rep detection expects evenly spaced samples at the usual rate
+            grid_step = sample_step(video_path, FRAME_SAMPLE_FPS) or 1
+            rep_info = count_reps_adaptive(pose_data, rep_counter, signal_landmarks, validator, grid_step)
+        else:
+            rep_info = rep_counter(pose_data)
+    return pose_data, rep_info
@@ -2,25 +2,71 @@
 import mediapipe as mp
 import numpy as np
 
+from app.utils.pose_sequence import PoseSequence, NUM_LANDMARKS, LANDMARK_FIELDS
+
 mp_pose = mp.solutions.pose
 
+# frames: any iterable of BGR frames (e.g. the iter_frames generator), consumed one at a time
 # Returns: list of [ [x, y, z, visibility], ... ] for each landmark in each frame
 # If no pose detected, returns None for that frame
-def analyze_pose(frames):
+# landmark_ids: only keep these landmarks (in this order) in each frame; None keeps all 33
+#
+# static_image_mode=True runs full person detection on every frame.
+# static_image_mode=False (video/tracking mode) detects once and then tracks the landmarks
+# between consecutive frames, only re-running detection when tracking confidence
+# drops below min_tracking_confidence. Frames must then be passed in temporal order.
+def analyze_pose(frames, static_image_mode=True, model_complexity=1,
+                 min_detection_confidence=0.5, min_tracking_confidence=0.5, landmark_ids=None):
+    with create_pose(static_image_mode=static_image_mode,
+                     model_complexity=model_complexity,
+                     min_detection_confidence=min_detection_confidence,
+                     min_tracking_confidence=min_tracking_confidence) as pose:
+        return process_frames(pose, frames, landmark_ids)
+
+# Build a MediaPipe Pose graph; callers that process many videos can keep it warm and reuse it
+def create_pose(static_image_mode=True, model_complexity=1,
+                min_detection_confidence=0.5, min_tracking_confidence=0.5):
+    return mp_pose.Pose(static_image_mode=static_image_mode,
+                        model_complexity=model_complexity,
+                        min_detection_confidence=min_detection_confidence,
+                        min_tracking_confidence=min_tracking_confidence)
+
+# Run an existing Pose graph over frames, same output format as analyze_pose
+def process_frames(pose, frames, landmark_ids=None):
     results = []
-    with mp_pose.Pose(static_image_mode=True) as pose:
-        for frame in frames:
-            frame_rgb = frame[..., ::-1]  # Convert BGR to RGB
-            res = pose.process(frame_rgb)
-            if res.pose_landmarks:
-                landmarks = []
-                for lm in res.pose_landmarks.landmark:
-                    landmarks.append([lm.x, lm.y, lm.z, lm.visibility])
-                results.append(landmarks)
-            else:
-                results.append(None)
+    for frame in frames:
+        frame_rgb = frame[..., ::-1]  # Convert BGR to RGB
+        res = pose.process(frame_rgb)
+        if res.pose_landmarks:
+            all_landmarks = res.pose_landmarks.landmark
+            selected = all_landmarks if landmark_ids is None else [all_landmarks[i] for i in landmark_ids]
+            landmarks = []
+            for lm in selected:
+                landmarks.append([lm.x, lm.y, lm.z, lm.visibility])
+            results.append(landmarks)
+        else:
+            results.append(None)
     return results
 
+# Like process_frames, but writes each frame's landmarks straight into one preallocated float32
+# array and copies only the landmarks in landmark_ids (all 33 when None)
+# Returns: PoseSequence
+def process_frames_to_sequence(pose, frames, landmark_ids=None):
+    frames = list(frames)
+    ids = list(range(NUM_LANDMARKS)) if landmark_ids is None else list(landmark_ids)
+    landmarks = np.full((len(frames), len(ids), LANDMARK_FIELDS), np.nan, dtype=np.float32)
+    valid = np.zeros(len(frames), dtype=bool)
+    for k, frame in enumerate(frames):
+        res = pose.process(frame[..., ::-1])  # BGR to RGB
+        if res.pose_landmarks:
+            all_landmarks = res.pose_landmarks.landmark
+            row = landmarks[k]
+            for col, i in enumerate(ids):
+                lm = all_landmarks[i]
+                row[col] = (lm.x, lm.y, lm.z, lm.visibility)
+            valid[k] = True
+    return PoseSequence(landmarks, valid, landmark_ids)
+
 # Compute angle at joint b given three points a, b, c
 # Each point: [x, y, z]
 def compute_angle(a, b, c):
@@ -0,0 +1,109 @@
+"""
+Content-addressed on-disk cache of pose analysis results.
+Entries are keyed by the SHA-256 of the uploaded video plus every setting that affects the pose
+output (sampling fps, frame size, MediaPipe options), so re-uploading the same clip skips
+decoding and pose inference entirely. Least recently used entries are evicted once the cache
+grows past its size cap.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+
+from app.config import POSE_CACHE_DIR, POSE_CACHE_MAX_MB
+from app.utils.pose_sequence import PoseSequence
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def hash_file(path):
+    """
+    SHA-256 hex digest of a file, read in fixed-size chunks
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def make_cache_key(video_hash, **params):
+    """
+    Combine the video hash with the extraction/model parameters into one cache key
+    """
+    payload = json.dumps({"video": video_hash, **params}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class PoseCache:
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self.max_bytes > 0
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.npz")
+
+    def get(self, key):
+        """
+        Return the cached PoseSequence for key, or None on a miss
+        """
+        if not self.enabled:
+            return None
+        path = self._path(key)
+        try:
+            seq = PoseSequence.load(path)
+        except (FileNotFoundError, OSError, ValueError, KeyError):
+            return None
+        try:
+            os.utime(path)  # mark as recently used for LRU eviction
+        except OSError:
+            pass
+        return seq
+
+    def put(self, key, seq):
+        if not self.enabled:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        # Write to a temp file and rename so readers never see a half-written entry
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                seq.save(f)
+            os.replace(tmp_path, self._path(key))
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self._evict()
+
+    def _evict(self):
+        with self._lock:
+            entries = []
+            for name in os.listdir(self.directory):
+                if not name.endswith(".npz"):
+                    continue
+                path = os.path.join(self.directory, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                    total -= size
+                except OSError:
+                    pass
+
+
+pose_cache = PoseCache(POSE_CACHE_DIR, POSE_CACHE_MAX_MB * 1024 * 1024)
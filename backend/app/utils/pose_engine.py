@@ -0,0 +1,242 @@
+"""
+Process-pool pose inference.
+Each worker process builds one MediaPipe Pose graph when it starts and keeps it warm for every
+chunk it is given, so graph construction is paid once per worker instead of once per upload.
+A video's frames are split into contiguous chunks that run on all workers in parallel and the
+landmarks are merged back in frame order.
+
+In tracking mode a Pose graph carries landmarks over from one frame to the next, so a worker
+is sent consecutive chunks of a video (a segment of segment_chunks chunks) and only resets
+its tracking state when a chunk doesn't follow on from the one it processed last: at the
+start of a segment, of a run of contiguous frames, or after a chunk of another video.
+"""
+
+import itertools
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from app.utils.pose_sequence import PoseSequence
+from app.utils.metrics import POSE_FRAME_SECONDS, FRAMES_PROCESSED
+
+from app.config import (
+    POSE_WORKERS, POSE_CHUNK_SIZE, POSE_SEGMENT_CHUNKS,
+    POSE_TRACKING, POSE_MODEL_COMPLEXITY, POSE_MIN_DETECTION_CONFIDENCE, POSE_MIN_TRACKING_CONFIDENCE,
+)
+
+# Warm Pose graph owned by the current worker process (set by _init_worker)
+_worker_pose = None
+# Chunk the worker's tracking state belongs to (see _process_chunk)
+_worker_last_chunk = None
+
+# Identifies each analyze() call, so chunks of different videos never count as consecutive
+_run_ids = itertools.count()
+
+
+def _init_worker(pose_options):
+    global _worker_pose
+    from app.utils.pose_analysis import create_pose
+    _worker_pose = create_pose(**pose_options)
+
+
+def _process_chunk(frames, landmark_ids=None, chunk_id=None, follows=None):
+    """
+    Pose one chunk in a worker. chunk_id identifies the chunk and follows the chunk whose
+    frames come right before it (None at the start of a run); tracking state is kept only
+    when this worker's previous chunk is exactly that one.
+    """
+    global _worker_last_chunk
+    from app.utils.pose_analysis import process_frames_to_sequence
+    if follows is None or follows != _worker_last_chunk:
+        _worker_pose.reset()
+    _worker_last_chunk = chunk_id
+    start = time.perf_counter()
+    # Ship landmarks back as one compact array (only the requested ones) instead of nested lists,
+    # with the inference time so the server process can record it
+    seq = process_frames_to_sequence(_worker_pose, frames, landmark_ids)
+    return seq, time.perf_counter() - start
+
+
+def iter_chunks(frames, chunk_size, run_lengths=None):
+    """
+    Split frames into chunks of at most chunk_size that never span two runs.
+    run_lengths: lengths of the runs of contiguous frames (None = one run); frames past the
+    last run form one more run
+    Yields: (chunk, starts_run)
+    """
+    frame_iter = iter(frames)
+    for run_length in itertools.chain(run_lengths or [], [None]):
+        remaining = run_length
+        starts_run = True
+        while remaining is None or remaining > 0:
+            size = chunk_size if remaining is None else min(chunk_size, remaining)
+            chunk = list(islice(frame_iter, size))
+            if not chunk:
+                break
+            yield chunk, starts_run
+            starts_run = False
+            if remaining is not None:
+                remaining -= len(chunk)
+        if run_length is not None and remaining:
+            return  # The frames ran out inside this run
+
+
+class PoseEngine:
+    """
+    Pool of worker processes, each holding a warm Pose graph.
+    analyze() accepts any iterable of frames (lists or the iter_frames generator); at most
+    max_in_flight chunks are buffered at once so memory stays bounded for long videos.
+    Every worker has its own single-process executor so a segment's chunks can be sent to
+    the same worker, which processes them in order.
+    """
+
+    def __init__(self, workers=None, chunk_size=16, max_in_flight=None, segment_chunks=4, **pose_options):
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = max(1, chunk_size)
+        self.segment_chunks = max(1, segment_chunks)
+        # Enough chunks in flight for every worker to have a segment queued
+        self.max_in_flight = max_in_flight or self.workers * self.segment_chunks * 2
+        self.pose_options = pose_options
+        # spawn (not fork) so children don't inherit MediaPipe/OpenCV threads from the server process
+        context = multiprocessing.get_context("spawn")
+        self._executors = [
+            ProcessPoolExecutor(max_workers=1, mp_context=context, initializer=_init_worker, initargs=(pose_options,))
+            for _ in range(self.workers)
+        ]
+        self._next_worker = itertools.count()  # Round-robin over workers, shared by concurrent analyze() calls
+
+    def analyze(self, frames, progress=None, landmark_ids=None, run_lengths=None):
+        """
+        Run pose analysis over frames in parallel chunks.
+        progress: optional callback, called with the number of frames merged so far
+        landmark_ids: only materialize these landmarks (None = all 33)
+        run_lengths: lengths of the runs of contiguous frames, when frames jump between
+        separate parts of the video (tracking restarts at each run); None = one run
+        Returns: PoseSequence with one row per frame, in frame order
+        """
+        if landmark_ids is not None:
+            landmark_ids = list(landmark_ids)
+        run_id = next(_run_ids)
+        chunks = []
+        frames_done = 0
+        pending = deque()
+        executor = None
+        previous = None
+        segment_position = 0
+        for index, (chunk, starts_run) in enumerate(iter_chunks(frames, self.chunk_size, run_lengths)):
+            if starts_run or segment_position == self.segment_chunks:
+                # New segment: the next worker in turn, starting from fresh tracking state
+                executor = self._executors[next(self._next_worker) % self.workers]
+                previous = None
+                segment_position = 0
+            chunk_id = (run_id, index)
+            pending.append(executor.submit(_process_chunk, chunk, landmark_ids, chunk_id, previous))
+            previous = chunk_id
+            segment_position += 1
+            if len(pending) >= self.max_in_flight:
+                chunks.append(self._collect(pending.popleft()))
+                frames_done += len(chunks[-1])
+                if progress:
+                    progress(frames_done)
+        while pending:
+            chunks.append(self._collect(pending.popleft()))
+            frames_done += len(chunks[-1])
+            if progress:
+                progress(frames_done)
+        if not chunks:
+            return PoseSequence.empty(landmark_ids=landmark_ids)
+        return PoseSequence.concatenate(chunks)
+
+    @staticmethod
+    def _collect(future):
+        seq, seconds = future.result()
+        if len(seq):
+            POSE_FRAME_SECONDS.observe(seconds / len(seq), count=len(seq))
+            FRAMES_PROCESSED.inc(len(seq))
+        return seq
+
+    def close(self):
+        for executor in self._executors:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+
+class InlinePoseEngine:
+    """
+    Same analyze() interface and output as PoseEngine, run in the calling process on one warm
+    Pose graph. Frames go through in the same chunks and segments, with the tracking state reset
+    where the pool would reset it, so both produce (and can share cache entries for) the same
+    landmarks. Meant for callers that already run one process per core, like the batch runner.
+    """
+
+    def __init__(self, chunk_size=16, segment_chunks=4, **pose_options):
+        from app.utils.pose_analysis import create_pose
+        self.chunk_size = max(1, chunk_size)
+        self.segment_chunks = max(1, segment_chunks)
+        self._pose = create_pose(**pose_options)
+
+    def analyze(self, frames, progress=None, landmark_ids=None, run_lengths=None):
+        from app.utils.pose_analysis import process_frames_to_sequence
+        if landmark_ids is not None:
+            landmark_ids = list(landmark_ids)
+        chunks = []
+        frames_done = 0
+        segment_position = 0
+        for chunk, starts_run in iter_chunks(frames, self.chunk_size, run_lengths):
+            if starts_run or segment_position == self.segment_chunks:
+                self._pose.reset()
+                segment_position = 0
+            segment_position += 1
+            start = time.perf_counter()
+            seq = process_frames_to_sequence(self._pose, chunk, landmark_ids)
+            seconds = time.perf_counter() - start
+            POSE_FRAME_SECONDS.observe(seconds / len(seq), count=len(seq))
+            FRAMES_PROCESSED.inc(len(seq))
+            chunks.append(seq)
+            frames_done += len(seq)
+            if progress:
+                progress(frames_done)
+        if not chunks:
+            return PoseSequence.empty(landmark_ids=landmark_ids)
+        return PoseSequence.concatenate(chunks)
+
+    def close(self):
+        self._pose.close()
+
+
+def pose_options():
+    """MediaPipe options from the configuration, shared by every pose engine"""
+    return {
+        "static_image_mode": not POSE_TRACKING,
+        "model_complexity": POSE_MODEL_COMPLEXITY,
+        "min_detection_confidence": POSE_MIN_DETECTION_CONFIDENCE,
+        "min_tracking_confidence": POSE_MIN_TRACKING_CONFIDENCE,
+    }
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_pose_engine():
+    """
+    Return the shared PoseEngine, creating it (and its worker processes) on first use
+    """
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = PoseEngine(
+                workers=POSE_WORKERS, chunk_size=POSE_CHUNK_SIZE, segment_chunks=POSE_SEGMENT_CHUNKS, **pose_options(),
+            )
+        return _engine
+
+
+def shutdown_pose_engine():
+    global _engine
+    with _engine_lock:
+        if _engine is not None:
+            _engine.close()
+            _engine = None
@@ -0,0 +1,182 @@
+import numpy as np
+
+NUM_LANDMARKS = 33  # MediaPipe Pose landmarks per frame
+LANDMARK_FIELDS = 4  # [x, y, z, visibility]
+
+
+class PoseSequence:
+    """
+    Compact pose data for a whole video.
+    Wraps one contiguous (frames, 33, 4) float32 array of [x, y, z, visibility] plus a boolean
+    `valid` mask that is False for frames where no pose was detected (their rows are NaN).
+
+    It behaves like the nested list returned by analyze_pose, so existing code keeps working:
+    len(seq), seq[i] (a (33, 4) array, or None when no pose was detected) and iteration.
+    Slicing (seq[a:b]) returns another PoseSequence (a view for contiguous slices).
+
+    A sequence can hold only some of the landmarks (e.g. the ones an exercise uses):
+    landmark_ids lists the MediaPipe index of each column, and landmark()/select()/subset()
+    take MediaPipe indices either way. landmark_ids is None when every landmark is present.
+
+    frame_numbers optionally records the source video frame of each row, for sequences that
+    weren't sampled at a fixed rate (see adaptive_sampling.py); None means evenly spaced.
+    """
+
+    def __init__(self, landmarks, valid=None, landmark_ids=None, frame_numbers=None):
+        landmarks = np.ascontiguousarray(landmarks, dtype=np.float32)
+        if landmarks.ndim != 3 or landmarks.shape[2] != LANDMARK_FIELDS:
+            raise ValueError(f"Expected a (frames, landmarks, {LANDMARK_FIELDS}) array, got shape {landmarks.shape}")
+        if valid is None:
+            valid = ~np.isnan(landmarks).all(axis=(1, 2))
+        valid = np.asarray(valid, dtype=bool)
+        if valid.shape != (landmarks.shape[0],):
+            raise ValueError(f"valid mask must have shape ({landmarks.shape[0]},), got {valid.shape}")
+        if landmark_ids is not None:
+            landmark_ids = [int(i) for i in landmark_ids]
+            if len(landmark_ids) != landmarks.shape[1]:
+                raise ValueError(f"Got {len(landmark_ids)} landmark IDs for {landmarks.shape[1]} landmark columns")
+            if landmark_ids == list(range(NUM_LANDMARKS)):
+                landmark_ids = None
+        if frame_numbers is not None:
+            frame_numbers = np.asarray(frame_numbers, dtype=np.int64)
+            if frame_numbers.shape != (landmarks.shape[0],):
+                raise ValueError(f"frame_numbers must have shape ({landmarks.shape[0]},), got {frame_numbers.shape}")
+        self.landmarks = landmarks
+        self.valid = valid
+        self.landmark_ids = landmark_ids
+        self.frame_numbers = frame_numbers
+        self._columns = {landmark_id: col for col, landmark_id in enumerate(self.ids)}
+
+    @classmethod
+    def from_list(cls, pose_data, num_landmarks=NUM_LANDMARKS, landmark_ids=None):
+        """
+        Build from analyze_pose output (list of [[x, y, z, visibility], ...] or None per frame).
+        landmark_ids: MediaPipe index of each landmark in the frames, when analyze_pose was
+        given a subset (num_landmarks is then ignored)
+        """
+        if landmark_ids is not None:
+            num_landmarks = len(landmark_ids)
+        landmarks = np.full((len(pose_data), num_landmarks, LANDMARK_FIELDS), np.nan, dtype=np.float32)
+        valid = np.zeros(len(pose_data), dtype=bool)
+        for i, frame_data in enumerate(pose_data):
+            if frame_data is not None and len(frame_data) == num_landmarks:
+                landmarks[i] = frame_data
+                valid[i] = True
+        return cls(landmarks, valid, landmark_ids)
+
+    @classmethod
+    def concatenate(cls, sequences):
+        sequences = list(sequences)
+        if not sequences:
+            return cls.empty()
+        landmark_ids = sequences[0].landmark_ids
+        if any(seq.landmark_ids != landmark_ids for seq in sequences):
+            raise ValueError("Cannot concatenate sequences holding different landmarks")
+        frame_numbers = None
+        if all(seq.frame_numbers is not None for seq in sequences):
+            frame_numbers = np.concatenate([seq.frame_numbers for seq in sequences])
+        return cls(
+            np.concatenate([seq.landmarks for seq in sequences]),
+            np.concatenate([seq.valid for seq in sequences]),
+            landmark_ids,
+            frame_numbers,
+        )
+
+    @classmethod
+    def empty(cls, num_landmarks=NUM_LANDMARKS, landmark_ids=None):
+        if landmark_ids is not None:
+            num_landmarks = len(landmark_ids)
+        return cls(
+            np.empty((0, num_landmarks, LANDMARK_FIELDS), dtype=np.float32),
+            np.empty(0, dtype=bool),
+            landmark_ids,
+        )
+
+    @classmethod
+    def load(cls, file):
+        """
+        Load a sequence written by save() (path or file object)
+        """
+        with np.load(file) as data:
+            landmark_ids = data["landmark_ids"] if "landmark_ids" in data.files else None
+            frame_numbers = data["frame_numbers"] if "frame_numbers" in data.files else None
+            return cls(data["landmarks"], data["valid"], landmark_ids, frame_numbers)
+
+    def save(self, file):
+        """
+        Write the sequence as an uncompressed .npz (path or file object)
+        """
+        arrays = {"landmarks": self.landmarks, "valid": self.valid}
+        if self.landmark_ids is not None:
+            arrays["landmark_ids"] = np.asarray(self.landmark_ids, dtype=np.int16)
+        if self.frame_numbers is not None:
+            arrays["frame_numbers"] = self.frame_numbers
+        np.savez(file, **arrays)
+
+    def to_list(self):
+        """
+        Convert back to the analyze_pose format (for JSON responses)
+        """
+        frames = self.landmarks.tolist()
+        return [frame if is_valid else None for frame, is_valid in zip(frames, self.valid.tolist())]
+
+    @property
+    def ids(self):
+        """MediaPipe index of each landmark column"""
+        if self.landmark_ids is None:
+            return list(range(self.landmarks.shape[1]))
+        return list(self.landmark_ids)
+
+    def has_landmarks(self, indices):
+        return all(index in self._columns for index in indices)
+
+    def _column(self, index):
+        try:
+            return self._columns[index]
+        except KeyError:
+            raise KeyError(f"Landmark {index} was not extracted (sequence holds {self.ids})") from None
+
+    def landmark(self, index):
+        """
+        (frames, 4) view of one landmark across every frame (NaN where no pose was detected)
+        """
+        return self.landmarks[:, self._column(index), :]
+
+    def select(self, indices):
+        """
+        (frames, len(indices), 4) array with only the given landmarks
+        """
+        return self.landmarks[:, [self._column(index) for index in indices], :]
+
+    def subset(self, indices):
+        """
+        New PoseSequence holding only the given landmarks
+        """
+        return PoseSequence(self.select(indices), self.valid, indices, self.frame_numbers)
+
+    @property
+    def valid_indices(self):
+        return np.flatnonzero(self.valid)
+
+    @property
+    def nbytes(self):
+        extra = self.frame_numbers.nbytes if self.frame_numbers is not None else 0
+        return self.landmarks.nbytes + self.valid.nbytes + extra
+
+    def __len__(self):
+        return self.landmarks.shape[0]
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            frame_numbers = self.frame_numbers[index] if self.frame_numbers is not None else None
+            return PoseSequence(self.landmarks[index], self.valid[index], self.landmark_ids, frame_numbers)
+        if not self.valid[index]:
+            return None
+        return self.landmarks[index]
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def __repr__(self):
+        return f"PoseSequence(frames={len(self)}, valid={int(self.valid.sum())}, landmarks={self.landmarks.shape[1]})"
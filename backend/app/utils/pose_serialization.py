@@ -0,0 +1,102 @@
+"""
+Response encodings for pose data.
+The full nested-float pose_data (33 landmarks x 4 values x every frame) dominates the upload
+response, so clients pick how much of it they want:
+
+- "full":      analyze_pose-style nested lists of all 33 landmarks (default)
+- "none":      omitted; fetch it later from GET /{exercise}/pose/{pose_id} if needed
+- "subset":    nested lists of only the landmarks the exercise uses
+- "quantized": integers in units of 1/QUANTIZE_SCALE (about 3 significant digits), None for missing frames
+- "binary":    base64 little-endian float16 array plus a base64 bit-packed validity mask
+
+Only "full" needs every landmark; for the other formats the pipeline extracts just the
+exercise's landmarks, and the encodings list which ones they hold in landmark_ids.
+
+The dict encodings also carry frame_numbers: the source video frame of each row when the
+video was sampled adaptively (rows unevenly spaced), None when rows are evenly spaced.
+"full" is a bare list, so responses report the same value next to it (see pose_frame_numbers).
+"""
+
+import base64
+
+import numpy as np
+
+from app.utils.pose_sequence import PoseSequence
+
+POSE_FORMATS = ("full", "none", "subset", "quantized", "binary")
+QUANTIZE_SCALE = 1000
+
+
+def pose_frame_numbers(pose_data):
+    """
+    Source video frame of each row of pose_data, for JSON responses
+    Returns: list of ints, or None when the rows are evenly spaced (not adaptively sampled)
+    """
+    frame_numbers = getattr(pose_data, "frame_numbers", None)
+    return frame_numbers.tolist() if frame_numbers is not None else None
+
+
+def serialize_pose_data(pose_data, pose_format="full", landmark_ids=None):
+    """
+    Encode a PoseSequence for a JSON response.
+    Callers time this together with rendering the response body as the "serialization" stage.
+    landmark_ids: landmarks kept by the "subset" format
+    Returns: list (full), None (none) or a dict describing the encoding
+    """
+    if pose_format not in POSE_FORMATS:
+        raise ValueError(f"Unknown pose format '{pose_format}', expected one of {', '.join(POSE_FORMATS)}")
+    if not isinstance(pose_data, PoseSequence):
+        pose_data = PoseSequence.from_list(pose_data)
+
+    if pose_format == "none":
+        return None
+    if pose_format == "full":
+        return pose_data.to_list()
+
+    all_ids = pose_data.ids
+    if pose_format == "subset":
+        ids = list(landmark_ids) if landmark_ids is not None else all_ids
+        subset = pose_data.select(ids)
+        frames = subset.tolist()
+        return {
+            "format": "subset",
+            "landmark_ids": ids,
+            "frame_numbers": pose_frame_numbers(pose_data),
+            "frames": [frame if is_valid else None for frame, is_valid in zip(frames, pose_data.valid.tolist())],
+        }
+
+    if pose_format == "quantized":
+        quantized = np.rint(np.nan_to_num(pose_data.landmarks) * QUANTIZE_SCALE).astype(np.int32)
+        frames = quantized.tolist()
+        return {
+            "format": "quantized",
+            "scale": QUANTIZE_SCALE,
+            "landmark_ids": all_ids,
+            "frame_numbers": pose_frame_numbers(pose_data),
+            "frames": [frame if is_valid else None for frame, is_valid in zip(frames, pose_data.valid.tolist())],
+        }
+
+    # binary
+    data = pose_data.landmarks.astype("<f2")
+    return {
+        "format": "binary",
+        "dtype": "float16",
+        "shape": list(data.shape),
+        "landmark_ids": all_ids,
+        "frame_numbers": pose_frame_numbers(pose_data),
+        "data": base64.b64encode(data.tobytes()).decode("ascii"),
+        "valid": base64.b64encode(np.packbits(pose_data.valid, bitorder="little").tobytes()).decode("ascii"),
+    }
+
+
+def decode_binary_pose_data(payload):
+    """
+    Inverse of the "binary" format (useful for Python clients and debugging)
+    Returns: PoseSequence
+    """
+    shape = tuple(payload["shape"])
+    data = np.frombuffer(base64.b64decode(payload["data"]), dtype="<f2").reshape(shape)
+    valid = np.unpackbits(
+        np.frombuffer(base64.b64decode(payload["valid"]), dtype=np.uint8), count=shape[0], bitorder="little"
+    ).astype(bool)
+    return PoseSequence(data.astype(np.float32), valid, payload.get("landmark_ids"), payload.get("frame_numbers"))
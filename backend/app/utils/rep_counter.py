@@ -1,9 +1,29 @@
+import logging
+from collections import deque
+
 import numpy as np
+from app.utils.pose_sequence import PoseSequence, NUM_LANDMARKS
+from app.utils.metrics import timed
+
+logger = logging.getLogger(__name__)
+
+# Landmarks each exercise actually reads (rep tracking + validation)
+SQUAT_LANDMARKS = [0, 11, 12, 23, 24, 25, 26]  # nose, shoulders, hips, knees
+BENCHPRESS_LANDMARKS = [11, 12, 15, 16]  # shoulders, wrists
+
+# Landmarks whose average y-coordinate each rep detector tracks
+SQUAT_SIGNAL_LANDMARKS = [0]  # nose
+BENCHPRESS_SIGNAL_LANDMARKS = [15, 16]  # wrists
+
+# Minimum frame-to-frame movement of the smoothed tracked y-coordinate that counts as moving down/up
+SQUAT_MOVEMENT_THRESHOLD = 0.02
+BENCHPRESS_MOVEMENT_THRESHOLD = 0.01  # reduced from 0.015 for better sensitivity
 
 def count_reps(pose_data):
     """
     Count reps by tracking head position (high->low->high = 1 rep)
     Also validates squat depth by checking if hips go at or below knee level
+    pose_data: analyze_pose output (list) or a PoseSequence
     Returns: dict with rep_count and reps_data (list of frame indices and depth validation for each rep)
     """
     if not pose_data:
@@ -12,96 +32,52 @@ def count_reps(pose_data):
     # MediaPipe pose landmark 0 is the nose (head position)
     # Landmark 23 = left hip, 24 = right hip
     # Landmark 25 = left knee, 26 = right knee
-    head_y_positions = []
-    valid_frame_indices = []
-    
-    for i, frame_data in enumerate(pose_data):
-        if frame_data is not None and len(frame_data) > 0:
-            # Get nose landmark (index 0) y-coordinate
-            head_y = frame_data[0][1]  # [x, y, z, visibility]
-            head_y_positions.append(head_y)
-            valid_frame_indices.append(i)
+    if isinstance(pose_data, PoseSequence):
+        # Pull the nose y-coordinate for every detected frame in one slice
+        head_y_positions = pose_data.landmark(0)[pose_data.valid, 1]
+        valid_frame_indices = pose_data.valid_indices.tolist()
+    else:
+        head_y_positions = []
+        valid_frame_indices = []
+        
+        for i, frame_data in enumerate(pose_data):
+            if frame_data is not None and len(frame_data) > 0:
+                # Get nose landmark (index 0) y-coordinate
+                head_y = frame_data[0][1]  # [x, y, z, visibility]
+                head_y_positions.append(head_y)
+                valid_frame_indices.append(i)
     
     if len(head_y_positions) < 3:
         return {"rep_count": 0, "reps_data": []}
     
-    # Smooth the data to reduce noise
-    window_size = 3
-    smoothed_positions = np.convolve(head_y_positions, np.ones(window_size)/window_size, mode='valid')
-    
-    # Detect peaks (high points) - y increases downward in image coordinates
-    # So high point (standing) = lower y value, low point (squat) = higher y value
+    # Find high -> low -> high cycles (thresholded head movement, see detect_rep_cycles)
+    threshold = SQUAT_MOVEMENT_THRESHOLD
     reps = []
-    state = "unknown"  # Can be: "high", "low", "unknown"
-    current_rep_start = None
-    rep_start_frame = None
-    rep_low_frames = []  # Track all frames during the "low" phase
     
-    threshold = 0.02  # Minimum movement threshold
+    cycles = detect_rep_cycles(head_y_positions, valid_frame_indices, threshold)
     
-    for i in range(1, len(smoothed_positions) - 1):
-        # Adjust index for valid frames
-        actual_index = valid_frame_indices[i + (window_size // 2)]
-        
-        # Detect state transitions
-        if state == "unknown":
-            # Initialize state
-            if smoothed_positions[i] < np.mean(smoothed_positions):
-                state = "high"
-                rep_start_frame = actual_index
-        
-        elif state == "high":
-            # Check if we're moving down (y increasing)
-            if smoothed_positions[i] > smoothed_positions[i-1] + threshold:
-                # Transitioning to low
-                state = "low"
-                rep_low_frames = [actual_index]
+    # Validate every rep at its lowest point in one batch
+    validations = validation_rows(validate_squat_depth_batch(pose_data, [lowest for _, _, lowest in cycles]))
+    
+    for (rep_start_frame, rep_end, lowest_point_frame), depth_validation in zip(cycles, validations):
         
-        elif state == "low":
-            # Track all frames in the low position
-            rep_low_frames.append(actual_index)
-            
-            # Check if we're moving up (y decreasing)
-            if smoothed_positions[i] < smoothed_positions[i-1] - threshold:
-                # Transitioning back to high - rep complete!
-                state = "high"
-                rep_end = actual_index
-                
-                if rep_start_frame is not None and len(rep_low_frames) > 0:
-                    # Find the actual lowest point by checking head position in all low frames
-                    lowest_point_frame = rep_low_frames[0]
-                    max_head_y = -float('inf')
-                    
-                    for frame_idx in rep_low_frames:
-                        if pose_data[frame_idx] is not None and len(pose_data[frame_idx]) > 0:
-                            head_y = pose_data[frame_idx][0][1]
-                            if head_y > max_head_y:
-                                max_head_y = head_y
-                                lowest_point_frame = frame_idx
-                    
-                    # Validate depth at the lowest point
-                    depth_validation = validate_squat_depth(pose_data, lowest_point_frame)
-                    
-                    reps.append({
-                        "rep_number": len(reps) + 1,
-                        "start_frame": rep_start_frame,
-                        "end_frame": rep_end,
-                        "lowest_point_frame": lowest_point_frame,
-                        "validation_status": depth_validation["validation_status"],
-                        "depth_valid": depth_validation["depth_valid"],
-                        "knee_width_valid": depth_validation["knee_width_valid"],
-                        "hip_height": depth_validation["hip_height"],
-                        "knee_height": depth_validation["knee_height"],
-                        "depth_difference": depth_validation["depth_difference"],
-                        "knee_width": depth_validation["knee_width"],
-                        "shoulder_width": depth_validation["shoulder_width"],
-                        "width_difference": depth_validation["width_difference"],
-                        "depth_missed_by": depth_validation["depth_missed_by"],
-                        "width_missed_by": depth_validation["width_missed_by"]
-                    })
-                
-                rep_start_frame = rep_end
-                rep_low_frames = []
+        reps.append({
+            "rep_number": len(reps) + 1,
+            "start_frame": rep_start_frame,
+            "end_frame": rep_end,
+            "lowest_point_frame": lowest_point_frame,
+            "validation_status": depth_validation["validation_status"],
+            "depth_valid": depth_validation["depth_valid"],
+            "knee_width_valid": depth_validation["knee_width_valid"],
+            "hip_height": depth_validation["hip_height"],
+            "knee_height": depth_validation["knee_height"],
+            "depth_difference": depth_validation["depth_difference"],
+            "knee_width": depth_validation["knee_width"],
+            "shoulder_width": depth_validation["shoulder_width"],
+            "width_difference": depth_validation["width_difference"],
+            "depth_missed_by": depth_validation["depth_missed_by"],
+            "width_missed_by": depth_validation["width_missed_by"]
+        })
     
     return {
         "rep_count": len(reps),
@@ -109,6 +85,74 @@ def count_reps(pose_data):
     }
 
 
+def detect_rep_cycles(positions, frame_indices, threshold, window_size=3):
+    """
+    Find high -> low -> high cycles in a tracked y-coordinate signal using array operations.
+    positions: y-coordinate per detected frame (y increases downward, so a rep is a rise then a fall in y)
+    frame_indices: original frame index of each position
+    threshold: minimum frame-to-frame movement of the smoothed signal that counts as moving down/up
+    Returns: list of (start_frame, end_frame, lowest_point_frame) tuples, one per completed rep
+
+    Equivalent to the original per-frame state machine:
+    - start in "high" at the first frame whose smoothed position is above the mean (y below the mean)
+    - a step down by more than threshold enters "low", a step up by more than threshold completes the rep
+    - the lowest point is the frame with the largest raw y between those two steps
+    - each rep starts where the previous one ended
+    """
+    positions = np.asarray(positions, dtype=float)
+    if len(positions) < 3:
+        return []
+    
+    # Smooth the data to reduce noise
+    smoothed = np.convolve(positions, np.ones(window_size)/window_size, mode='valid')
+    offset = window_size // 2  # smoothed[i] is centred on positions[i + offset]
+    
+    # Steps are only checked for i in [1, len(smoothed) - 2], like the original loop
+    steps = np.arange(1, len(smoothed) - 1)
+    if len(steps) == 0:
+        return []
+    
+    # Initial "high" state: first frame above the mean position
+    below_mean = np.flatnonzero(smoothed[steps] < np.mean(smoothed))
+    if len(below_mean) == 0:
+        return []
+    first_high = steps[below_mean[0]]
+    
+    # Direction events after that frame: moving down (y increasing) or up (y decreasing)
+    steps = steps[steps > first_high]
+    moving_down = smoothed[steps] > smoothed[steps - 1] + threshold
+    moving_up = smoothed[steps] < smoothed[steps - 1] - threshold
+    event_steps = steps[moving_down | moving_up]
+    event_is_down = moving_down[moving_down | moving_up]
+    
+    # Only the first event of each run of same-direction events changes state
+    # (extra "down" steps while already low and "up" steps while already high are ignored)
+    run_starts = np.ones(len(event_steps), dtype=bool)
+    run_starts[1:] = event_is_down[1:] != event_is_down[:-1]
+    event_steps = event_steps[run_starts]
+    event_is_down = event_is_down[run_starts]
+    
+    # The signal starts "high", so a leading "up" run does nothing
+    if len(event_is_down) > 0 and not event_is_down[0]:
+        event_steps = event_steps[1:]
+    
+    # Remaining events alternate down, up, down, up, ... -> pair them into reps
+    down_steps = event_steps[0::2]
+    up_steps = event_steps[1::2]
+    down_steps = down_steps[:len(up_steps)]  # a trailing "down" without an "up" is an incomplete rep
+    
+    cycles = []
+    start_frame = frame_indices[first_high + offset]
+    for down_step, up_step in zip(down_steps, up_steps):
+        # Lowest point: largest raw y among the frames of the low phase
+        low_positions = positions[down_step + offset:up_step + offset + 1]
+        lowest_point_frame = frame_indices[down_step + offset + int(np.argmax(low_positions))]
+        end_frame = frame_indices[up_step + offset]
+        cycles.append((start_frame, end_frame, lowest_point_frame))
+        start_frame = end_frame
+    return cycles
+
+
 def validate_squat_depth(pose_data, frame_index):
     """
     Validate squat at the lowest point:
@@ -116,9 +160,13 @@ def validate_squat_depth(pose_data, frame_index):
     - Knee width: knees should be at least shoulder-width apart
     Returns: dict with validation results including 'valid', 'partially_valid', or 'invalid'
     """
+    if isinstance(pose_data, PoseSequence):
+        # Sequences may hold only a subset of landmarks; the batch path maps them by MediaPipe index
+        return validation_rows(validate_squat_depth_batch(pose_data, [frame_index]))[0]
+    
     # Safety check for frame_index
     if frame_index >= len(pose_data) or frame_index < 0:
-        print(f"WARNING: frame_index {frame_index} out of bounds (pose_data length: {len(pose_data)})")
+        logger.warning("frame_index %s out of bounds (pose_data length: %d)", frame_index, len(pose_data))
         return {
             "validation_status": "invalid",
             "depth_valid": False,
@@ -136,7 +184,7 @@ def validate_squat_depth(pose_data, frame_index):
     frame_data = pose_data[frame_index]
     
     if frame_data is None:
-        print(f"WARNING: frame_data is None at frame {frame_index}")
+        logger.warning("frame_data is None at frame %s", frame_index)
         return {
             "validation_status": "invalid",
             "depth_valid": False,
@@ -152,7 +200,7 @@ def validate_squat_depth(pose_data, frame_index):
         }
     
     if len(frame_data) < 27:
-        print(f"WARNING: frame_data has only {len(frame_data)} landmarks at frame {frame_index}, need at least 27")
+        logger.warning("frame_data has only %d landmarks at frame %s, need at least 27", len(frame_data), frame_index)
         return {
             "validation_status": "invalid",
             "depth_valid": False,
@@ -197,7 +245,7 @@ def validate_squat_depth(pose_data, frame_index):
     # Example: hip_y=0.8189, knee_y=0.8815 means hips are ABOVE knees (BAD - not deep enough)
     #          hip_y=0.9000, knee_y=0.8815 means hips are BELOW knees (GOOD - proper depth)
     depth_difference = avg_hip_height - avg_knee_height
-    depth_valid = depth_difference >= 0  # Positive means hips went at or below knees (good depth)
+    depth_valid = bool(depth_difference >= 0)  # Positive means hips went at or below knees (good depth)
     
     # Knee width should be at least shoulder width (with 10% tolerance)
     # Allow knees to be up to 10% narrower than shoulders and still be valid
@@ -205,7 +253,7 @@ def validate_squat_depth(pose_data, frame_index):
     tolerance = 0.10  # 10% tolerance
     min_required_knee_width = shoulder_width * (1 - tolerance)
     width_difference = knee_width - shoulder_width
-    knee_width_valid = knee_width >= min_required_knee_width
+    knee_width_valid = bool(knee_width >= min_required_knee_width)
     
     # Calculate how much was missed if invalid
     depth_missed_by = abs(depth_difference) if not depth_valid else 0
@@ -234,10 +282,114 @@ def validate_squat_depth(pose_data, frame_index):
     }
 
 
+def _gather_frames(pose_data, frame_indices, required_landmarks):
+    """
+    Collect the landmarks of the requested frames into one (n, 33, 4) float64 array indexed by
+    MediaPipe landmark (landmarks a subset PoseSequence doesn't hold are NaN).
+    Returns: (frames, ok) where ok is False for frames that are out of bounds, have no pose,
+    or lack any of required_landmarks (their rows are NaN)
+    """
+    frame_indices = np.asarray(frame_indices, dtype=int).reshape(-1)
+    n = len(frame_indices)
+    in_bounds = (frame_indices >= 0) & (frame_indices < len(pose_data))
+    
+    if isinstance(pose_data, PoseSequence):
+        safe_indices = np.where(in_bounds, frame_indices, 0)
+        frames = np.full((n, NUM_LANDMARKS, 4), np.nan)
+        if len(pose_data) > 0:
+            frames[:, pose_data.ids] = pose_data.landmarks[safe_indices]
+            ok = in_bounds & pose_data.valid[safe_indices] & pose_data.has_landmarks(required_landmarks)
+        else:
+            ok = np.zeros(n, dtype=bool)
+    else:
+        frames = np.full((n, 33, 4), np.nan)
+        ok = np.zeros(n, dtype=bool)
+        for k, frame_index in enumerate(frame_indices):
+            if in_bounds[k]:
+                frame_data = pose_data[frame_index]
+                if frame_data is not None and len(frame_data) > max(required_landmarks):
+                    landmarks = np.asarray(frame_data, dtype=np.float64)[:33]
+                    frames[k, :len(landmarks)] = landmarks
+                    ok[k] = True
+    
+    for k in np.flatnonzero(~ok):
+        logger.warning("no usable pose data at frame %s (pose_data length: %d)", frame_indices[k], len(pose_data))
+    
+    frames[~ok] = np.nan
+    return frames, ok
+
+
+def validation_rows(columns):
+    """
+    Turn columnar batch-validator output into per-rep dicts
+    (same shape as validate_squat_depth / validate_benchpress_depth results; NaN becomes None)
+    """
+    names = [name for name in columns if name != "frame_index"]
+    lists = {name: columns[name].tolist() for name in names}
+    rows = []
+    for k in range(len(columns["frame_index"])):
+        row = {}
+        for name in names:
+            value = lists[name][k]
+            row[name] = None if isinstance(value, float) and value != value else value
+        rows.append(row)
+    return rows
+
+
+@timed("validation")
+def validate_squat_depth_batch(pose_data, frame_indices):
+    """
+    Validate many squat reps at once (same rules as validate_squat_depth).
+    pose_data: PoseSequence or analyze_pose output; frame_indices: lowest-point frame of each rep
+    Returns: dict of NumPy arrays, one entry per frame index (columnar);
+    metrics are NaN and the flags False where the frame has no usable pose
+    """
+    frames, ok = _gather_frames(pose_data, frame_indices, required_landmarks=[11, 12, 23, 24, 25, 26])
+    
+    avg_hip_height = (frames[:, 23, 1] + frames[:, 24, 1]) / 2
+    avg_knee_height = (frames[:, 25, 1] + frames[:, 26, 1]) / 2
+    knee_width = np.abs(frames[:, 25, 0] - frames[:, 26, 0])
+    shoulder_width = np.abs(frames[:, 11, 0] - frames[:, 12, 0])
+    
+    # Hips at or below knees (larger y = lower in the image)
+    depth_difference = avg_hip_height - avg_knee_height
+    depth_valid = ok & (depth_difference >= 0)
+    
+    # Knees at least shoulder width, with 10% tolerance
+    tolerance = 0.10
+    min_required_knee_width = shoulder_width * (1 - tolerance)
+    width_difference = knee_width - shoulder_width
+    knee_width_valid = ok & (knee_width >= min_required_knee_width)
+    
+    depth_missed_by = np.where(depth_valid, 0.0, np.abs(depth_difference))
+    width_missed_by = np.where(knee_width_valid, 0.0, np.abs(knee_width - min_required_knee_width))
+    
+    validation_status = np.where(
+        depth_valid & knee_width_valid, "valid",
+        np.where(depth_valid | knee_width_valid, "partially_valid", "invalid"),
+    )
+    
+    return {
+        "frame_index": np.asarray(frame_indices, dtype=int).reshape(-1),
+        "validation_status": validation_status,
+        "depth_valid": depth_valid,
+        "knee_width_valid": knee_width_valid,
+        "hip_height": avg_hip_height,
+        "knee_height": avg_knee_height,
+        "depth_difference": depth_difference,
+        "knee_width": knee_width,
+        "shoulder_width": shoulder_width,
+        "width_difference": width_difference,
+        "depth_missed_by": depth_missed_by,
+        "width_missed_by": width_missed_by
+    }
+
+
 def count_benchpress_reps(pose_data):
     """
     Count bench press reps by tracking wrist position (high->low->high = 1 rep)
     Also validates bench press depth by checking if wrists go down to at least 10% of chest height
+    pose_data: analyze_pose output (list) or a PoseSequence
     Returns: dict with rep_count and reps_data (list of frame indices and depth validation for each rep)
     """
     if not pose_data:
@@ -246,94 +398,50 @@ def count_benchpress_reps(pose_data):
     # MediaPipe pose landmarks:
     # Landmark 15 = left wrist, 16 = right wrist
     # We'll track the average wrist height
-    wrist_y_positions = []
-    valid_frame_indices = []
-    
-    for i, frame_data in enumerate(pose_data):
-        if frame_data is not None and len(frame_data) > 16:
-            # Get wrist landmarks (15 = left wrist, 16 = right wrist)
-            left_wrist_y = frame_data[15][1]  # [x, y, z, visibility]
-            right_wrist_y = frame_data[16][1]
-            avg_wrist_y = (left_wrist_y + right_wrist_y) / 2
-            wrist_y_positions.append(avg_wrist_y)
-            valid_frame_indices.append(i)
+    if isinstance(pose_data, PoseSequence):
+        # Average wrist y-coordinate for every detected frame in one pass
+        wrists_y = pose_data.select([15, 16])[pose_data.valid, :, 1]
+        wrist_y_positions = (wrists_y[:, 0] + wrists_y[:, 1]) / 2
+        valid_frame_indices = pose_data.valid_indices.tolist()
+    else:
+        wrist_y_positions = []
+        valid_frame_indices = []
+        
+        for i, frame_data in enumerate(pose_data):
+            if frame_data is not None and len(frame_data) > 16:
+                # Get wrist landmarks (15 = left wrist, 16 = right wrist)
+                left_wrist_y = frame_data[15][1]  # [x, y, z, visibility]
+                right_wrist_y = frame_data[16][1]
+                avg_wrist_y = (left_wrist_y + right_wrist_y) / 2
+                wrist_y_positions.append(avg_wrist_y)
+                valid_frame_indices.append(i)
     
     if len(wrist_y_positions) < 3:
         return {"rep_count": 0, "reps_data": []}
     
-    # Smooth the data to reduce noise
-    window_size = 3
-    smoothed_positions = np.convolve(wrist_y_positions, np.ones(window_size)/window_size, mode='valid')
-    
-    # Detect peaks (high points) - y increases downward in image coordinates
-    # So high point (arms extended) = lower y value, low point (bar at chest) = higher y value
+    # Find high -> low -> high cycles (thresholded wrist movement, see detect_rep_cycles)
+    threshold = BENCHPRESS_MOVEMENT_THRESHOLD
     reps = []
-    state = "unknown"  # Can be: "high", "low", "unknown"
-    rep_start_frame = None
-    rep_low_frames = []  # Track all frames during the "low" phase
     
-    threshold = 0.01  # Minimum movement threshold (reduced from 0.015 for better sensitivity)
+    cycles = detect_rep_cycles(wrist_y_positions, valid_frame_indices, threshold)
     
-    for i in range(1, len(smoothed_positions) - 1):
-        # Adjust index for valid frames
-        actual_index = valid_frame_indices[i + (window_size // 2)]
-        
-        # Detect state transitions
-        if state == "unknown":
-            # Initialize state
-            if smoothed_positions[i] < np.mean(smoothed_positions):
-                state = "high"
-                rep_start_frame = actual_index
-        
-        elif state == "high":
-            # Check if we're moving down (y increasing - bar going down to chest)
-            if smoothed_positions[i] > smoothed_positions[i-1] + threshold:
-                # Transitioning to low
-                state = "low"
-                rep_low_frames = [actual_index]
+    # Validate every rep at its lowest point in one batch
+    validations = validation_rows(validate_benchpress_depth_batch(pose_data, [lowest for _, _, lowest in cycles]))
+    
+    for (rep_start_frame, rep_end, lowest_point_frame), depth_validation in zip(cycles, validations):
         
-        elif state == "low":
-            # Track all frames in the low position
-            rep_low_frames.append(actual_index)
-            
-            # Check if we're moving up (y decreasing - pressing bar up)
-            if smoothed_positions[i] < smoothed_positions[i-1] - threshold:
-                # Transitioning back to high - rep complete!
-                state = "high"
-                rep_end = actual_index
-                
-                if rep_start_frame is not None and len(rep_low_frames) > 0:
-                    # Find the actual lowest point by checking wrist position in all low frames
-                    lowest_point_frame = rep_low_frames[0]
-                    max_wrist_y = -float('inf')
-                    
-                    for frame_idx in rep_low_frames:
-                        if pose_data[frame_idx] is not None and len(pose_data[frame_idx]) > 16:
-                            left_wrist_y = pose_data[frame_idx][15][1]
-                            right_wrist_y = pose_data[frame_idx][16][1]
-                            avg_wrist_y = (left_wrist_y + right_wrist_y) / 2
-                            if avg_wrist_y > max_wrist_y:
-                                max_wrist_y = avg_wrist_y
-                                lowest_point_frame = frame_idx
-                    
-                    # Validate depth at the lowest point
-                    depth_validation = validate_benchpress_depth(pose_data, lowest_point_frame)
-                    
-                    reps.append({
-                        "rep_number": len(reps) + 1,
-                        "start_frame": rep_start_frame,
-                        "end_frame": rep_end,
-                        "lowest_point_frame": lowest_point_frame,
-                        "validation_status": depth_validation["validation_status"],
-                        "depth_valid": depth_validation["depth_valid"],
-                        "wrist_height": depth_validation["wrist_height"],
-                        "chest_height": depth_validation["chest_height"],
-                        "depth_percentage": depth_validation["depth_percentage"],
-                        "depth_missed_by": depth_validation["depth_missed_by"]
-                    })
-                
-                rep_start_frame = rep_end
-                rep_low_frames = []
+        reps.append({
+            "rep_number": len(reps) + 1,
+            "start_frame": rep_start_frame,
+            "end_frame": rep_end,
+            "lowest_point_frame": lowest_point_frame,
+            "validation_status": depth_validation["validation_status"],
+            "depth_valid": depth_validation["depth_valid"],
+            "wrist_height": depth_validation["wrist_height"],
+            "chest_height": depth_validation["chest_height"],
+            "depth_percentage": depth_validation["depth_percentage"],
+            "depth_missed_by": depth_validation["depth_missed_by"]
+        })
     
     return {
         "rep_count": len(reps),
@@ -347,9 +455,13 @@ def validate_benchpress_depth(pose_data, frame_index):
     - Depth: wrists should be at least 10% the height of the chest (wrist_y >= chest_y * 1.1 in image coords)
     Returns: dict with validation results including 'valid' or 'invalid'
     """
+    if isinstance(pose_data, PoseSequence):
+        # Sequences may hold only a subset of landmarks; the batch path maps them by MediaPipe index
+        return validation_rows(validate_benchpress_depth_batch(pose_data, [frame_index]))[0]
+    
     # Safety check for frame_index
     if frame_index >= len(pose_data) or frame_index < 0:
-        print(f"WARNING: frame_index {frame_index} out of bounds (pose_data length: {len(pose_data)})")
+        logger.warning("frame_index %s out of bounds (pose_data length: %d)", frame_index, len(pose_data))
         return {
             "validation_status": "invalid",
             "depth_valid": False,
@@ -362,7 +474,7 @@ def validate_benchpress_depth(pose_data, frame_index):
     frame_data = pose_data[frame_index]
     
     if frame_data is None:
-        print(f"WARNING: frame_data is None at frame {frame_index}")
+        logger.warning("frame_data is None at frame %s", frame_index)
         return {
             "validation_status": "invalid",
             "depth_valid": False,
@@ -373,7 +485,7 @@ def validate_benchpress_depth(pose_data, frame_index):
         }
     
     if len(frame_data) < 17:
-        print(f"WARNING: frame_data has only {len(frame_data)} landmarks at frame {frame_index}, need at least 17")
+        logger.warning("frame_data has only %d landmarks at frame %s, need at least 17", len(frame_data), frame_index)
         return {
             "validation_status": "invalid",
             "depth_valid": False,
@@ -398,7 +510,7 @@ def validate_benchpress_depth(pose_data, frame_index):
     # This means wrist_y can be as low as chest_y * 0.95 (5% above in image coords = smaller y value)
     
     required_wrist_height = avg_chest_height * 0.95
-    depth_valid = avg_wrist_height >= required_wrist_height
+    depth_valid = bool(avg_wrist_height >= required_wrist_height)
     
     # Calculate depth percentage (how far down the wrists went relative to chest)
     if avg_chest_height > 0:
@@ -420,3 +532,214 @@ def validate_benchpress_depth(pose_data, frame_index):
         "depth_percentage": float(depth_percentage),
         "depth_missed_by": float(depth_missed_by)
     }
+
+
+@timed("validation")
+def validate_benchpress_depth_batch(pose_data, frame_indices):
+    """
+    Validate many bench press reps at once (same rules as validate_benchpress_depth).
+    pose_data: PoseSequence or analyze_pose output; frame_indices: lowest-point frame of each rep
+    Returns: dict of NumPy arrays, one entry per frame index (columnar);
+    metrics are NaN and the flags False where the frame has no usable pose
+    """
+    frames, ok = _gather_frames(pose_data, frame_indices, required_landmarks=[11, 12, 15, 16])
+    
+    avg_wrist_height = (frames[:, 15, 1] + frames[:, 16, 1]) / 2
+    avg_chest_height = (frames[:, 11, 1] + frames[:, 12, 1]) / 2  # shoulders as a proxy for chest
+    
+    # Wrists can be up to 5% above the chest
+    required_wrist_height = avg_chest_height * 0.95
+    depth_valid = ok & (avg_wrist_height >= required_wrist_height)
+    
+    with np.errstate(divide='ignore', invalid='ignore'):
+        depth_percentage = np.where(
+            avg_chest_height > 0,
+            ((avg_wrist_height - avg_chest_height) / avg_chest_height) * 100,
+            np.where(ok, 0.0, np.nan),
+        )
+    
+    depth_missed_by = np.where(depth_valid, 0.0, np.abs(required_wrist_height - avg_wrist_height))
+    validation_status = np.where(depth_valid, "valid", "invalid")
+    
+    return {
+        "frame_index": np.asarray(frame_indices, dtype=int).reshape(-1),
+        "validation_status": validation_status,
+        "depth_valid": depth_valid,
+        "wrist_height": avg_wrist_height,
+        "chest_height": avg_chest_height,
+        "depth_percentage": depth_percentage,
+        "depth_missed_by": depth_missed_by
+    }
+
+
+class RepCounter:
+    """
+    Push-based count_reps / count_benchpress_reps for live streams and recordings of any length:
+    feed one frame's landmarks at a time and get each rep's record (same fields as reps_data)
+    from the frame that completes it. Memory and work per frame are constant - a rolling
+    smoothing window, a running mean and the current lowest-point candidate, no history.
+
+    Same smoothing, thresholds, state machine and validation as the batch functions, deciding
+    each step one frame late (once the next smoothed value exists, as the batch version does).
+    The batch versions start in "high" at the first frame above the mean position of the
+    whole clip, which a live stream can't know yet:
+    - extend() over a complete clip (list or PoseSequence) on a fresh counter computes that
+      mean first, and its reps match count_reps / count_benchpress_reps exactly
+    - push() uses the first frame that isn't more than the movement threshold below the
+      running mean instead. When the stream starts with the lifter still at the top this is
+      usually the same frame; otherwise the first rep can start at a different frame, and
+      because the following steps are paired from there, a partial first movement can be
+      counted (or reps paired differently), so rep counts can differ from an upload of the
+      same frames
+    """
+
+    def __init__(self, signal_landmarks, threshold, validator, window_size=3):
+        """
+        signal_landmarks: landmarks whose average y-coordinate is tracked
+        threshold: smoothed per-frame movement that counts as moving down/up
+        validator: batch validator (validate_squat_depth_batch / validate_benchpress_depth_batch)
+        """
+        self.signal_landmarks = list(signal_landmarks)
+        self.threshold = threshold
+        self.validator = validator
+        self.window_size = window_size
+        self.frames_seen = 0
+        self.rep_count = 0
+        self._kernel = np.ones(window_size) / window_size
+        self._offset = window_size // 2  # smoothed[k] is centred on detected frame k + offset
+        self._min_length = max(self.signal_landmarks) + 1
+        # Last window_size + 1 detected frames as (position, frame index, landmarks)
+        self._recent = deque(maxlen=window_size + 1)
+        self._smoothed = deque(maxlen=3)  # smoothed[k - 1], smoothed[k], smoothed[k + 1]
+        self._smoothed_count = 0
+        self._smoothed_sum = 0.0
+        self._initial_mean = None  # mean smoothed position of the whole clip, when known up front
+        self._state = None  # None until the initial "high" frame, then "high" or "low"
+        self._start_frame = None
+        self._lowest = None  # detected frame with the largest y in the current low phase
+
+    @classmethod
+    def squat(cls):
+        return cls(SQUAT_SIGNAL_LANDMARKS, SQUAT_MOVEMENT_THRESHOLD, validate_squat_depth_batch)
+
+    @classmethod
+    def benchpress(cls):
+        return cls(BENCHPRESS_SIGNAL_LANDMARKS, BENCHPRESS_MOVEMENT_THRESHOLD, validate_benchpress_depth_batch)
+
+    def push(self, landmarks, frame=None):
+        """
+        Add the next frame.
+        landmarks: that frame's [x, y, z, visibility] rows (list or (33, 4) array), None when no pose was detected
+        frame: frame index reported in rep records (default: number of frames pushed before this one)
+        Returns: the rep record if this frame completed a rep, else None
+        """
+        if frame is None:
+            frame = self.frames_seen
+        self.frames_seen += 1
+        position = self._position(landmarks)
+        if position is None:
+            return None
+
+        self._recent.append((position, frame, landmarks))
+        if len(self._recent) < self.window_size:
+            return None
+        window = [entry[0] for entry in list(self._recent)[-self.window_size:]]
+        smoothed = float(np.convolve(window, self._kernel, mode='valid')[0])
+        self._smoothed.append(smoothed)
+        self._smoothed_count += 1
+        self._smoothed_sum += smoothed
+        if self._smoothed_count < 3:
+            return None
+        return self._step()
+
+    def extend(self, pose_data):
+        """
+        Push every frame of pose_data (analyze_pose output, a PoseSequence or any iterable of frames;
+        push() itself expects rows indexed by MediaPipe landmark, which subset sequences are expanded to).
+        On a fresh counter, a list or PoseSequence is a complete clip: its mean position is computed
+        first (one extra pass over the clip), so the reps match the batch functions exactly
+        (see the class docstring). Other iterables are streamed like push().
+        Returns: list of the rep records completed along the way
+        """
+        complete = self.frames_seen == 0 and isinstance(pose_data, (list, PoseSequence))
+        subset = isinstance(pose_data, PoseSequence) and pose_data.landmark_ids is not None
+        if complete:
+            frames = _full_width_frames(pose_data) if subset else pose_data
+            positions = [position for position in map(self._position, frames) if position is not None]
+            if len(positions) >= self.window_size:
+                self._initial_mean = float(np.mean(np.convolve(positions, self._kernel, mode='valid')))
+        if subset:
+            pose_data = _full_width_frames(pose_data)
+        reps = []
+        for landmarks in pose_data:
+            rep = self.push(landmarks)
+            if rep is not None:
+                reps.append(rep)
+        return reps
+
+    def _position(self, landmarks):
+        """Tracked y-coordinate of one frame, or None when it has no (usable) pose"""
+        if landmarks is None or len(landmarks) < self._min_length:
+            return None
+        if isinstance(landmarks, np.ndarray):
+            return float(landmarks[self.signal_landmarks, 1].mean())
+        heights = [landmarks[i][1] for i in self.signal_landmarks]
+        return float(sum(heights) / len(heights))
+
+    def _step(self):
+        # Decide step k: compare smoothed[k] with smoothed[k - 1]; the newest frame is k + window_size
+        previous, current, _ = self._smoothed
+        center = self._recent[-1 - (self.window_size - self._offset)]
+
+        if self._state is None:
+            if self._initial_mean is not None:
+                starts_high = current < self._initial_mean  # the batch rule
+            else:
+                starts_high = current < self._smoothed_sum / self._smoothed_count + self.threshold
+            if starts_high:
+                self._state = "high"
+                self._start_frame = center[1]
+            return None
+
+        if self._state == "high":
+            if current > previous + self.threshold:
+                self._state = "low"
+                self._lowest = center
+            return None
+
+        # Low phase: the lowest point is the first frame with the largest raw y
+        if center[0] > self._lowest[0]:
+            self._lowest = center
+        if current < previous - self.threshold:
+            self._state = "high"
+            rep = self._rep_record(center[1])
+            self._start_frame = center[1]
+            self._lowest = None
+            return rep
+        return None
+
+    def _rep_record(self, end_frame):
+        _, lowest_frame, landmarks = self._lowest
+        # Validate the lowest frame on its own, in the input's own format like the batch functions do
+        pose_data = PoseSequence(np.asarray(landmarks)[None]) if isinstance(landmarks, np.ndarray) else [landmarks]
+        validation = validation_rows(self.validator(pose_data, [0]))[0]
+        self.rep_count += 1
+        rep = {
+            "rep_number": self.rep_count,
+            "start_frame": self._start_frame,
+            "end_frame": end_frame,
+            "lowest_point_frame": lowest_frame,
+        }
+        rep.update(validation)
+        return rep
+
+
+def _full_width_frames(pose_data):
+    """Yield a subset PoseSequence's frames as (33, 4) arrays indexed by MediaPipe landmark (None where undetected)"""
+    for landmarks, valid in zip(pose_data.landmarks, pose_data.valid):
+        if not valid:
+            yield None
+            continue
+        frame = np.full((NUM_LANDMARKS, landmarks.shape[1]), np.nan, dtype=np.float32)
+        frame[pose_data.ids] = landmarks
+        yield frame
@@ -0,0 +1,286 @@
+"""
+Persistent history of analyzed sessions (SQLite).
+Every analyzed upload is saved as one session row plus one row per rep, with the session's
+aggregates (rep count, valid reps, depth sum and best depth) stored on the session row so
+per-user trends are GROUP BY queries over an index rather than a recomputation from video.
+The exercise's landmarks are kept as a compact float16 array for replays.
+"""
+
+import io
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import date
+
+import numpy as np
+
+from app.config import SESSION_STORE_ENABLED, SESSION_STORE_PATH, SESSION_STORE_POSES
+from app.utils.pose_sequence import PoseSequence
+
+# strftime formats of the trend buckets (UTC). Weeks are ISO weeks (Monday to Sunday, numbered
+# within the ISO year), so the days around New Year stay in one week; SQLite's strftime has no
+# ISO week, so days are grouped in SQL and rolled up into weeks and months in Python.
+TREND_BUCKETS = {
+    "day": "%Y-%m-%d",
+    "week": "%G-W%V",
+    "month": "%Y-%m",
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id TEXT PRIMARY KEY,
+    user_id TEXT,
+    exercise TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    frames INTEGER NOT NULL,
+    rep_count INTEGER NOT NULL,
+    valid_reps INTEGER NOT NULL,
+    depth_reps INTEGER NOT NULL,
+    depth_sum REAL,
+    depth_best REAL,
+    pose BLOB
+);
+CREATE INDEX IF NOT EXISTS sessions_user_exercise_created ON sessions (user_id, exercise, created_at);
+CREATE INDEX IF NOT EXISTS sessions_exercise_created ON sessions (exercise, created_at);
+CREATE INDEX IF NOT EXISTS sessions_created ON sessions (created_at);
+CREATE TABLE IF NOT EXISTS reps (
+    session_id TEXT NOT NULL REFERENCES sessions (session_id) ON DELETE CASCADE,
+    rep_number INTEGER NOT NULL,
+    start_frame INTEGER,
+    end_frame INTEGER,
+    lowest_point_frame INTEGER,
+    validation_status TEXT,
+    depth REAL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (session_id, rep_number)
+) WITHOUT ROWID;
+"""
+
+# Session columns returned by list/get (everything but the pose blob)
+_SESSION_COLUMNS = "session_id, user_id, exercise, created_at, frames, rep_count, valid_reps, depth_reps, depth_sum, depth_best"
+
+
+def pack_pose(pose_data):
+    """
+    Compact encoding of a PoseSequence for storage: float16 landmarks (about 3 significant
+    digits, plenty for normalized coordinates) in a compressed .npz
+    Returns: bytes
+    """
+    arrays = {"landmarks": pose_data.landmarks.astype(np.float16), "valid": pose_data.valid}
+    if pose_data.landmark_ids is not None:
+        arrays["landmark_ids"] = np.asarray(pose_data.landmark_ids, dtype=np.int16)
+    if pose_data.frame_numbers is not None:
+        arrays["frame_numbers"] = pose_data.frame_numbers
+    buffer = io.BytesIO()
+    np.savez_compressed(buffer, **arrays)
+    return buffer.getvalue()
+
+
+def unpack_pose(blob):
+    """
+    Returns: the PoseSequence stored by pack_pose
+    """
+    with np.load(io.BytesIO(blob)) as data:
+        landmark_ids = data["landmark_ids"] if "landmark_ids" in data.files else None
+        frame_numbers = data["frame_numbers"] if "frame_numbers" in data.files else None
+        return PoseSequence(data["landmarks"].astype(np.float32), data["valid"], landmark_ids, frame_numbers)
+
+
+def _session_row(row):
+    (session_id, user_id, exercise, created_at, frames, rep_count, valid_reps,
+     depth_reps, depth_sum, depth_best) = row
+    return {
+        "session_id": session_id,
+        "user_id": user_id,
+        "exercise": exercise,
+        "created_at": created_at,
+        "frames": frames,
+        "rep_count": rep_count,
+        "valid_reps": valid_reps,
+        "valid_rate": valid_reps / rep_count if rep_count else None,
+        "avg_depth": depth_sum / depth_reps if depth_reps else None,
+        "best_depth": depth_best,
+    }
+
+
+def _filters(user_id=None, exercise=None, since=None, until=None):
+    clauses, params = [], []
+    if user_id is not None:
+        clauses.append("user_id = ?")
+        params.append(user_id)
+    if exercise is not None:
+        clauses.append("exercise = ?")
+        params.append(exercise)
+    if since is not None:
+        clauses.append("created_at >= ?")
+        params.append(since)
+    if until is not None:
+        clauses.append("created_at < ?")
+        params.append(until)
+    return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+
+class SessionStore:
+    """
+    SQLite-backed session history; disabled (every call a no-op) when path is None.
+    One connection shared by the analysis threads and the API, serialized by a lock.
+    """
+
+    def __init__(self, path=None, save_poses=True):
+        self.path = path
+        self.save_poses = save_poses
+        self._lock = threading.Lock()
+        self._db = None
+
+    @property
+    def enabled(self):
+        return self.path is not None
+
+    def _connect(self):
+        # Opened on first use so importing the app doesn't create the database
+        if self._db is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode = WAL")
+            self._db.execute("PRAGMA foreign_keys = ON")
+            self._db.executescript(_SCHEMA)
+        return self._db
+
+    def save_session(self, exercise, reps_data, frames, user_id=None, pose_data=None, created_at=None):
+        """
+        Save an analyzed session.
+        exercise: the Exercise (its depth_field is the rep value tracked by the depth trend)
+        reps_data: rep records as returned by the exercise's rep counter
+        pose_data: PoseSequence; only the exercise's landmarks are kept
+        Returns: the new session_id, or None when the store is disabled
+        """
+        if not self.enabled:
+            return None
+        session_id = uuid.uuid4().hex
+        created_at = time.time() if created_at is None else created_at
+        depths = [rep.get(exercise.depth_field) for rep in reps_data]
+        depths = [depth for depth in depths if depth is not None]
+        valid_reps = sum(1 for rep in reps_data if rep.get("validation_status") == "valid")
+        pose = None
+        if self.save_poses and pose_data is not None and len(pose_data):
+            pose = pack_pose(pose_data.subset(exercise.landmarks))
+
+        with self._lock:
+            db = self._connect()
+            with db:
+                db.execute(
+                    f"INSERT INTO sessions ({_SESSION_COLUMNS}, pose) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (session_id, user_id, exercise.name, created_at, frames, len(reps_data), valid_reps,
+                     len(depths), sum(depths) if depths else None, max(depths) if depths else None, pose),
+                )
+                db.executemany(
+                    "INSERT INTO reps (session_id, rep_number, start_frame, end_frame, lowest_point_frame, "
+                    "validation_status, depth, data) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    [
+                        (session_id, rep["rep_number"], rep.get("start_frame"), rep.get("end_frame"),
+                         rep.get("lowest_point_frame"), rep.get("validation_status"),
+                         rep.get(exercise.depth_field), json.dumps(rep))
+                        for rep in reps_data
+                    ],
+                )
+        return session_id
+
+    def get_session(self, session_id, include_pose=False):
+        """
+        Returns: the session with its reps_data (and "pose" as a PoseSequence or None), or None if unknown
+        """
+        if not self.enabled:
+            return None
+        with self._lock:
+            db = self._connect()
+            row = db.execute(f"SELECT {_SESSION_COLUMNS}, pose FROM sessions WHERE session_id = ?", (session_id,)).fetchone()
+            if row is None:
+                return None
+            reps = db.execute("SELECT data FROM reps WHERE session_id = ? ORDER BY rep_number", (session_id,)).fetchall()
+        session = _session_row(row[:-1])
+        session["reps_data"] = [json.loads(data) for data, in reps]
+        if include_pose:
+            session["pose"] = unpack_pose(row[-1]) if row[-1] is not None else None
+        return session
+
+    def list_sessions(self, user_id=None, exercise=None, since=None, until=None, limit=50, offset=0):
+        """
+        Sessions matching the filters (since/until are Unix timestamps), newest first, without reps
+        """
+        if not self.enabled:
+            return []
+        where, params = _filters(user_id, exercise, since, until)
+        with self._lock:
+            rows = self._connect().execute(
+                f"SELECT {_SESSION_COLUMNS} FROM sessions{where} ORDER BY created_at DESC LIMIT ? OFFSET ?",
+                params + [limit, offset],
+            ).fetchall()
+        return [_session_row(row) for row in rows]
+
+    def trends(self, user_id, exercise=None, bucket="day", since=None, until=None):
+        """
+        Per-period aggregates of a user's sessions, oldest first, one row per (period, exercise):
+        sessions, reps, valid_reps, valid_rate, avg_depth (over reps with a depth value) and best_depth
+        """
+        if bucket not in TREND_BUCKETS:
+            raise ValueError(f"Unknown trend bucket '{bucket}', expected one of {', '.join(TREND_BUCKETS)}")
+        if not self.enabled:
+            return []
+        where, params = _filters(user_id, exercise, since, until)
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT strftime('%Y-%m-%d', created_at, 'unixepoch') AS day, exercise, COUNT(*), SUM(rep_count), "
+                "SUM(valid_reps), SUM(depth_reps), SUM(depth_sum), MAX(depth_best), MIN(created_at) "
+                f"FROM sessions{where} GROUP BY day, exercise ORDER BY MIN(created_at)",
+                params,
+            ).fetchall()
+
+        # Roll the days up into periods; rows arrive oldest first, so periods stay in that order
+        totals = {}
+        for day, exercise_name, sessions, reps, valid_reps, depth_reps, depth_sum, best_depth, _ in rows:
+            period = date.fromisoformat(day).strftime(TREND_BUCKETS[bucket])
+            total = totals.setdefault((period, exercise_name), [0, 0, 0, 0, 0.0, None])
+            total[0] += sessions
+            total[1] += reps or 0
+            total[2] += valid_reps or 0
+            total[3] += depth_reps or 0
+            total[4] += depth_sum or 0.0
+            if best_depth is not None and (total[5] is None or best_depth > total[5]):
+                total[5] = best_depth
+        return [
+            {
+                "period": period,
+                "exercise": exercise_name,
+                "sessions": sessions,
+                "reps": reps,
+                "valid_reps": valid_reps,
+                "valid_rate": valid_reps / reps if reps else None,
+                "avg_depth": depth_sum / depth_reps if depth_reps else None,
+                "best_depth": best_depth,
+            }
+            for (period, exercise_name), (sessions, reps, valid_reps, depth_reps, depth_sum, best_depth) in totals.items()
+        ]
+
+    def delete_session(self, session_id):
+        """
+        Returns: whether the session existed
+        """
+        if not self.enabled:
+            return False
+        with self._lock:
+            db = self._connect()
+            with db:
+                cursor = db.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+        return cursor.rowcount > 0
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+
+session_store = SessionStore(SESSION_STORE_PATH if SESSION_STORE_ENABLED else None, save_poses=SESSION_STORE_POSES)
@@ -0,0 +1,8 @@
+import json
+
+
+def format_sse(event, data):
+    """
+    Format one Server-Sent Event with a JSON payload
+    """
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
@@ -0,0 +1,62 @@
+"""
+Streaming upload ingestion.
+Uploads are copied to a uniquely named file in fixed-size chunks and hashed on the way, so a
+large phone video never sits in memory and concurrent uploads with the same filename can't
+overwrite each other.
+"""
+
+import hashlib
+import logging
+import os
+import tempfile
+
+from fastapi import HTTPException, UploadFile
+from starlette.concurrency import run_in_threadpool
+
+from app.config import UPLOAD_DIR, UPLOAD_MAX_MB
+from app.utils.metrics import timed
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # 1 MB
+
+
+async def save_upload(file: UploadFile, directory=UPLOAD_DIR):
+    """
+    Stream an uploaded file to disk.
+    Returns: (video_path, sha256 hex digest of the contents)
+    Raises HTTPException(413) if the upload is larger than UPLOAD_MAX_MB.
+    """
+    os.makedirs(directory, exist_ok=True)
+    suffix = os.path.splitext(os.path.basename(file.filename or ""))[1][:16]
+    fd, video_path = tempfile.mkstemp(dir=directory, prefix="upload-", suffix=suffix)
+    digest = hashlib.sha256()
+    size = 0
+    max_bytes = UPLOAD_MAX_MB * 1024 * 1024
+    try:
+        with timed("upload_write"), os.fdopen(fd, "wb") as f:
+            while True:
+                chunk = await file.read(UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if max_bytes and size > max_bytes:
+                    raise HTTPException(status_code=413, detail=f"Video is larger than {UPLOAD_MAX_MB} MB")
+                digest.update(chunk)
+                await run_in_threadpool(f.write, chunk)
+    except BaseException:
+        remove_upload(video_path)
+        raise
+    return video_path, digest.hexdigest()
+
+
+def remove_upload(video_path):
+    """
+    Delete an uploaded video once it has been analyzed (missing files are ignored)
+    """
+    try:
+        os.remove(video_path)
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        logger.warning("could not remove upload %s: %s", video_path, e)
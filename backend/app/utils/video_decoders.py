@@ -0,0 +1,287 @@
+"""
+Video decode backends behind iter_frames / iter_frames_at (app/utils/video_processing.py).
+
+- "opencv": cv2.VideoCapture with an explicit decode thread count and, optionally, hardware
+  acceleration (VIDEO_DECODE_HW)
+- "pyav":   FFmpeg through PyAV (optional: pip install av), with frame and slice threading,
+  scaling folded into the colour conversion (frames come out of the decoder at the reduced
+  size instead of being converted at full size and resized) and keyframe seeking to skip
+  long gaps between requested frames
+- "auto":   PyAV for codecs and containers where decoding dominates (H.264, HEVC, VP9, AV1,
+  Matroska/WebM) when it is installed, OpenCV otherwise
+
+Every backend numbers frames the same way (0, 1, 2, ... in decode order), so frame numbers
+from one pass can be requested from another.
+"""
+
+import logging
+import os
+
+import cv2
+
+try:
+    import av
+except ImportError:  # Optional dependency; the OpenCV backend covers everything without it
+    av = None
+
+from app.config import VIDEO_DECODER, VIDEO_DECODE_THREADS, VIDEO_DECODE_HW
+
+logger = logging.getLogger(__name__)
+
+DECODERS = ("auto", "opencv", "pyav")
+
+# Inter-frame codecs whose decoding is expensive enough for PyAV's threading and scaled conversion to pay off
+PYAV_CODECS = {"h264", "hevc", "vp9", "av1"}
+# Containers OpenCV's demuxing handles poorly (variable frame rates, missing frame counts)
+PYAV_CONTAINERS = {".mkv", ".webm"}
+# Seek instead of decoding through gaps longer than this (a typical phone keyframe interval is 1-2 seconds)
+SEEK_MIN_GAP_SECONDS = 2.0
+
+
+def fit_size(width, height, max_width=None, max_height=None):
+    """
+    Size that fits width x height inside max_width x max_height, keeping the aspect ratio
+    Returns: (width, height), or None when the frame already fits (no downscaling needed)
+    """
+    scale = 1.0
+    if max_width:
+        scale = min(scale, max_width / width)
+    if max_height:
+        scale = min(scale, max_height / height)
+    if scale >= 1.0:
+        return None
+    return max(1, int(round(width * scale))), max(1, int(round(height * scale)))
+
+
+class VideoDecoder:
+    """
+    One open video. frames() and frames_at() each read the video once; open a new decoder
+    for another pass. Frames are BGR arrays, downscaled to fit max_width x max_height.
+    """
+
+    name = None
+
+    @property
+    def fps(self):
+        """Frame rate from the container (0 when unknown)"""
+        raise NotImplementedError
+
+    def frames(self, step=1):
+        """Yield every step-th frame (0, step, 2 * step, ...)"""
+        raise NotImplementedError
+
+    def frames_at(self, frame_numbers):
+        """Yield the frames with the given numbers in increasing order (fewer if the video ends first)"""
+        raise NotImplementedError
+
+    def close(self):
+        raise NotImplementedError
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class OpenCVDecoder(VideoDecoder):
+    """
+    cv2.VideoCapture. Frames that aren't kept are skipped with grab(), which advances the
+    stream without the retrieve/colour-conversion step.
+    """
+
+    name = "opencv"
+
+    def __init__(self, path, max_width=None, max_height=None, threads=0, hardware=False):
+        params = []
+        if threads:
+            params += [cv2.CAP_PROP_N_THREADS, threads]
+        if hardware:
+            params += [cv2.CAP_PROP_HW_ACCELERATION, cv2.VIDEO_ACCELERATION_ANY]
+        self._cap = cv2.VideoCapture(path, cv2.CAP_ANY, params) if params else cv2.VideoCapture(path)
+        if not self._cap.isOpened():
+            raise ValueError(f"Cannot open video file: {path}")
+        self.max_width = max_width
+        self.max_height = max_height
+
+    @property
+    def fps(self):
+        return self._cap.get(cv2.CAP_PROP_FPS)
+
+    @property
+    def codec(self):
+        fourcc = int(self._cap.get(cv2.CAP_PROP_FOURCC))
+        return "".join(chr((fourcc >> shift) & 0xFF) for shift in (0, 8, 16, 24)).strip("\0 ").lower()
+
+    def _resize(self, frame):
+        size = fit_size(frame.shape[1], frame.shape[0], self.max_width, self.max_height)
+        return frame if size is None else cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+
+    def frames(self, step=1):
+        try:
+            count = 0
+            while True:
+                if not self._cap.grab():
+                    break
+                if count % step == 0:
+                    ret, frame = self._cap.retrieve()
+                    if not ret:
+                        break
+                    yield self._resize(frame)
+                count += 1
+        finally:
+            self.close()
+
+    def frames_at(self, frame_numbers):
+        try:
+            count = 0
+            for frame_number in sorted(set(frame_numbers)):
+                while count < frame_number:
+                    if not self._cap.grab():
+                        return
+                    count += 1
+                ret, frame = self._cap.read()
+                if not ret:
+                    return
+                count += 1
+                yield self._resize(frame)
+        finally:
+            self.close()
+
+    def close(self):
+        self._cap.release()
+
+
+class PyAVDecoder(VideoDecoder):
+    """
+    FFmpeg through PyAV. Skipped frames are decoded (later frames depend on them) but never
+    converted; kept frames are converted to BGR and scaled by swscale in one step.
+    """
+
+    name = "pyav"
+
+    def __init__(self, path, max_width=None, max_height=None, threads=0):
+        try:
+            self._container = av.open(path)
+        except av.FFmpegError as e:
+            raise ValueError(f"Cannot open video file: {path}") from e
+        if not self._container.streams.video:
+            self._container.close()
+            raise ValueError(f"Cannot open video file: {path} (no video stream)")
+        self._stream = self._container.streams.video[0]
+        self._stream.thread_type = "AUTO"  # Frame and slice threads
+        self._stream.codec_context.thread_count = threads  # 0 = one per core
+        self._size = fit_size(self._stream.codec_context.width, self._stream.codec_context.height,
+                              max_width, max_height) if self._stream.codec_context.width else None
+        self.path = path
+
+    @property
+    def fps(self):
+        # Same rate OpenCV reports (FFmpeg's guess from the stream's timing)
+        rate = self._stream.guessed_rate or self._stream.average_rate
+        return float(rate) if rate else 0.0
+
+    @property
+    def codec(self):
+        return self._stream.codec_context.name
+
+    @property
+    def _seekable(self):
+        """
+        Whether frame numbers can be recovered from timestamps after a seek: a constant frame
+        rate whose frame count matches the duration. Other streams are decoded straight through.
+        """
+        stream = self._stream
+        if not self.fps or not stream.frames or stream.duration is None or stream.time_base is None:
+            return False
+        return abs(float(stream.duration * stream.time_base) * self.fps - stream.frames) <= 1
+
+    def _convert(self, frame):
+        if self._size is None:
+            return frame.to_ndarray(format="bgr24")
+        width, height = self._size
+        return frame.to_ndarray(format="bgr24", width=width, height=height, interpolation="AREA")
+
+    def _decode(self):
+        try:
+            yield from self._container.decode(self._stream)
+        except av.FFmpegError as e:
+            # Like OpenCV, treat a damaged stream as ending at the last decodable frame
+            logger.warning("Stopped decoding %s: %s", self.path, e)
+
+    def _frame_number(self, frame):
+        start = self._stream.start_time or 0
+        return int(round(float((frame.pts - start) * self._stream.time_base) * self.fps))
+
+    def frames(self, step=1):
+        try:
+            for count, frame in enumerate(self._decode()):
+                if count % step == 0:
+                    yield self._convert(frame)
+        finally:
+            self.close()
+
+    def frames_at(self, frame_numbers):
+        try:
+            seek_gap = int(SEEK_MIN_GAP_SECONDS * self.fps) if self._seekable else None
+            decoded = self._decode()
+            position = 0  # Number of the next frame out of the decoder
+            for target in sorted(set(frame_numbers)):
+                if seek_gap and target - position > seek_gap:
+                    # Jump to the keyframe at or before the target and decode forward from there
+                    start = self._stream.start_time or 0
+                    self._container.seek(start + int(target / self.fps / self._stream.time_base),
+                                         stream=self._stream, backward=True, any_frame=False)
+                    decoded = self._decode()
+                    position = None
+                for frame in decoded:
+                    if position is None:
+                        if frame.pts is None:
+                            return
+                        position = self._frame_number(frame)
+                    number, position = position, position + 1
+                    if number >= target:
+                        yield self._convert(frame)
+                        break
+                else:
+                    return
+        finally:
+            self.close()
+
+    def close(self):
+        self._container.close()
+
+
+def available_decoders():
+    """Backends usable in this environment"""
+    return ["opencv", "pyav"] if av is not None else ["opencv"]
+
+
+def open_decoder(video_path, max_width=None, max_height=None, backend=None, threads=None):
+    """
+    Open a video with the configured (VIDEO_DECODER) or given backend.
+    "auto" probes the stream with PyAV and keeps it for PYAV_CODECS / PYAV_CONTAINERS.
+    Returns: a VideoDecoder
+    Raises: FileNotFoundError, ValueError for unreadable videos or unknown backends
+    """
+    if not os.path.exists(video_path):
+        raise FileNotFoundError(f"Video file not found: {video_path}")
+    backend = backend or VIDEO_DECODER
+    threads = VIDEO_DECODE_THREADS if threads is None else threads
+    if backend not in DECODERS:
+        raise ValueError(f"Unknown video decoder '{backend}', expected one of {', '.join(DECODERS)}")
+    if backend == "pyav" and av is None:
+        raise ValueError("The pyav video decoder needs PyAV (pip install av)")
+
+    if backend == "pyav" or (backend == "auto" and av is not None):
+        try:
+            decoder = PyAVDecoder(video_path, max_width, max_height, threads)
+        except ValueError:
+            if backend == "pyav":
+                raise
+        else:
+            extension = os.path.splitext(video_path)[1].lower()
+            if backend == "pyav" or decoder.codec in PYAV_CODECS or extension in PYAV_CONTAINERS:
+                return decoder
+            decoder.close()
+    return OpenCVDecoder(video_path, max_width, max_height, threads, VIDEO_DECODE_HW)
@@ -1,27 +1,69 @@
-
 import cv2
-import os
 
-def extract_frames(video_path, fps=5):
-    if not os.path.exists(video_path):
-        raise FileNotFoundError(f"Video file not found: {video_path}")
+from app.utils.video_decoders import open_decoder, fit_size
+
+
+def resize_frame(frame, max_width=None, max_height=None):
+    """
+    Downscale a frame so it fits inside max_width x max_height, keeping the aspect ratio.
+    Frames that already fit (or when no limit is given) are returned unchanged.
+    """
+    height, width = frame.shape[:2]
+    new_size = fit_size(width, height, max_width, max_height)
+    if new_size is None:
+        return frame
+    return cv2.resize(frame, new_size, interpolation=cv2.INTER_AREA)
+
+
+def iter_frames(video_path, fps=5, max_width=None, max_height=None, decoder=None):
+    """
+    Lazily yield frames sampled at roughly `fps` frames per second.
+    Frames we don't keep are skipped without the colour-conversion step, so only sampled
+    frames are fully converted (see video_decoders.py for the decode backends).
+    Only one frame is held in memory at a time, optionally downscaled to max_width/max_height.
+    decoder: decode backend ("auto", "opencv" or "pyav"; default VIDEO_DECODER)
+    """
+    video = open_decoder(video_path, max_width, max_height, backend=decoder)  # Open eagerly so a bad path fails at call time, not on first next()
+    step = _sample_step(video, fps)
+    if step is None:
+        video.close()
+        return iter(())
+    return video.frames(step)
 
-    cap = cv2.VideoCapture(video_path)
-    if not cap.isOpened():
-        raise ValueError(f"Cannot open video file: {video_path}")
 
-    video_fps = cap.get(cv2.CAP_PROP_FPS)
+def _sample_step(video, fps):
+    """
+    Source frames between two samples at `fps`, or None if the video's frame rate is unusable
+    """
+    video_fps = video.fps
     if video_fps == 0:
         video_fps = fps  # fallback if FPS cannot be read
+    if int(video_fps) <= 0:
+        return None
+    return max(1, int(video_fps // fps))
+
+
+def sample_step(video_path, fps):
+    """
+    Source frames between consecutive iter_frames samples: sample k is source frame k * step
+    Returns: step, or None if the video yields no frames
+    """
+    with open_decoder(video_path) as video:
+        return _sample_step(video, fps)
+
+
+def iter_frames_at(video_path, frame_numbers, max_width=None, max_height=None, decoder=None):
+    """
+    Lazily yield the source frames with the given frame numbers, in increasing order.
+    Like iter_frames, frames in between are skipped (or seeked over), and reading stops after
+    the last requested frame (or at the end of the video, so fewer frames may be yielded).
+    """
+    video = open_decoder(video_path, max_width, max_height, backend=decoder)
+    return video.frames_at(frame_numbers)
+
 
-    frames = []
-    count = 0
-    while True:
-        ret, frame = cap.read()
-        if not ret:
-            break
-        if int(video_fps) > 0 and count % max(1, int(video_fps // fps)) == 0:
-            frames.append(frame)
-        count += 1
-    cap.release()
-    return frames
+def extract_frames(video_path, fps=5, max_width=None, max_height=None, decoder=None):
+    """
+    Return all sampled frames as a list (see iter_frames for the streaming version)
+    """
+    return list(iter_frames(video_path, fps=fps, max_width=max_width, max_height=max_height, decoder=decoder))
@@ -0,0 +1,5 @@
+"""
+Benchmark harness for the analysis pipeline (not a test suite).
+Run from backend/:  python -m benchmarks.run --output results.json
+Compare two runs:   python -m benchmarks.compare before.json after.json
+"""
@@ -0,0 +1,70 @@
+"""
+Compare two benchmark reports from benchmarks.run.
+
+    python -m benchmarks.compare baseline.json candidate.json [--threshold 0.1]
+
+Results are matched on suite, name and params; the table shows the median time of each and
+the ratio candidate / baseline. Exits with status 1 when any benchmark got slower by more
+than the threshold (10% by default), so it can gate a deploy.
+"""
+
+import argparse
+import json
+import sys
+
+
+def _key(result):
+    return (result["suite"], result["name"], json.dumps(result["params"], sort_keys=True))
+
+
+def load_results(path):
+    with open(path) as f:
+        report = json.load(f)
+    return report, {_key(result): result for result in report["results"]}
+
+
+def compare(baseline, candidate, threshold):
+    """
+    Returns: (rows of (key, baseline median, candidate median, ratio), keys of regressions)
+    """
+    rows = []
+    regressions = []
+    for key, result in candidate.items():
+        if key not in baseline:
+            continue
+        before = baseline[key]["seconds"]["median"]
+        after = result["seconds"]["median"]
+        ratio = after / before if before > 0 else float("inf")
+        rows.append((key, before, after, ratio))
+        if ratio > 1 + threshold:
+            regressions.append(key)
+    return rows, regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.compare", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed slowdown as a fraction (default 0.10)")
+    args = parser.parse_args(argv)
+
+    baseline_report, baseline = load_results(args.baseline)
+    candidate_report, candidate = load_results(args.candidate)
+    if baseline_report["environment"]["machine"] != candidate_report["environment"]["machine"] or \
+            baseline_report["environment"]["cpu_count"] != candidate_report["environment"]["cpu_count"]:
+        print("Warning: the reports come from different machines", file=sys.stderr)
+
+    rows, regressions = compare(baseline, candidate, args.threshold)
+    for (suite, name, params), before, after, ratio in rows:
+        flag = "  SLOWER" if (suite, name, params) in regressions else ""
+        print(f"{suite:<10} {name:<32} {params:<70} {before * 1000:10.3f} ms {after * 1000:10.3f} ms {ratio:6.2f}x{flag}")
+    unmatched = len(candidate) - len(rows)
+    if unmatched:
+        print(f"{unmatched} candidate results have no baseline to compare with", file=sys.stderr)
+    if regressions:
+        print(f"{len(regressions)} benchmarks slowed down by more than {args.threshold:.0%}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
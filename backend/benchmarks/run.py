@@ -0,0 +1,346 @@
+"""
+Benchmark the analysis pipeline stages on synthetic inputs and write the results as JSON.
+
+    python -m benchmarks.run                          # full matrix, JSON on stdout
+    python -m benchmarks.run --quick -o quick.json    # small matrix, a few seconds
+    python -m benchmarks.run --only reps validation   # selected suites
+    python -m benchmarks.run --video clip.mp4         # also time a real clip
+
+Suites: frames (extract_frames with each available decode backend), pose (analyze_pose), reps (count_reps, count_benchpress_reps, RepCounter)
+and validation (batch and per-rep validators). Every result records its parameters, the
+per-run timings and a throughput, so two runs can be compared with benchmarks.compare.
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from importlib import metadata
+
+import cv2
+
+from app.config import (
+    FRAME_SAMPLE_FPS, FRAME_MAX_WIDTH, FRAME_MAX_HEIGHT, VIDEO_DECODE_THREADS,
+    POSE_TRACKING, POSE_MODEL_COMPLEXITY, POSE_MIN_DETECTION_CONFIDENCE, POSE_MIN_TRACKING_CONFIDENCE,
+)
+from app.utils.video_processing import extract_frames
+from app.utils.video_decoders import available_decoders
+from app.utils.pose_analysis import analyze_pose
+from app.utils.rep_counter import (
+    RepCounter, count_reps, count_benchpress_reps,
+    validate_squat_depth, validate_benchpress_depth,
+    validate_squat_depth_batch, validate_benchpress_depth_batch,
+)
+from benchmarks.synthetic import synthetic_pose_sequence, write_synthetic_video
+
+SCHEMA_VERSION = 1
+SUITES = ("frames", "pose", "reps", "validation")
+
+# (full matrix, --quick matrix)
+CLIP_SECONDS = ([5, 30], [3])
+RESOLUTIONS = ([(640, 360), (1280, 720), (1920, 1080)], [(640, 360)])
+POSE_FRAMES = (30, 6)
+REP_CLIP_SECONDS = ([10, 60, 300, 1800], [10, 60])
+VALIDATION_REPS = ([10, 100, 1000], [10, 100])
+
+
+def log(message):
+    print(message, file=sys.stderr, flush=True)
+
+
+def measure(fn, repeat, min_run_seconds=0.02):
+    """
+    Time fn() over `repeat` runs after one warmup call. Functions faster than min_run_seconds
+    are called several times per run (like timeit's autorange) and the run time divided by
+    the calls, so sub-millisecond timings aren't dominated by timer noise.
+    Returns: (per-call seconds of each run, result of the last call)
+    """
+    start = time.perf_counter()
+    result = fn()
+    first = time.perf_counter() - start
+    loops = max(1, int(min_run_seconds / first)) if first > 0 else 1
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(loops):
+            result = fn()
+        times.append((time.perf_counter() - start) / loops)
+    return times, result
+
+
+def make_result(suite, name, params, times, items, unit, **extra):
+    """
+    One benchmark result; throughput is computed from the median run
+    """
+    median = statistics.median(times)
+    return {
+        "suite": suite,
+        "name": name,
+        "params": params,
+        "unit": unit,
+        "items": items,
+        "runs": len(times),
+        "seconds": {
+            "min": min(times),
+            "median": median,
+            "mean": statistics.fmean(times),
+            "max": max(times),
+            "stdev": statistics.stdev(times) if len(times) > 1 else 0.0,
+        },
+        "items_per_second": items / median if median > 0 else None,
+        **extra,
+    }
+
+
+def bench_frames(videos, repeat):
+    results = []
+    for video in videos:
+        for decoder in available_decoders():
+            times, frames = measure(
+                lambda: extract_frames(
+                    video["path"], fps=FRAME_SAMPLE_FPS, max_width=FRAME_MAX_WIDTH, max_height=FRAME_MAX_HEIGHT,
+                    decoder=decoder,
+                ),
+                repeat,
+            )
+            results.append(make_result(
+                "frames", "extract_frames",
+                dict(video["params"], fps=FRAME_SAMPLE_FPS, max_width=FRAME_MAX_WIDTH, decoder=decoder),
+                times, len(frames), "frames",
+            ))
+            log(f"  extract_frames {video['label']} ({decoder}): {statistics.median(times) * 1000:.1f} ms")
+    return results
+
+
+def bench_pose(videos, repeat, max_frames):
+    results = []
+    for video in videos:
+        frames = extract_frames(video["path"], fps=FRAME_SAMPLE_FPS, max_width=FRAME_MAX_WIDTH, max_height=FRAME_MAX_HEIGHT)
+        frames = frames[:max_frames]
+        if not frames:
+            continue
+        times, poses = measure(
+            lambda: analyze_pose(
+                frames,
+                static_image_mode=not POSE_TRACKING,
+                model_complexity=POSE_MODEL_COMPLEXITY,
+                min_detection_confidence=POSE_MIN_DETECTION_CONFIDENCE,
+                min_tracking_confidence=POSE_MIN_TRACKING_CONFIDENCE,
+            ),
+            repeat,
+        )
+        height, width = frames[0].shape[:2]
+        results.append(make_result(
+            "pose", "analyze_pose",
+            dict(video["params"], frame_width=width, frame_height=height,
+                 tracking=POSE_TRACKING, model_complexity=POSE_MODEL_COMPLEXITY),
+            times, len(frames), "frames",
+            detected=sum(1 for pose in poses if pose is not None),
+        ))
+        log(f"  analyze_pose {video['label']}: {statistics.median(times) / len(frames) * 1000:.1f} ms/frame")
+    return results
+
+
+def bench_reps(repeat, clip_seconds, seed):
+    results = []
+    counters = (("squat", count_reps, RepCounter.squat), ("benchpress", count_benchpress_reps, RepCounter.benchpress))
+    for exercise, counter, online_counter in counters:
+        for seconds in clip_seconds:
+            num_frames = int(seconds * FRAME_SAMPLE_FPS)
+            sequence = synthetic_pose_sequence(num_frames, exercise, fps=FRAME_SAMPLE_FPS, seed=seed)
+            # Push-based counter, one frame at a time
+            frames = list(sequence)
+            times, reps = measure(lambda: online_counter().extend(frames), repeat)
+            results.append(make_result(
+                "reps", f"RepCounter.{exercise}",
+                {"clip_seconds": seconds, "frames": num_frames, "input": "stream"},
+                times, num_frames, "frames",
+                reps=len(reps),
+            ))
+            log(f"  RepCounter.{exercise} {seconds}s stream: {statistics.median(times) * 1000:.2f} ms, {len(reps)} reps")
+            # PoseSequence is what the pipeline passes; the nested list is the original analyze_pose format
+            for input_format, pose_data in (("sequence", sequence), ("list", sequence.to_list())):
+                times, rep_info = measure(lambda: counter(pose_data), repeat)
+                results.append(make_result(
+                    "reps", counter.__name__,
+                    {"clip_seconds": seconds, "frames": num_frames, "input": input_format},
+                    times, num_frames, "frames",
+                    reps=rep_info["rep_count"],
+                ))
+                log(f"  {counter.__name__} {seconds}s {input_format}: "
+                    f"{statistics.median(times) * 1000:.2f} ms, {rep_info['rep_count']} reps")
+    return results
+
+
+def bench_validation(repeat, rep_counts, seed):
+    results = []
+    validators = (
+        ("squat", validate_squat_depth_batch, validate_squat_depth),
+        ("benchpress", validate_benchpress_depth_batch, validate_benchpress_depth),
+    )
+    for exercise, batch_validator, validator in validators:
+        for reps in rep_counts:
+            # Every frame has a pose: validators only ever see a rep's detected lowest point
+            sequence = synthetic_pose_sequence(reps * 10, exercise, reps=reps, fps=FRAME_SAMPLE_FPS, missing=0.0, seed=seed)
+            frame_indices = list(range(5, len(sequence), 10))
+            pose_list = sequence.to_list()
+            cases = (
+                (batch_validator.__name__, "sequence", lambda: batch_validator(sequence, frame_indices)),
+                (validator.__name__, "sequence", lambda: [validator(sequence, i) for i in frame_indices]),
+                (validator.__name__, "list", lambda: [validator(pose_list, i) for i in frame_indices]),
+            )
+            for name, input_format, fn in cases:
+                times, _ = measure(fn, repeat)
+                results.append(make_result(
+                    "validation", name, {"reps": len(frame_indices), "input": input_format},
+                    times, len(frame_indices), "reps",
+                ))
+                log(f"  {name} {reps} reps {input_format}: {statistics.median(times) * 1000:.2f} ms")
+    return results
+
+
+def synthetic_videos(directory, clip_seconds, resolutions, seed):
+    videos = []
+    for seconds in clip_seconds:
+        for width, height in resolutions:
+            path = os.path.join(directory, f"synthetic_{seconds}s_{width}x{height}.mp4")
+            num_frames = write_synthetic_video(path, seconds, width, height, seed=seed)
+            videos.append({
+                "path": path,
+                "label": f"{seconds}s {width}x{height}",
+                "params": {"video": "synthetic", "clip_seconds": seconds, "width": width, "height": height,
+                           "source_frames": num_frames},
+            })
+    return videos
+
+
+def real_videos(paths):
+    videos = []
+    for path in paths:
+        cap = cv2.VideoCapture(path)
+        try:
+            if not cap.isOpened():
+                raise SystemExit(f"Could not open video {path}")
+            fps = cap.get(cv2.CAP_PROP_FPS) or 0
+            num_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+            width, height = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        finally:
+            cap.release()
+        videos.append({
+            "path": path,
+            "label": os.path.basename(path),
+            "params": {"video": os.path.basename(path), "clip_seconds": round(num_frames / fps, 2) if fps else None,
+                       "width": width, "height": height, "source_frames": num_frames},
+        })
+    return videos
+
+
+def _version(package):
+    try:
+        return metadata.version(package)
+    except metadata.PackageNotFoundError:
+        return None
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment():
+    """Where and with what the benchmarks ran, so runs on different machines aren't mistaken for regressions"""
+    return {
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "git_commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "packages": {package: _version(package) for package in ("numpy", "opencv-python", "mediapipe", "av")},
+        "opencv_threads": cv2.getNumThreads(),
+        "config": {
+            "FRAME_SAMPLE_FPS": FRAME_SAMPLE_FPS,
+            "FRAME_MAX_WIDTH": FRAME_MAX_WIDTH,
+            "FRAME_MAX_HEIGHT": FRAME_MAX_HEIGHT,
+            "VIDEO_DECODE_THREADS": VIDEO_DECODE_THREADS,
+            "POSE_TRACKING": POSE_TRACKING,
+            "POSE_MODEL_COMPLEXITY": POSE_MODEL_COMPLEXITY,
+        },
+    }
+
+
+def run(suites, repeat, quick, seed, video_paths):
+    """
+    Run the selected suites
+    Returns: the JSON-serializable report
+    """
+    matrix = 1 if quick else 0
+    started = time.perf_counter()
+    results = []
+    tmpdir = None
+    try:
+        videos = []
+        if "frames" in suites or "pose" in suites:
+            tmpdir = tempfile.mkdtemp(prefix="formai-bench-")
+            log("Writing synthetic videos...")
+            videos = synthetic_videos(tmpdir, CLIP_SECONDS[matrix], RESOLUTIONS[matrix], seed) + real_videos(video_paths)
+        if "frames" in suites:
+            log("frames")
+            results += bench_frames(videos, repeat)
+        if "pose" in suites:
+            log("pose")
+            results += bench_pose(videos, max(1, repeat // 2), POSE_FRAMES[matrix])
+        if "reps" in suites:
+            log("reps")
+            results += bench_reps(repeat, REP_CLIP_SECONDS[matrix], seed)
+        if "validation" in suites:
+            log("validation")
+            results += bench_validation(repeat, VALIDATION_REPS[matrix], seed)
+    finally:
+        if tmpdir:
+            shutil.rmtree(tmpdir, ignore_errors=True)
+    return {
+        "schema_version": SCHEMA_VERSION,
+        "environment": environment(),
+        "settings": {"suites": list(suites), "repeat": repeat, "quick": quick, "seed": seed},
+        "total_seconds": time.perf_counter() - started,
+        "results": results,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.run", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("-o", "--output", help="write the JSON report here instead of stdout")
+    parser.add_argument("--only", nargs="+", choices=SUITES, default=list(SUITES), help="suites to run")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per benchmark (pose uses half)")
+    parser.add_argument("--quick", action="store_true", help="small matrix for a fast smoke run")
+    parser.add_argument("--seed", type=int, default=0, help="seed for the synthetic inputs")
+    parser.add_argument("--video", action="append", default=[], help="also benchmark this clip (repeatable)")
+    args = parser.parse_args(argv)
+    if args.repeat < 1:
+        parser.error("--repeat must be at least 1")
+
+    report = run(args.only, args.repeat, args.quick, args.seed, args.video)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+        log(f"Wrote {len(report['results'])} results to {args.output}")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
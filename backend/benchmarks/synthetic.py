@@ -0,0 +1,129 @@
+"""
+Synthetic inputs for the benchmarks, generated locally and deterministically from a seed:
+pose sequences of an idealized lifter doing reps, and videos of a drawn figure doing squats.
+"""
+
+import cv2
+import numpy as np
+
+from app.utils.pose_sequence import PoseSequence, NUM_LANDMARKS, LANDMARK_FIELDS
+
+# Standing pose (normalized image coordinates) of the landmarks the rep detectors and validators read
+_SQUAT_STANDING = {
+    0: (0.50, 0.30),  # nose
+    11: (0.42, 0.40), 12: (0.58, 0.40),  # shoulders
+    23: (0.45, 0.60), 24: (0.55, 0.60),  # hips
+    25: (0.44, 0.78), 26: (0.56, 0.78),  # knees
+    27: (0.44, 0.95), 28: (0.56, 0.95),  # ankles
+}
+_BENCHPRESS_LOCKOUT = {
+    0: (0.50, 0.45),  # nose
+    11: (0.40, 0.50), 12: (0.60, 0.50),  # shoulders (the validators' chest height)
+    13: (0.36, 0.42), 14: (0.64, 0.42),  # elbows
+    15: (0.38, 0.30), 16: (0.62, 0.30),  # wrists
+}
+
+
+def rep_profile(num_frames, fps, reps, rng):
+    """
+    Movement depth per frame in [0, 1] (0 = top, 1 = bottom) for `reps` reps spread over the
+    clip, with a short pause before, between and after them, and each rep's depth scaled by
+    0.8-1.0 so some of them miss the validators' depth
+    Returns: (depth array, list of (start, bottom, end) frame indices)
+    """
+    depth = np.zeros(num_frames)
+    reps_at = []
+    if reps <= 0 or num_frames == 0:
+        return depth, reps_at
+    slot = num_frames / (reps + 1)
+    rep_frames = max(3, int(min(slot * 0.8, 2.5 * fps)))
+    for r in range(reps):
+        start = int(slot * (r + 0.5))
+        end = min(start + rep_frames, num_frames - 1)
+        if end - start < 2:
+            break
+        t = np.linspace(0.0, 1.0, end - start + 1)
+        depth[start:end + 1] = np.sin(np.pi * t) * rng.uniform(0.8, 1.0)
+        reps_at.append((start, start + (end - start) // 2, end))
+    return depth, reps_at
+
+
+def synthetic_pose_sequence(num_frames, exercise="squat", reps=None, fps=3.0, missing=0.05, seed=0):
+    """
+    PoseSequence of `num_frames` frames sampled at `fps` with all 33 landmarks, following
+    the exercise's movement (squat or benchpress) plus a little jitter.
+    reps: number of reps (default: one every 4 seconds)
+    missing: fraction of frames with no detected pose
+    """
+    rng = np.random.default_rng(seed)
+    if reps is None:
+        reps = int(num_frames / fps / 4)
+    depth, _ = rep_profile(num_frames, fps, reps, rng)
+
+    landmarks = np.empty((num_frames, NUM_LANDMARKS, LANDMARK_FIELDS), dtype=np.float32)
+    # Landmarks the exercise doesn't move stay put at random positions
+    landmarks[:] = rng.uniform(0.2, 0.8, (1, NUM_LANDMARKS, LANDMARK_FIELDS))
+    landmarks[:, :, 3] = rng.uniform(0.8, 1.0, (num_frames, NUM_LANDMARKS))
+
+    if exercise == "squat":
+        for landmark_id, (x, y) in _SQUAT_STANDING.items():
+            landmarks[:, landmark_id, 0] = x
+            landmarks[:, landmark_id, 1] = y
+        # Upper body drops with the hips; knees drift down a little and spread out
+        for landmark_id in (0, 11, 12, 23, 24):
+            landmarks[:, landmark_id, 1] += 0.25 * depth
+        landmarks[:, [25, 26], 1] += (0.02 * depth)[:, None]
+        landmarks[:, 25, 0] -= 0.04 * depth
+        landmarks[:, 26, 0] += 0.04 * depth
+    elif exercise == "benchpress":
+        for landmark_id, (x, y) in _BENCHPRESS_LOCKOUT.items():
+            landmarks[:, landmark_id, 0] = x
+            landmarks[:, landmark_id, 1] = y
+        # Bar comes down to the chest
+        landmarks[:, [13, 14], 1] += (0.12 * depth)[:, None]
+        landmarks[:, [15, 16], 1] += (0.19 * depth)[:, None]
+    else:
+        raise ValueError(f"Unknown exercise '{exercise}'")
+
+    landmarks[:, :, :3] += rng.normal(0.0, 0.002, (num_frames, NUM_LANDMARKS, 3)).astype(np.float32)
+    valid = rng.random(num_frames) >= missing
+    landmarks[~valid] = np.nan
+    return PoseSequence(landmarks, valid)
+
+
+def write_synthetic_video(path, seconds, width, height, fps=30, reps=None, seed=0):
+    """
+    Write an MP4 of a stick figure doing squats on a noisy background.
+    MediaPipe generally doesn't detect a drawn figure, so pose timings on these clips cover
+    person detection only; benchmark a real clip (--video) for full landmark inference.
+    Returns: number of frames written
+    """
+    rng = np.random.default_rng(seed)
+    num_frames = int(round(seconds * fps))
+    if reps is None:
+        reps = int(seconds / 4)
+    depth, _ = rep_profile(num_frames, fps, reps, rng)
+    # Static noise keeps the encoder from compressing frames to nothing, like real footage
+    background = rng.integers(40, 90, (height, width, 3), dtype=np.uint8)
+    scale = np.array([width, height])
+    thickness = max(2, width // 120)
+
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), fps, (width, height))
+    if not writer.isOpened():
+        raise RuntimeError(f"Could not open a video writer for {path}")
+    try:
+        for i in range(num_frames):
+            frame = background.copy()
+            d = depth[i]
+            points = {}
+            for landmark_id, (x, y) in _SQUAT_STANDING.items():
+                if landmark_id in (0, 11, 12, 23, 24):
+                    y += 0.25 * d
+                points[landmark_id] = tuple(int(v) for v in np.array([x, y]) * scale)
+            for a, b in ((11, 12), (11, 23), (12, 24), (23, 24), (23, 25), (24, 26), (25, 27), (26, 28)):
+                cv2.line(frame, points[a], points[b], (220, 220, 220), thickness)
+            cv2.circle(frame, points[0], max(4, width // 30), (200, 180, 160), -1)
+            writer.write(frame)
+    finally:
+        writer.release()
+    return num_frames
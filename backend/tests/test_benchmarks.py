@@ -0,0 +1,68 @@
+"""
+The benchmark harness's inputs and regression gate: synthetic data must be reproducible from its
+seed (so runs are comparable), and compare() must flag slowdowns beyond the threshold.
+"""
+
+import numpy as np
+import pytest
+
+from benchmarks.compare import _key, compare
+from benchmarks.synthetic import rep_profile, synthetic_pose_sequence
+
+
+def test_synthetic_pose_sequence_is_deterministic():
+    first = synthetic_pose_sequence(90, "benchpress", reps=3, seed=7)
+    second = synthetic_pose_sequence(90, "benchpress", reps=3, seed=7)
+    other = synthetic_pose_sequence(90, "benchpress", reps=3, seed=8)
+
+    np.testing.assert_array_equal(first.landmarks, second.landmarks)
+    np.testing.assert_array_equal(first.valid, second.valid)
+    assert not np.array_equal(first.landmarks, other.landmarks, equal_nan=True)
+
+
+def test_synthetic_pose_sequence_shape_and_missing_frames():
+    sequence = synthetic_pose_sequence(200, "squat", missing=0.25, seed=1)
+    assert sequence.landmarks.shape == (200, 33, 4)
+    assert 0 < (~sequence.valid).sum() < 100
+    assert np.isnan(sequence.landmarks[~sequence.valid]).all()
+    assert not np.isnan(sequence.landmarks[sequence.valid]).any()
+
+
+def test_rep_profile_places_requested_reps():
+    depth, reps_at = rep_profile(120, 3.0, 4, np.random.default_rng(0))
+    assert len(reps_at) == 4
+    for start, bottom, end in reps_at:
+        assert start < bottom < end
+        # Each rep is half a sine wave scaled by 0.8-1.0, starting and ending at the top
+        assert depth[start] == pytest.approx(0) and depth[end] == pytest.approx(0)
+        assert 0.7 <= depth[bottom] <= 1.0
+
+
+def _result(suite, name, median, **params):
+    return {"suite": suite, "name": name, "params": params, "seconds": {"median": median}}
+
+
+def _keyed(*results):
+    # Same keying as load_results
+    return {_key(result): result for result in results}
+
+
+def test_compare_flags_only_slowdowns_beyond_threshold():
+    baseline = _keyed(
+        _result("reps", "count_reps", 0.010, frames=100),
+        _result("reps", "count_reps", 0.100, frames=1000),
+        _result("pose", "analyze_pose", 1.0, frames=10),
+    )
+    candidate = _keyed(
+        _result("reps", "count_reps", 0.0105, frames=100),  # 5% slower: within the threshold
+        _result("reps", "count_reps", 0.150, frames=1000),  # 50% slower
+        _result("pose", "analyze_pose", 0.5, frames=10),  # faster
+        _result("frames", "extract_frames", 0.2, seconds=10),  # no baseline
+    )
+
+    rows, regressions = compare(baseline, candidate, threshold=0.10)
+    assert len(rows) == 3
+    assert [key[1] for key in regressions] == ["count_reps"]
+    assert baseline[regressions[0]]["params"] == {"frames": 1000}
+    ratios = {key: ratio for key, _, _, ratio in rows}
+    assert ratios[regressions[0]] == pytest.approx(1.5)
@@ -0,0 +1,100 @@
+"""
+Live sessions: client landmark validation, binary frame decoding and closing a session while
+a frame is still being pose-analyzed in a worker thread (MediaPipe replaced by fakes).
+"""
+
+import math
+import threading
+
+import numpy as np
+import pytest
+
+import app.utils.live_analysis as live_analysis
+from app.exercises import get_exercise
+from app.utils.live_analysis import open_live_session, parse_landmarks
+from app.utils.pose_sequence import NUM_LANDMARKS
+
+SQUAT = get_exercise("squat")
+
+
+def _landmarks(value=0.5):
+    return [[value, value, 0.0, 1.0] for _ in range(NUM_LANDMARKS)]
+
+
+def test_parse_landmarks_accepts_a_pose_or_null():
+    assert parse_landmarks(None) is None
+    landmarks = parse_landmarks(_landmarks())
+    assert landmarks.shape == (NUM_LANDMARKS, 4) and landmarks.dtype == np.float32
+
+
+@pytest.mark.parametrize("bad", [math.nan, math.inf, -math.inf])
+def test_parse_landmarks_rejects_non_finite_values(bad):
+    value = _landmarks()
+    value[SQUAT.signal_landmarks[0]][1] = bad
+    with pytest.raises(ValueError):
+        parse_landmarks(value)
+
+
+@pytest.mark.parametrize("value", [[], _landmarks()[:-1], [[0.5, 0.5]] * NUM_LANDMARKS, "landmarks", [["x"] * 4] * NUM_LANDMARKS])
+def test_parse_landmarks_rejects_malformed_values(value):
+    with pytest.raises(ValueError):
+        parse_landmarks(value)
+
+
+@pytest.fixture
+def session():
+    session = open_live_session(SQUAT)
+    yield session
+    session.close()
+
+
+def test_unreadable_binary_frame_is_rejected(session):
+    with pytest.raises(ValueError):
+        session.push_encoded_image(b"not an image")
+    assert session.frames_received == 0
+
+
+class _FakePose:
+    closed = False
+
+    def close(self):
+        self.closed = True
+
+
+def test_close_waits_for_the_frame_in_flight(session, monkeypatch):
+    pose = _FakePose()
+    inferring, finish = threading.Event(), threading.Event()
+
+    def process_frames(graph, frames):
+        assert not graph.closed
+        inferring.set()
+        finish.wait(5)
+        assert not graph.closed
+        return [None]
+
+    monkeypatch.setattr(live_analysis, "create_pose", lambda **options: pose)
+    monkeypatch.setattr(live_analysis, "process_frames", process_frames)
+    results = []
+    worker = threading.Thread(target=lambda: results.append(session.push_image(np.zeros((48, 64, 3), np.uint8))))
+    worker.start()
+    assert inferring.wait(5)
+
+    # The client went away mid-frame: the graph stays open until the frame is done
+    session.close()
+    assert not pose.closed
+    finish.set()
+    worker.join(5)
+    assert results == [(False, None)]
+    assert pose.closed
+
+    with pytest.raises(RuntimeError):
+        session.push_image(np.zeros((48, 64, 3), np.uint8))
+
+
+def test_close_releases_an_idle_graph(session, monkeypatch):
+    pose = _FakePose()
+    monkeypatch.setattr(live_analysis, "create_pose", lambda **options: pose)
+    monkeypatch.setattr(live_analysis, "process_frames", lambda graph, frames: [_landmarks()])
+    assert session.push_image(np.zeros((48, 64, 3), np.uint8)) == (True, None)
+    session.close()
+    assert pose.closed
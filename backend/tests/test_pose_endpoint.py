@@ -0,0 +1,69 @@
+"""
+On-demand pose fetches (GET /{exercise}/pose/{pose_id}) against a pose cache in a temp dir:
+which formats a pose_id can be fetched in depends on the pose_format it was uploaded with.
+"""
+
+import numpy as np
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.exercises import get_exercise
+from app.routes.exercise import create_exercise_router
+from app.utils.pose_cache import pose_cache
+from app.utils.pose_sequence import PoseSequence
+
+SQUAT = get_exercise("squat")
+BENCHPRESS = get_exercise("benchpress")
+FULL_ID = "f" * 64
+SQUAT_ID = "5" * 64
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(pose_cache, "directory", str(tmp_path))
+    monkeypatch.setattr(pose_cache, "max_bytes", 64 * 1024 * 1024)
+    rng = np.random.default_rng(0)
+    full = PoseSequence(rng.uniform(0, 1, (5, 33, 4)).astype(np.float32), np.ones(5, dtype=bool))
+    pose_cache.put(FULL_ID, full)
+    # What a pose_format=subset squat upload caches
+    pose_cache.put(SQUAT_ID, full.subset(SQUAT.landmarks))
+
+    app = FastAPI()
+    app.include_router(create_exercise_router(SQUAT))
+    app.include_router(create_exercise_router(BENCHPRESS))
+    return TestClient(app)
+
+
+@pytest.mark.parametrize("pose_format", ["full", "subset", "quantized", "binary", "none"])
+def test_full_upload_can_be_fetched_in_any_format(client, pose_format):
+    for exercise in ("squat", "benchpress"):
+        response = client.get(f"/{exercise}/pose/{FULL_ID}", params={"pose_format": pose_format})
+        assert response.status_code == 200
+        assert response.json()["pose_id"] == FULL_ID
+
+
+@pytest.mark.parametrize("pose_format", ["subset", "quantized", "binary", "none"])
+def test_subset_upload_can_be_fetched_except_as_full(client, pose_format):
+    response = client.get(f"/squat/pose/{SQUAT_ID}", params={"pose_format": pose_format})
+    assert response.status_code == 200
+    if pose_format == "subset":
+        assert response.json()["pose_data"]["landmark_ids"] == list(SQUAT.landmarks)
+
+
+def test_subset_upload_full_fetch_is_not_found(client):
+    response = client.get(f"/squat/pose/{SQUAT_ID}", params={"pose_format": "full"})
+    assert response.status_code == 404
+    assert "pose_format=full" in response.json()["detail"]
+
+
+@pytest.mark.parametrize("pose_format", ["subset", "quantized", "binary", "none"])
+def test_pose_id_of_another_exercise_is_not_found(client, pose_format):
+    # Bench press reads wrists the squat subset doesn't hold
+    response = client.get(f"/benchpress/pose/{SQUAT_ID}", params={"pose_format": pose_format})
+    assert response.status_code == 404
+
+
+def test_unknown_or_malformed_pose_id_is_not_found(client):
+    assert client.get(f"/squat/pose/{'0' * 64}").status_code == 404
+    assert client.get("/squat/pose/not-a-key").status_code == 404
@@ -0,0 +1,363 @@
+"""
+Rep detection and depth validation against the original per-frame implementation.
+
+The reference functions below are the state machine and scalar validators count_reps /
+count_benchpress_reps used before cycle detection was vectorized. The vectorized path must give
+the same reps on list input, and on PoseSequence input up to float32 rounding of the metrics.
+The push-based RepCounter is checked against the batch functions.
+"""
+
+import numpy as np
+import pytest
+
+from app.utils.pose_sequence import PoseSequence
+from app.utils.rep_counter import (
+    BENCHPRESS_LANDMARKS,
+    BENCHPRESS_MOVEMENT_THRESHOLD,
+    SQUAT_LANDMARKS,
+    SQUAT_MOVEMENT_THRESHOLD,
+    RepCounter,
+    count_benchpress_reps,
+    count_reps,
+    detect_rep_cycles,
+    validate_benchpress_depth_batch,
+    validate_squat_depth_batch,
+    validation_rows,
+)
+
+# PoseSequence stores float32, so its metrics may differ from the float64 list path by rounding
+FLOAT32_TOLERANCE = 1e-6
+
+SEEDS = range(30)
+
+
+# Reference implementation (pre-vectorization)
+
+def _squat_signal(frame_data):
+    return frame_data[0][1] if frame_data is not None and len(frame_data) > 0 else None
+
+
+def _benchpress_signal(frame_data):
+    if frame_data is None or len(frame_data) <= 16:
+        return None
+    return (frame_data[15][1] + frame_data[16][1]) / 2
+
+
+def reference_validate_squat(pose_data, frame_index):
+    empty = {
+        "validation_status": "invalid", "depth_valid": False, "knee_width_valid": False,
+        "hip_height": None, "knee_height": None, "depth_difference": None, "knee_width": None,
+        "shoulder_width": None, "width_difference": None, "depth_missed_by": None, "width_missed_by": None,
+    }
+    if frame_index >= len(pose_data) or frame_index < 0:
+        return empty
+    frame_data = pose_data[frame_index]
+    if frame_data is None or len(frame_data) < 27:
+        return empty
+
+    avg_hip_height = (frame_data[23][1] + frame_data[24][1]) / 2
+    avg_knee_height = (frame_data[25][1] + frame_data[26][1]) / 2
+    knee_width = abs(frame_data[25][0] - frame_data[26][0])
+    shoulder_width = abs(frame_data[11][0] - frame_data[12][0])
+
+    depth_difference = avg_hip_height - avg_knee_height
+    depth_valid = bool(depth_difference >= 0)
+    min_required_knee_width = shoulder_width * (1 - 0.10)
+    width_difference = knee_width - shoulder_width
+    knee_width_valid = bool(knee_width >= min_required_knee_width)
+    depth_missed_by = abs(depth_difference) if not depth_valid else 0
+    width_missed_by = abs(knee_width - min_required_knee_width) if not knee_width_valid else 0
+
+    if depth_valid and knee_width_valid:
+        validation_status = "valid"
+    elif depth_valid or knee_width_valid:
+        validation_status = "partially_valid"
+    else:
+        validation_status = "invalid"
+    return {
+        "validation_status": validation_status,
+        "depth_valid": depth_valid,
+        "knee_width_valid": knee_width_valid,
+        "hip_height": float(avg_hip_height),
+        "knee_height": float(avg_knee_height),
+        "depth_difference": float(depth_difference),
+        "knee_width": float(knee_width),
+        "shoulder_width": float(shoulder_width),
+        "width_difference": float(width_difference),
+        "depth_missed_by": float(depth_missed_by),
+        "width_missed_by": float(width_missed_by),
+    }
+
+
+def reference_validate_benchpress(pose_data, frame_index):
+    empty = {
+        "validation_status": "invalid", "depth_valid": False, "wrist_height": None,
+        "chest_height": None, "depth_percentage": None, "depth_missed_by": None,
+    }
+    if frame_index >= len(pose_data) or frame_index < 0:
+        return empty
+    frame_data = pose_data[frame_index]
+    if frame_data is None or len(frame_data) < 17:
+        return empty
+
+    avg_wrist_height = (frame_data[15][1] + frame_data[16][1]) / 2
+    avg_chest_height = (frame_data[11][1] + frame_data[12][1]) / 2
+    required_wrist_height = avg_chest_height * 0.95
+    depth_valid = bool(avg_wrist_height >= required_wrist_height)
+    if avg_chest_height > 0:
+        depth_percentage = ((avg_wrist_height - avg_chest_height) / avg_chest_height) * 100
+    else:
+        depth_percentage = 0
+    depth_missed_by = abs(required_wrist_height - avg_wrist_height) if not depth_valid else 0
+    return {
+        "validation_status": "valid" if depth_valid else "invalid",
+        "depth_valid": depth_valid,
+        "wrist_height": float(avg_wrist_height),
+        "chest_height": float(avg_chest_height),
+        "depth_percentage": float(depth_percentage),
+        "depth_missed_by": float(depth_missed_by),
+    }
+
+
+REFERENCE = {
+    "squat": (_squat_signal, SQUAT_MOVEMENT_THRESHOLD, reference_validate_squat),
+    "benchpress": (_benchpress_signal, BENCHPRESS_MOVEMENT_THRESHOLD, reference_validate_benchpress),
+}
+
+
+def reference_cycles(positions, frame_indices, raw_position, threshold, window_size=3):
+    """The original per-frame state machine; raw_position(frame_index) gives the unsmoothed signal"""
+    if len(positions) < 3:
+        return []
+    smoothed_positions = np.convolve(positions, np.ones(window_size) / window_size, mode='valid')
+    cycles = []
+    state = "unknown"
+    rep_start_frame = None
+    rep_low_frames = []
+
+    for i in range(1, len(smoothed_positions) - 1):
+        actual_index = frame_indices[i + (window_size // 2)]
+        if state == "unknown":
+            if smoothed_positions[i] < np.mean(smoothed_positions):
+                state = "high"
+                rep_start_frame = actual_index
+        elif state == "high":
+            if smoothed_positions[i] > smoothed_positions[i - 1] + threshold:
+                state = "low"
+                rep_low_frames = [actual_index]
+        elif state == "low":
+            rep_low_frames.append(actual_index)
+            if smoothed_positions[i] < smoothed_positions[i - 1] - threshold:
+                state = "high"
+                rep_end = actual_index
+                if rep_start_frame is not None and len(rep_low_frames) > 0:
+                    lowest_point_frame = rep_low_frames[0]
+                    max_y = -float('inf')
+                    for frame_idx in rep_low_frames:
+                        y = raw_position(frame_idx)
+                        if y is not None and y > max_y:
+                            max_y = y
+                            lowest_point_frame = frame_idx
+                    cycles.append((rep_start_frame, rep_end, lowest_point_frame))
+                rep_start_frame = rep_end
+                rep_low_frames = []
+    return cycles
+
+
+def reference_count(pose_data, exercise):
+    signal, threshold, validate = REFERENCE[exercise]
+    positions, frame_indices = [], []
+    for i, frame_data in enumerate(pose_data):
+        position = signal(frame_data)
+        if position is not None:
+            positions.append(position)
+            frame_indices.append(i)
+
+    cycles = reference_cycles(positions, frame_indices, lambda i: signal(pose_data[i]), threshold)
+    reps = []
+    for start, end, lowest in cycles:
+        rep = {"rep_number": len(reps) + 1, "start_frame": start, "end_frame": end, "lowest_point_frame": lowest}
+        rep.update(validate(pose_data, lowest))
+        reps.append(rep)
+    return {"rep_count": len(reps), "reps_data": reps}
+
+
+# Random inputs
+
+def random_signal(rng, num_frames):
+    """Tracked y-coordinate: noisy sine reps, a random walk, or pauses between reps"""
+    kind = rng.integers(3)
+    t = np.arange(num_frames)
+    if kind == 0:
+        period = rng.uniform(5, 30)
+        signal = 0.5 + rng.uniform(0.03, 0.2) * np.sin(2 * np.pi * t / period + rng.uniform(0, 2 * np.pi))
+    elif kind == 1:
+        signal = 0.5 + np.cumsum(rng.normal(0, 0.02, num_frames))
+    else:
+        signal = np.full(num_frames, 0.4)
+        for start in range(int(rng.integers(0, 6)), num_frames - 8, int(rng.integers(10, 20))):
+            signal[start:start + 7] += rng.uniform(0.05, 0.25) * np.sin(np.linspace(0, np.pi, 7))
+    return signal + rng.normal(0, 0.005, num_frames)
+
+
+def random_pose_data(rng, exercise, num_frames=None, missing=0.1, truncated=0.03):
+    """
+    analyze_pose-style list of frames with random landmarks following a random signal.
+    Some frames have no pose (None) and some hold only 20 landmarks (too few for validation).
+    """
+    if num_frames is None:
+        num_frames = int(rng.integers(0, 120))
+    signal = random_signal(rng, num_frames)
+    landmarks = rng.uniform(0.2, 0.8, (num_frames, 33, 4))
+    if exercise == "squat":
+        landmarks[:, 0, 1] = signal
+    else:
+        offset = rng.normal(0, 0.01, num_frames)
+        landmarks[:, 15, 1] = signal + offset
+        landmarks[:, 16, 1] = signal - offset
+
+    pose_data = []
+    for frame in landmarks.tolist():
+        draw = rng.random()
+        if draw < missing:
+            pose_data.append(None)
+        elif draw < missing + truncated:
+            pose_data.append(frame[:20])
+        else:
+            pose_data.append(frame)
+    return pose_data
+
+
+def assert_reps_equal(actual, expected, tolerance=0.0):
+    assert actual["rep_count"] == expected["rep_count"]
+    assert len(actual["reps_data"]) == len(expected["reps_data"])
+    for actual_rep, expected_rep in zip(actual["reps_data"], expected["reps_data"]):
+        assert actual_rep.keys() == expected_rep.keys()
+        for name, expected_value in expected_rep.items():
+            actual_value = actual_rep[name]
+            if isinstance(expected_value, float):
+                assert actual_value == pytest.approx(expected_value, rel=0, abs=tolerance), name
+            else:
+                assert actual_value == expected_value, name
+
+
+COUNTERS = {"squat": count_reps, "benchpress": count_benchpress_reps}
+EXERCISE_LANDMARKS = {"squat": SQUAT_LANDMARKS, "benchpress": BENCHPRESS_LANDMARKS}
+
+
+@pytest.mark.parametrize("exercise", ["squat", "benchpress"])
+@pytest.mark.parametrize("seed", SEEDS)
+def test_count_matches_reference_on_lists(exercise, seed):
+    pose_data = random_pose_data(np.random.default_rng(seed), exercise)
+    assert_reps_equal(COUNTERS[exercise](pose_data), reference_count(pose_data, exercise))
+
+
+@pytest.mark.parametrize("exercise", ["squat", "benchpress"])
+@pytest.mark.parametrize("seed", SEEDS)
+def test_count_matches_reference_on_pose_sequences(exercise, seed):
+    rng = np.random.default_rng(1000 + seed)
+    sequence = PoseSequence.from_list(random_pose_data(rng, exercise, truncated=0))
+    # The reference sees the same float32-rounded coordinates the sequence holds
+    expected = reference_count(sequence.to_list(), exercise)
+
+    assert_reps_equal(COUNTERS[exercise](sequence), expected, FLOAT32_TOLERANCE)
+    # Sequences holding only the exercise's landmarks give the same reps
+    subset = sequence.subset(EXERCISE_LANDMARKS[exercise])
+    assert_reps_equal(COUNTERS[exercise](subset), expected, FLOAT32_TOLERANCE)
+
+
+@pytest.mark.parametrize("exercise", ["squat", "benchpress"])
+@pytest.mark.parametrize("seed", range(5))
+def test_count_finds_synthetic_reps(exercise, seed):
+    from benchmarks.synthetic import synthetic_pose_sequence
+
+    sequence = synthetic_pose_sequence(180, exercise, reps=5, seed=seed)
+    result = COUNTERS[exercise](sequence)
+    assert result["rep_count"] == 5
+    assert_reps_equal(result, reference_count(sequence.to_list(), exercise), FLOAT32_TOLERANCE)
+
+
+@pytest.mark.parametrize("threshold", [0.0, 0.005, 0.02, 0.05])
+@pytest.mark.parametrize("seed", SEEDS)
+def test_detect_rep_cycles_matches_reference(threshold, seed):
+    rng = np.random.default_rng(2000 + seed)
+    num_frames = int(rng.integers(0, 100))
+    positions = random_signal(rng, num_frames).tolist()
+    # Detected frames are not contiguous when some frames had no pose
+    frame_indices = np.cumsum(rng.integers(1, 4, num_frames)).tolist()
+    raw = dict(zip(frame_indices, positions))
+
+    expected = reference_cycles(positions, frame_indices, raw.get, threshold)
+    assert detect_rep_cycles(positions, frame_indices, threshold) == expected
+
+
+@pytest.mark.parametrize("exercise", ["squat", "benchpress"])
+@pytest.mark.parametrize("seed", range(10))
+def test_batch_validators_match_scalar_reference(exercise, seed):
+    rng = np.random.default_rng(3000 + seed)
+    pose_data = random_pose_data(rng, exercise, num_frames=40, missing=0.2, truncated=0.2)
+    # Out-of-bounds indices are reported as invalid, like the scalar validator did
+    frame_indices = rng.integers(-3, 43, 25).tolist()
+    batch = validate_squat_depth_batch if exercise == "squat" else validate_benchpress_depth_batch
+    _, _, validate = REFERENCE[exercise]
+
+    rows = validation_rows(batch(pose_data, frame_indices))
+    assert rows == [validate(pose_data, frame_index) for frame_index in frame_indices]
+
+    sequence = PoseSequence.from_list(pose_data)
+    rows = validation_rows(batch(sequence, frame_indices))
+    expected = [validate(sequence.to_list(), frame_index) for frame_index in frame_indices]
+    for row, expected_row in zip(rows, expected):
+        for name, expected_value in expected_row.items():
+            if isinstance(expected_value, float):
+                assert row[name] == pytest.approx(expected_value, rel=0, abs=FLOAT32_TOLERANCE), name
+            else:
+                assert row[name] == expected_value, name
+
+
+# Streaming (RepCounter) vs batch
+
+STREAMING = {"squat": RepCounter.squat, "benchpress": RepCounter.benchpress}
+
+
+@pytest.mark.parametrize("exercise", ["squat", "benchpress"])
+@pytest.mark.parametrize("seed", SEEDS)
+def test_rep_counter_extend_matches_batch(exercise, seed):
+    # Complete clips: extend() starts from the clip's mean like the batch functions, on any signal
+    pose_data = random_pose_data(np.random.default_rng(4000 + seed), exercise)
+    sequence = PoseSequence.from_list(pose_data)
+    for data in (pose_data, sequence, sequence.subset(EXERCISE_LANDMARKS[exercise])):
+        assert STREAMING[exercise]().extend(data) == COUNTERS[exercise](data)["reps_data"]
+
+
+@pytest.mark.parametrize("exercise", ["squat", "benchpress"])
+@pytest.mark.parametrize("seed", SEEDS)
+def test_rep_counter_push_matches_batch_for_sets_starting_at_top(exercise, seed):
+    from benchmarks.synthetic import synthetic_pose_sequence
+
+    rng = np.random.default_rng(seed)
+    sequence = synthetic_pose_sequence(
+        int(rng.integers(30, 300)), exercise, reps=int(rng.integers(1, 8)), missing=rng.uniform(0, 0.2), seed=seed,
+    )
+    counter = STREAMING[exercise]()
+    reps = [rep for rep in map(counter.push, sequence) if rep is not None]
+    assert reps == COUNTERS[exercise](sequence)["reps_data"]
+
+
+def test_rep_counter_push_differs_from_batch_when_starting_mid_rep():
+    from benchmarks.synthetic import synthetic_pose_sequence
+
+    # Tracking starts at the bottom of the first rep: push() can't know the clip's mean yet and
+    # starts "high" on the way up, where the batch functions wait for the first frame above the
+    # clip's mean (documented divergence); extend() over the same clip matches the batch again
+    sequence = synthetic_pose_sequence(120, "squat", reps=3, missing=0, seed=0)
+    sequence = sequence[count_reps(sequence)["reps_data"][0]["lowest_point_frame"]:]
+    batch = count_reps(sequence)["reps_data"]
+    counter = RepCounter.squat()
+    pushed = [rep for rep in map(counter.push, sequence) if rep is not None]
+
+    assert len(pushed) == len(batch) == 2
+    assert pushed[0]["start_frame"] < batch[0]["start_frame"]
+    assert pushed[0]["end_frame"] == batch[0]["end_frame"]
+    assert pushed[1:] == batch[1:]
+    assert RepCounter.squat().extend(sequence) == batch
@@ -0,0 +1,174 @@
+"""
+Session history: saved aggregates, per-user trend queries and pose storage (SQLite in a temp dir).
+"""
+
+from datetime import datetime, timezone
+
+import numpy as np
+import pytest
+
+from app.exercises import get_exercise
+from app.utils.pose_sequence import PoseSequence
+from app.utils.session_store import SessionStore
+
+SQUAT = get_exercise("squat")
+BENCHPRESS = get_exercise("benchpress")
+
+
+def _at(year, month, day, hour=12):
+    return datetime(year, month, day, hour, tzinfo=timezone.utc).timestamp()
+
+
+def _squat_reps(*depths):
+    """One rep per depth_difference; reps at or below the knees (>= 0) are valid"""
+    return [
+        {"rep_number": i + 1, "start_frame": 3 * i, "end_frame": 3 * i + 3, "lowest_point_frame": 3 * i + 1,
+         "validation_status": "valid" if depth >= 0 else "invalid", "depth_difference": depth}
+        for i, depth in enumerate(depths)
+    ]
+
+
+def _bench_reps(*depths):
+    return [
+        {"rep_number": i + 1, "start_frame": i, "end_frame": i + 1, "lowest_point_frame": i,
+         "validation_status": "valid" if depth >= -5 else "invalid", "depth_percentage": depth}
+        for i, depth in enumerate(depths)
+    ]
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = SessionStore(str(tmp_path / "sessions.sqlite3"))
+    yield store
+    store.close()
+
+
+@pytest.fixture
+def history(store):
+    """Two users' sessions over two weeks of January and one in February 2026"""
+    store.save_session(SQUAT, _squat_reps(0.02, -0.01, 0.04), 30, user_id="ana", created_at=_at(2026, 1, 5, 9))
+    store.save_session(SQUAT, _squat_reps(0.01), 12, user_id="ana", created_at=_at(2026, 1, 5, 18))
+    store.save_session(SQUAT, _squat_reps(-0.03, 0.05), 20, user_id="ana", created_at=_at(2026, 1, 13))
+    store.save_session(BENCHPRESS, _bench_reps(2.0, -8.0), 20, user_id="ana", created_at=_at(2026, 1, 13))
+    store.save_session(SQUAT, _squat_reps(), 9, user_id="ana", created_at=_at(2026, 2, 2))
+    store.save_session(SQUAT, _squat_reps(0.5, 0.5), 20, user_id="ben", created_at=_at(2026, 1, 5))
+    return store
+
+
+def test_daily_trends_aggregate_sessions(history):
+    trends = history.trends("ana", "squat", "day")
+    assert [row["period"] for row in trends] == ["2026-01-05", "2026-01-13", "2026-02-02"]
+
+    jan5 = trends[0]
+    assert jan5["exercise"] == "squat"
+    assert jan5["sessions"] == 2
+    assert jan5["reps"] == 4
+    assert jan5["valid_reps"] == 3
+    assert jan5["valid_rate"] == pytest.approx(0.75)
+    assert jan5["avg_depth"] == pytest.approx((0.02 - 0.01 + 0.04 + 0.01) / 4)
+    assert jan5["best_depth"] == pytest.approx(0.04)
+
+    # A session without reps counts as a session but has no rates or depths
+    feb2 = trends[2]
+    assert (feb2["sessions"], feb2["reps"], feb2["valid_reps"]) == (1, 0, 0)
+    assert feb2["valid_rate"] is None and feb2["avg_depth"] is None and feb2["best_depth"] is None
+
+
+def test_weekly_and_monthly_buckets(history):
+    weekly = history.trends("ana", "squat", "week")
+    assert [(row["period"], row["sessions"], row["reps"]) for row in weekly] == [
+        ("2026-W02", 2, 4), ("2026-W03", 1, 2), ("2026-W06", 1, 0),
+    ]
+    monthly = history.trends("ana", "squat", "month")
+    assert [(row["period"], row["sessions"], row["reps"]) for row in monthly] == [("2026-01", 3, 6), ("2026-02", 1, 0)]
+    assert monthly[0]["avg_depth"] == pytest.approx((0.02 - 0.01 + 0.04 + 0.01 - 0.03 + 0.05) / 6)
+    assert monthly[0]["best_depth"] == pytest.approx(0.05)
+
+
+def test_weeks_span_the_new_year(store):
+    # ISO week 2026-W01 runs from Monday 2025-12-29 to Sunday 2026-01-04
+    store.save_session(SQUAT, _squat_reps(0.01), 3, user_id="ana", created_at=_at(2025, 12, 28))
+    store.save_session(SQUAT, _squat_reps(0.02), 3, user_id="ana", created_at=_at(2025, 12, 29))
+    store.save_session(SQUAT, _squat_reps(0.03, 0.01), 6, user_id="ana", created_at=_at(2025, 12, 31))
+    store.save_session(SQUAT, _squat_reps(-0.02), 3, user_id="ana", created_at=_at(2026, 1, 1))
+    store.save_session(SQUAT, _squat_reps(0.04), 3, user_id="ana", created_at=_at(2026, 1, 4, 23))
+
+    weekly = store.trends("ana", "squat", "week")
+    assert [(row["period"], row["sessions"], row["reps"], row["valid_reps"]) for row in weekly] == [
+        ("2025-W52", 1, 1, 1), ("2026-W01", 4, 5, 4),
+    ]
+    assert weekly[1]["avg_depth"] == pytest.approx((0.02 + 0.03 + 0.01 - 0.02 + 0.04) / 5)
+    assert weekly[1]["best_depth"] == pytest.approx(0.04)
+    # Months still split at the calendar boundary
+    assert [(row["period"], row["sessions"]) for row in store.trends("ana", "squat", "month")] == [
+        ("2025-12", 3), ("2026-01", 2),
+    ]
+
+
+def test_trends_split_by_exercise_and_user(history):
+    trends = history.trends("ana", bucket="month")
+    assert [(row["period"], row["exercise"]) for row in trends] == [
+        ("2026-01", "squat"), ("2026-01", "benchpress"), ("2026-02", "squat"),
+    ]
+    bench = trends[1]
+    assert (bench["sessions"], bench["reps"], bench["valid_reps"]) == (1, 2, 1)
+    assert bench["avg_depth"] == pytest.approx(-3.0)
+    assert bench["best_depth"] == pytest.approx(2.0)
+
+    # Other users' sessions never leak into a user's trends
+    assert [(row["sessions"], row["reps"]) for row in history.trends("ben", bucket="month")] == [(1, 2)]
+    assert history.trends("nobody") == []
+
+
+def test_trends_time_range(history):
+    trends = history.trends("ana", "squat", "day", since=_at(2026, 1, 6, 0), until=_at(2026, 2, 1, 0))
+    assert [row["period"] for row in trends] == ["2026-01-13"]
+
+
+def test_trends_reject_unknown_bucket(store):
+    with pytest.raises(ValueError):
+        store.trends("ana", bucket="hour")
+
+
+def test_list_get_and_delete_sessions(history):
+    sessions = history.list_sessions(user_id="ana", exercise="squat")
+    assert [session["created_at"] for session in sessions] == sorted(
+        (session["created_at"] for session in sessions), reverse=True,
+    )
+    assert len(sessions) == 4
+    assert [s["rep_count"] for s in history.list_sessions(user_id="ana", exercise="squat", limit=2, offset=1)] == [2, 1]
+
+    session = history.get_session(sessions[-1]["session_id"])
+    assert session["reps_data"] == _squat_reps(0.02, -0.01, 0.04)
+    assert session["valid_rate"] == pytest.approx(2 / 3)
+
+    assert history.delete_session(session["session_id"]) is True
+    assert history.get_session(session["session_id"]) is None
+    assert history.delete_session(session["session_id"]) is False
+    assert history.trends("ana", "squat", "day")[0]["sessions"] == 1
+
+
+def test_pose_is_stored_compactly_for_the_exercise_landmarks(store):
+    rng = np.random.default_rng(0)
+    landmarks = rng.uniform(0, 1, (6, 33, 4)).astype(np.float32)
+    valid = np.array([True, True, False, True, True, True])
+    landmarks[~valid] = np.nan
+    pose = PoseSequence(landmarks, valid, frame_numbers=[0, 3, 6, 7, 8, 12])
+
+    session_id = store.save_session(SQUAT, _squat_reps(0.01), 6, pose_data=pose)
+    stored = store.get_session(session_id, include_pose=True)["pose"]
+
+    assert stored.landmark_ids == SQUAT.landmarks
+    np.testing.assert_array_equal(stored.valid, valid)
+    np.testing.assert_array_equal(stored.frame_numbers, pose.frame_numbers)
+    # float16 keeps about 3 significant digits of the normalized coordinates
+    np.testing.assert_allclose(stored.landmarks[valid], pose.subset(SQUAT.landmarks).landmarks[valid], atol=1e-3)
+
+
+def test_disabled_store_is_a_no_op(tmp_path):
+    store = SessionStore(None)
+    assert store.save_session(SQUAT, _squat_reps(0.01), 3) is None
+    assert store.list_sessions() == []
+    assert store.trends("ana") == []
+    assert store.get_session("missing") is None
+    assert list(tmp_path.iterdir()) == []
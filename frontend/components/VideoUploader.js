@@ -8,6 +8,7 @@ export default function VideoUploader({ exerciseType = 'squat' }) {
   const [poseData, setPoseData] = useState(null);
   const [repCount, setRepCount] = useState(0);
   const [repsData, setRepsData] = useState([]);
+  const [frameNumbers, setFrameNumbers] = useState(null);  // Source video frame of each pose row (adaptive sampling only)
   const [showReps, setShowReps] = useState(false);
   const [showPoseData, setShowPoseData] = useState(false);
   const [llmFeedback, setLlmFeedback] = useState('');
@@ -19,7 +20,8 @@ export default function VideoUploader({ exerciseType = 'squat' }) {
     const formData = new FormData();
     formData.append('file', file);
 
-    const uploadEndpoint = `http://localhost:4900/${exerciseType}/upload`;
+    // Only the landmarks the exercise uses (see "subset" in the backend's pose_serialization.py)
+    const uploadEndpoint = `http://localhost:4900/${exerciseType}/upload?pose_format=subset`;
     const response = await axios.post(uploadEndpoint, formData);
     console.log('Full response:', response.data);
     console.log('Reps data:', response.data.reps_data);
@@ -30,6 +32,7 @@ export default function VideoUploader({ exerciseType = 'squat' }) {
     setPoseData(response.data.pose_data);
     setRepCount(response.data.rep_count || 0);
     setRepsData(response.data.reps_data || []);
+    setFrameNumbers(response.data.frame_numbers || null);
     setShowReps(false);  // Don't auto-show reps after upload
     setShowPoseData(false);  // Hide pose data by default
     setLlmFeedback('');  // Clear previous LLM feedback
@@ -42,17 +45,45 @@ export default function VideoUploader({ exerciseType = 'squat' }) {
       // Get selected model from localStorage
       const selectedModel = localStorage.getItem('selectedModel') || 'ollama';
       
-      const feedbackEndpoint = `http://localhost:4900/${exerciseType}/generate-feedback`;
-      const response = await axios.post(feedbackEndpoint, {
-        reps_data: repsData,
-        rep_count: repCount,
-        model: selectedModel
+      // Stream the feedback as Server-Sent Events so the first words show up while the LLM is still generating
+      const feedbackEndpoint = `http://localhost:4900/${exerciseType}/generate-feedback/stream`;
+      const response = await fetch(feedbackEndpoint, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({
+          reps_data: repsData,
+          rep_count: repCount,
+          model: selectedModel
+        })
       });
-      
-      if (response.data.success) {
-        setLlmFeedback(response.data.feedback);
-      } else {
-        setLlmFeedback(`Error: ${response.data.feedback}`);
+      if (!response.ok || !response.body) {
+        throw new Error(`Feedback request failed with status ${response.status}`);
+      }
+
+      setLlmFeedback('');
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = '';
+      while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        // Events are separated by a blank line: "event: <name>\ndata: <json>\n\n"
+        const events = buffer.split('\n\n');
+        buffer = events.pop();
+        for (const rawEvent of events) {
+          const eventName = (rawEvent.match(/^event: (.*)$/m) || [])[1];
+          const dataLine = (rawEvent.match(/^data: (.*)$/m) || [])[1];
+          if (!dataLine) continue;
+          const data = JSON.parse(dataLine);
+          if (eventName === 'token') {
+            setLlmFeedback((previous) => previous + data.token);
+          } else if (eventName === 'done') {
+            setLlmFeedback(data.feedback);
+          } else if (eventName === 'error') {
+            setLlmFeedback(`Error: ${data.feedback}`);
+          }
+        }
       }
     } catch (error) {
       setLlmFeedback('Error: Unable to generate feedback. Please ensure the backend is running on port 4900.');
@@ -67,6 +98,7 @@ export default function VideoUploader({ exerciseType = 'squat' }) {
     setPoseData(null);
     setRepCount(0);
     setRepsData([]);
+    setFrameNumbers(null);
     setShowReps(false);
     setShowPoseData(false);
     setLlmFeedback('');
@@ -330,7 +362,11 @@ export default function VideoUploader({ exerciseType = 'squat' }) {
                   </span>
                 </div>
                 <div style={{ fontSize: '0.9rem', color: '#5a6c7d', marginBottom: '12px', fontFamily: 'monospace', background: '#f8f9fa', padding: '8px 12px', borderRadius: '6px' }}>
-                  Frames {rep.start_frame} → {rep.end_frame} (Bottom: {rep.lowest_point_frame ?? 'N/A'})
+                  {frameNumbers ? (
+                    <>Video frames {frameNumbers[rep.start_frame]} → {frameNumbers[rep.end_frame]} (Bottom: {rep.lowest_point_frame != null ? frameNumbers[rep.lowest_point_frame] : 'N/A'})</>
+                  ) : (
+                    <>Frames {rep.start_frame} → {rep.end_frame} (Bottom: {rep.lowest_point_frame ?? 'N/A'})</>
+                  )}
                 </div>
                 <div style={{ fontSize: '0.9rem', marginTop: '12px' }}>
                   <div style={{ fontWeight: '600', color: '#2c3e50', marginBottom: '10px', fontSize: '0.95rem' }}>Form Analysis</div>
@@ -496,12 +532,12 @@ export default function VideoUploader({ exerciseType = 'squat' }) {
                   const landmarkNames = [
                     "nose", "left_eye_inner", "left_eye", "left_eye_outer", "right_eye_inner", "right_eye", "right_eye_outer", "left_ear", "right_ear", "mouth_left", "mouth_right", "left_shoulder", "right_shoulder", "left_elbow", "right_elbow", "left_wrist", "right_wrist", "left_pinky", "right_pinky", "left_index", "right_index", "left_thumb", "right_thumb", "left_hip", "right_hip", "left_knee", "right_knee", "left_ankle", "right_ankle", "left_heel", "right_heel", "left_foot_index", "right_foot_index"
                   ];
-                  const frame = poseData[0] || [];
+                  const frame = poseData.frames[0] || [];
                   return frame.map((lm, idx) => (
                     <tr key={idx} style={{ borderBottom: '1px solid #f1f3f5', transition: 'background 0.2s' }}
                         onMouseEnter={(e) => e.currentTarget.style.background = '#f8f9fa'}
                         onMouseLeave={(e) => e.currentTarget.style.background = 'transparent'}>
-                      <td style={{ padding: '10px 16px', fontWeight: '600', color: buttonColor }}>{landmarkNames[idx] || `Landmark ${idx}`}</td>
+                      <td style={{ padding: '10px 16px', fontWeight: '600', color: buttonColor }}>{landmarkNames[poseData.landmark_ids[idx]] || `Landmark ${poseData.landmark_ids[idx]}`}</td>
                       <td style={{ padding: '10px 16px', fontFamily: 'monospace', color: '#5a6c7d' }}>{lm[0].toFixed(4)}</td>
                       <td style={{ padding: '10px 16px', fontFamily: 'monospace', color: '#5a6c7d' }}>{lm[1].toFixed(4)}</td>
                       <td style={{ padding: '10px 16px', fontFamily: 'monospace', color: '#5a6c7d' }}>{lm[2].toFixed(4)}</td>
@@ -513,7 +549,7 @@ export default function VideoUploader({ exerciseType = 'squat' }) {
             </table>
           </div>
           <div style={{ marginTop: '16px', padding: '12px', background: '#f8f9fa', borderRadius: '8px', fontSize: '0.9rem', color: '#5a6c7d', textAlign: 'center' }}>
-            Total frames with pose data: <strong style={{ color: '#2c3e50' }}>{poseData.length}</strong>
+            Total frames with pose data: <strong style={{ color: '#2c3e50' }}>{poseData.frames.length}</strong>
           </div>
         </div>
       )}